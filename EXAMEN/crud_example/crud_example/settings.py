@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -121,3 +122,7 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Token de la API de vehículos para integraciones (Authorization: Bearer ...).
+# Vacío: la API solo acepta escrituras de sesiones iniciadas con su token CSRF.
+VEHICULOS_API_TOKEN = os.environ.get('VEHICULOS_API_TOKEN', '')
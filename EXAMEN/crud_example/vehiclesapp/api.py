@@ -0,0 +1,260 @@
+"""
+API JSON de vehículos para integraciones.
+
+  GET    /api/vehiculos/         listado por cursor, con los filtros y el orden de la lista HTML
+  POST   /api/vehiculos/         crea en lote: [{placa, marca, color, modelo}, ...]
+  PATCH  /api/vehiculos/         actualiza en lote: [{id, campo: valor, ...}, ...]
+  DELETE /api/vehiculos/         elimina en lote: {"ids": [...]}
+  GET    /api/vehiculos/<id>/    un vehículo
+  PATCH  /api/vehiculos/<id>/    actualiza uno
+  DELETE /api/vehiculos/<id>/    elimina uno
+
+Los lotes son todo o nada: si una fila falla no se guarda ninguna y la
+respuesta (400) trae los errores por índice. Los GET llevan ETag y responden
+304 a If-None-Match, así un cliente que sincroniza no vuelve a bajar lo que
+ya tiene.
+
+Leer es público, como la lista HTML. Escribir exige el encabezado
+"Authorization: Bearer <VEHICULOS_API_TOKEN>" (integraciones) o una sesión
+iniciada con su token CSRF (páginas del mismo sitio), y un cuerpo
+application/json: otro Content-Type se rechaza con 415, así un formulario de
+otro sitio no puede enviar el JSON como text/plain.
+"""
+
+import json
+import secrets
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.middleware.csrf import CsrfViewMiddleware
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .consultas import TAMANO_PAGINA, filtrar_vehiculos, pagina_keyset
+from .forms import FiltroVehiculoForm
+from .importacion import CAMPOS, datos_formulario, importar_vehiculos, validar_vehiculo
+from .models import Vehiculo
+
+MAX_LOTE = 1000
+
+
+class ErrorAPI(Exception):
+    def __init__(self, status, data):
+        super().__init__(status)
+        self.status = status
+        self.data = data
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+def _error(mensaje, codigo):
+    return [{'message': mensaje, 'code': codigo}]
+
+
+def _serializar(vehiculo):
+    return {
+        'id': vehiculo.id,
+        'placa': vehiculo.placa,
+        'marca': vehiculo.marca,
+        'color': vehiculo.color,
+        'color_nombre': vehiculo.get_color_display(),
+        'modelo': vehiculo.modelo,
+    }
+
+
+def _con_etag(request, response):
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response.headers['ETag'], response=response)
+
+
+def _cuerpo(request):
+    try:
+        return json.loads(request.body or b'null')
+    except ValueError:
+        raise ErrorAPI(400, {'error': 'El cuerpo no es JSON válido.'})
+
+
+def _lote(request):
+    datos = _cuerpo(request)
+    if isinstance(datos, dict):
+        datos = [datos]
+    if not isinstance(datos, list) or not datos:
+        raise ErrorAPI(400, {'error': 'Se esperaba un objeto o una lista de objetos.'})
+    if len(datos) > MAX_LOTE:
+        raise ErrorAPI(400, {'error': f'Máximo {MAX_LOTE} elementos por lote.'})
+    return datos
+
+
+def _token_valido(request):
+    token = getattr(settings, 'VEHICULOS_API_TOKEN', '')
+    encabezado = request.headers.get('Authorization', '')
+    return bool(token) and secrets.compare_digest(encabezado.encode(), f"Bearer {token}".encode())
+
+
+def _autorizar_escritura(request):
+    """Token de la API, o sesión con CSRF válido; además el cuerpo debe ser JSON."""
+    if not _token_valido(request):
+        if not request.user.is_authenticated:
+            raise ErrorAPI(401, {'error': 'Se requiere autenticación.'})
+        # la misma verificación que hace el middleware en las vistas sin csrf_exempt
+        rechazo = CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {})
+        if rechazo is not None:
+            raise ErrorAPI(403, {'error': 'Token CSRF inválido o ausente.'})
+    if request.body and request.content_type != 'application/json':
+        raise ErrorAPI(415, {'error': 'El cuerpo debe enviarse como application/json.'})
+
+
+def _endpoint(*metodos):
+    """
+    Métodos permitidos + autorización de escrituras + ErrorAPI convertido en
+    respuesta JSON. csrf_exempt porque las integraciones con token no tienen
+    cookie; la revisión CSRF de las sesiones se hace en _autorizar_escritura.
+    """
+    def decorador(vista):
+        @csrf_exempt
+        @require_http_methods(metodos)
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            try:
+                if request.method not in ('GET', 'HEAD'):
+                    _autorizar_escritura(request)
+                return vista(request, *args, **kwargs)
+            except ErrorAPI as e:
+                respuesta = _json(e.data, e.status)
+                if e.status == 401:
+                    respuesta['WWW-Authenticate'] = 'Bearer'
+                return respuesta
+        return envuelta
+    return decorador
+
+
+def _listar(request):
+    filtros = FiltroVehiculoForm(request.GET)
+    if not filtros.is_valid():
+        raise ErrorAPI(400, {'errores': filtros.errors.get_json_data()})
+    datos = filtros.cleaned_data
+    vehiculos = filtrar_vehiculos(
+        Vehiculo.objects.all(),
+        placa=datos['placa'],
+        marca=datos['marca'],
+        color=datos['color'],
+        modelo_min=datos['modelo_min'],
+        modelo_max=datos['modelo_max'],
+    )
+    pagina = pagina_keyset(
+        vehiculos,
+        orden=datos['orden'] or 'id',
+        despues=request.GET.get('despues', ''),
+        antes=request.GET.get('antes', ''),
+        tamano=datos['por_pagina'] or TAMANO_PAGINA,
+    )
+    return _con_etag(request, _json({
+        'resultados': [_serializar(v) for v in pagina['objetos']],
+        'siguiente': pagina['siguiente'],
+        'anterior': pagina['anterior'],
+        'orden': pagina['orden'],
+    }))
+
+
+def _crear(registros):
+    filas = ((i, r if isinstance(r, dict) else None) for i, r in enumerate(registros))
+    with transaction.atomic():
+        resultado = importar_vehiculos(filas, devolver_creados=True)
+        if resultado['errores']:
+            # la excepción deshace también lo que ya se había insertado
+            errores = sorted(resultado['errores'], key=lambda e: e['linea'])
+            raise ErrorAPI(400, {'errores': [{'indice': e['linea'], 'errores': e['errores']} for e in errores]})
+    return resultado['vehiculos']
+
+
+def _actualizar(cambios):
+    """Valida todos los cambios y los guarda con un solo bulk_update."""
+    errores = []
+    ids = [c.get('id') if isinstance(c, dict) else None for c in cambios]
+    existentes = Vehiculo.objects.in_bulk([pk for pk in ids if isinstance(pk, int)])
+    vistos = set()
+    vehiculos = []
+    for indice, (cambio, pk) in enumerate(zip(cambios, ids)):
+        vehiculo = existentes.get(pk) if isinstance(pk, int) else None
+        if vehiculo is None:
+            errores.append({'indice': indice, 'errores': {'id': _error('No existe un vehículo con ese id.', 'not_found')}})
+            continue
+        if pk in vistos:
+            errores.append({'indice': indice, 'errores': {'id': _error('Id repetido en el lote.', 'duplicate')}})
+            continue
+        vistos.add(pk)
+        datos = {campo: getattr(vehiculo, campo) for campo in CAMPOS}
+        datos.update({campo: valor for campo, valor in cambio.items() if campo in CAMPOS})
+        actualizado, errores_fila = validar_vehiculo(datos_formulario(datos), vehiculo)
+        if errores_fila:
+            errores.append({'indice': indice, 'errores': errores_fila})
+            continue
+        vehiculos.append((indice, actualizado))
+
+    # unicidad de la placa normalizada por lote: contra la tabla (sin contar este lote) y dentro del lote
+    claves = [v.placa_normalizada for _, v in vehiculos]
+    ocupadas = set(
+        Vehiculo.objects.filter(placa_normalizada__in=claves).exclude(id__in=vistos)
+        .values_list('placa_normalizada', flat=True)
+    )
+    en_lote = set()
+    for indice, vehiculo in vehiculos:
+        if vehiculo.placa_normalizada in ocupadas or vehiculo.placa_normalizada in en_lote:
+            errores.append({'indice': indice, 'errores': {'placa': _error('Ya existe un vehículo con esta placa.', 'unique')}})
+        en_lote.add(vehiculo.placa_normalizada)
+    if errores:
+        raise ErrorAPI(400, {'errores': sorted(errores, key=lambda e: e['indice'])})
+
+    try:
+        with transaction.atomic():
+            Vehiculo.objects.bulk_update([v for _, v in vehiculos], CAMPOS + ['placa_normalizada'], batch_size=500)
+    except IntegrityError:
+        raise ErrorAPI(409, {'error': 'Conflicto de placas al guardar; no intercambie placas dentro de un mismo lote.'})
+    return [v for _, v in vehiculos]
+
+
+def _ids_a_eliminar(request):
+    datos = _cuerpo(request)
+    ids = datos.get('ids') if isinstance(datos, dict) else datos
+    if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+        raise ErrorAPI(400, {'error': 'Se esperaba {"ids": [enteros]}.'})
+    if len(ids) > MAX_LOTE:
+        raise ErrorAPI(400, {'error': f'Máximo {MAX_LOTE} elementos por lote.'})
+    return ids
+
+
+@_endpoint('GET', 'POST', 'PATCH', 'DELETE')
+def vehiculos(request):
+    if request.method == 'GET':
+        return _listar(request)
+    if request.method == 'POST':
+        return _json({'vehiculos': [_serializar(v) for v in _crear(_lote(request))]}, status=201)
+    if request.method == 'PATCH':
+        return _json({'vehiculos': [_serializar(v) for v in _actualizar(_lote(request))]})
+    eliminados, _ = Vehiculo.objects.filter(id__in=_ids_a_eliminar(request)).delete()
+    return _json({'eliminados': eliminados})
+
+
+@_endpoint('GET', 'PATCH', 'DELETE')
+def vehiculo(request, id):
+    if request.method == 'DELETE':
+        eliminados, _ = Vehiculo.objects.filter(id=id).delete()
+        if not eliminados:
+            raise ErrorAPI(404, {'error': 'Vehículo no encontrado.'})
+        return HttpResponse(status=204)
+    if request.method == 'PATCH':
+        cambio = _cuerpo(request)
+        if not isinstance(cambio, dict):
+            raise ErrorAPI(400, {'error': 'Se esperaba un objeto JSON.'})
+        if not Vehiculo.objects.filter(id=id).exists():
+            raise ErrorAPI(404, {'error': 'Vehículo no encontrado.'})
+        return _json(_serializar(_actualizar([{**cambio, 'id': id}])[0]))
+    encontrado = Vehiculo.objects.filter(id=id).first()
+    if encontrado is None:
+        raise ErrorAPI(404, {'error': 'Vehículo no encontrado.'})
+    return _con_etag(request, _json(_serializar(encontrado)))
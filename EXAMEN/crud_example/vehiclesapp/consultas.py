@@ -0,0 +1,131 @@
+"""
+Filtros y paginación por cursor (keyset) para el listado de vehículos.
+
+En lugar de OFFSET, cada página pide las filas que vienen después (o antes)
+de la última fila vista, comparando (campo de orden, id). Con los índices de
+Vehiculo esa consulta cuesta lo mismo en la primera página que en la
+milésima.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+
+from .placas import normalizar_placa
+
+ORDENES = ('id', 'placa', 'marca', 'modelo', 'color')
+# tipo del valor que guarda el cursor según el campo de orden
+_TIPO_CURSOR = {'id': int, 'placa': str, 'marca': str, 'modelo': int, 'color': str}
+TAMANO_PAGINA = 50
+TAMANO_MAXIMO = 200
+
+# Todo lo que empieza por un prefijo queda entre el prefijo y el prefijo
+# seguido del último carácter posible; así el filtro usa el índice.
+_ULTIMO_CARACTER = chr(0x10FFFF)
+
+
+def filtrar_vehiculos(qs, placa='', marca='', color='', modelo_min=None, modelo_max=None):
+    """Aplica los filtros del listado; los vacíos se ignoran."""
+    placa = normalizar_placa(placa)
+    if placa:
+        # sobre la clave normalizada: 'abc-1' encuentra 'ABC123'
+        qs = qs.filter(placa_normalizada__gte=placa, placa_normalizada__lt=placa + _ULTIMO_CARACTER)
+    if marca:
+        marca = marca.strip()
+        qs = qs.filter(marca__gte=marca, marca__lt=marca + _ULTIMO_CARACTER)
+    if color:
+        qs = qs.filter(color=color)
+    if modelo_min is not None:
+        qs = qs.filter(modelo__gte=modelo_min)
+    if modelo_max is not None:
+        qs = qs.filter(modelo__lte=modelo_max)
+    return qs
+
+
+def codificar_cursor(valor, pk):
+    crudo = json.dumps([valor, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip('=')
+
+
+def _es(valor, tipo):
+    # bool es subclase de int, pero no es un valor válido para ningún campo
+    return isinstance(valor, tipo) and not isinstance(valor, bool)
+
+
+def decodificar_cursor(cursor, campo='id'):
+    """
+    Retorna (valor, id) o None si el cursor no es válido, incluido el caso
+    en que el valor no es del tipo del campo de orden (un cursor de otro
+    orden o uno fabricado a mano).
+    """
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valor, pk = json.loads(crudo)
+    except (ValueError, TypeError):
+        return None
+    if not _es(pk, int) or not _es(valor, _TIPO_CURSOR.get(campo, int)):
+        return None
+    return valor, pk
+
+
+def _campo_orden(orden):
+    campo = orden.lstrip('-')
+    if campo not in ORDENES:
+        campo, orden = 'id', 'id'
+    return campo, orden.startswith('-')
+
+
+def pagina_keyset(qs, orden='id', despues='', antes='', tamano=TAMANO_PAGINA):
+    """
+    Una página de `qs` ordenada por `orden` (campo, con '-' para descendente)
+    y desempatada por id. `despues` / `antes` son cursores de otra página.
+
+    Retorna un dict con los objetos, el cursor `siguiente` y el `anterior`
+    (None cuando no hay más en esa dirección).
+    """
+    campo, descendente = _campo_orden(orden)
+    tamano = max(1, min(tamano, TAMANO_MAXIMO))
+
+    # un cursor inválido se ignora: se muestra la primera página
+    cursor = decodificar_cursor(despues, campo) if despues else None
+    hacia_atras = False
+    if cursor is None and antes:
+        cursor = decodificar_cursor(antes, campo)
+        hacia_atras = cursor is not None
+
+    # recorrer hacia atrás es recorrer hacia adelante con el orden invertido
+    invertido = descendente != hacia_atras
+    if cursor is not None:
+        valor, pk = cursor
+        if campo == 'id':
+            condicion = Q(id__lt=pk) if invertido else Q(id__gt=pk)
+        elif invertido:
+            condicion = Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'id__lt': pk})
+        else:
+            condicion = Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'id__gt': pk})
+        qs = qs.filter(condicion)
+    signo = '-' if invertido else ''
+    orden_sql = [f'{signo}id'] if campo == 'id' else [f'{signo}{campo}', f'{signo}id']
+
+    filas = list(qs.order_by(*orden_sql)[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(obj):
+        return codificar_cursor(getattr(obj, campo), obj.pk)
+
+    if hacia_atras:
+        siguiente = cursor_de(filas[-1]) if filas else None
+        anterior = cursor_de(filas[0]) if filas and hay_mas else None
+    else:
+        siguiente = cursor_de(filas[-1]) if filas and hay_mas else None
+        anterior = cursor_de(filas[0]) if filas and cursor is not None else None
+    return {
+        'objetos': filas,
+        'siguiente': siguiente,
+        'anterior': anterior,
+        'orden': f"{'-' if descendente else ''}{campo}",
+    }
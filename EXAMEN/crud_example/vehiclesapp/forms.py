@@ -1,7 +1,40 @@
 from django import forms
 from .models import Vehiculo
+from .consultas import ORDENES, TAMANO_MAXIMO, TAMANO_PAGINA
+from .placas import normalizar_placa
 
 class VehiculoForm(forms.ModelForm):
     class Meta:
         model = Vehiculo
-        fields = ['placa', 'marca', 'color', 'modelo']
\ No newline at end of file
+        fields = ['placa', 'marca', 'color', 'modelo']
+
+    def clean_placa(self):
+        placa = self.cleaned_data['placa']
+        if not normalizar_placa(placa):
+            raise forms.ValidationError('La placa debe tener letras o números.', code='invalid')
+        return placa
+
+    def validate_unique(self):
+        # la unicidad es sobre la placa normalizada, que no es campo del formulario
+        super().validate_unique()
+        clave = self.instance.placa_normalizada
+        if clave and 'placa' not in self._errors:
+            repetida = Vehiculo.objects.filter(placa_normalizada=clave).exclude(pk=self.instance.pk)
+            if repetida.exists():
+                self.add_error('placa', forms.ValidationError('Ya existe un vehículo con esta placa.', code='unique'))
+
+
+class FiltroVehiculoForm(forms.Form):
+    ORDEN_CHOICES = [(o, o.capitalize()) for o in ORDENES] + [(f'-{o}', f'{o.capitalize()} (desc.)') for o in ORDENES]
+
+    placa = forms.CharField(required=False, max_length=6, label='Placa empieza por')
+    marca = forms.CharField(required=False, max_length=10, label='Marca empieza por')
+    color = forms.ChoiceField(required=False, choices=[('', 'Todos')] + list(Vehiculo.COLORLIST))
+    modelo_min = forms.IntegerField(required=False, label='Modelo desde')
+    modelo_max = forms.IntegerField(required=False, label='Modelo hasta')
+    orden = forms.ChoiceField(required=False, choices=ORDEN_CHOICES)
+    por_pagina = forms.IntegerField(required=False, min_value=1, max_value=TAMANO_MAXIMO, initial=TAMANO_PAGINA)
+
+
+class ImportarVehiculosForm(forms.Form):
+    archivo = forms.FileField(help_text='CSV con encabezado (placa, marca, color, modelo) o JSONL, un objeto por línea.')
@@ -0,0 +1,89 @@
+"""
+Generador de vehículos de prueba.
+
+Con la misma semilla produce los mismos vehículos. Las placas (tres letras
+y tres dígitos) salen de una permutación afín de las 17.576.000 posibles,
+así que no se repiten sin tener que llevar un conjunto de las ya usadas;
+solo se saltan las que ya están en la base.
+
+En SQLite las filas se insertan con executemany directo sobre sqlite3, sin
+crear objetos del modelo; en otros motores con bulk_create.
+"""
+
+import math
+import random
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Vehiculo
+
+TAMANO_LOTE = 20_000
+MARCAS = ['CHEVROLET', 'RENAULT', 'MAZDA', 'TOYOTA', 'KIA', 'NISSAN', 'FORD', 'HYUNDAI', 'SUZUKI', 'VOLKSWAGEN']
+MODELOS = range(1990, 2026)
+_LETRAS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TOTAL_PLACAS = len(_LETRAS) ** 3 * 1000
+
+
+def placas(semilla):
+    """Itera todas las placas posibles en un orden que depende de la semilla."""
+    rnd = random.Random(semilla)
+    paso = rnd.randrange(1, TOTAL_PLACAS)
+    while math.gcd(paso, TOTAL_PLACAS) != 1:
+        paso += 1
+    inicio = rnd.randrange(TOTAL_PLACAS)
+    for i in range(TOTAL_PLACAS):
+        letras, numero = divmod((inicio + i * paso) % TOTAL_PLACAS, 1000)
+        a, resto = divmod(letras, 676)
+        b, c = divmod(resto, 26)
+        yield f"{_LETRAS[a]}{_LETRAS[b]}{_LETRAS[c]}{numero:03d}"
+
+
+def filas_vehiculos(cantidad, semilla, existentes):
+    """(placa, marca, color, modelo, placa_normalizada) de `cantidad` vehículos."""
+    if cantidad > TOTAL_PLACAS - len(existentes):
+        raise ValueError("No quedan tantas placas libres.")
+    rnd = random.Random(f"vehiculos-{semilla}")
+    colores = [codigo for codigo, _ in Vehiculo.COLORLIST]
+    generados = 0
+    for placa in placas(semilla):
+        if generados == cantidad:
+            return
+        if placa in existentes:
+            continue
+        generados += 1
+        yield placa, rnd.choice(MARCAS), rnd.choice(colores), rnd.choice(MODELOS), placa
+
+
+def generar_vehiculos(cantidad, semilla=0, tamano_lote=TAMANO_LOTE, rapido=True, using=DEFAULT_DB_ALIAS):
+    """Agrega `cantidad` vehículos y retorna cuántos creó."""
+    conexion = connections[using]
+    existentes = set(Vehiculo.objects.using(using).values_list('placa_normalizada', flat=True))
+    filas = filas_vehiculos(cantidad, semilla, existentes)
+    creados = 0
+    with transaction.atomic(using=using):
+        if rapido and conexion.vendor == 'sqlite':
+            tabla = conexion.ops.quote_name(Vehiculo._meta.db_table)
+            sql = (
+                f"INSERT INTO {tabla} (placa, marca, color, modelo, placa_normalizada) "
+                f"VALUES (?, ?, ?, ?, ?)"
+            )
+            conexion.ensure_connection()
+            cursor = conexion.connection.cursor()
+            try:
+                while True:
+                    lote = [fila for _, fila in zip(range(tamano_lote), filas)]
+                    if not lote:
+                        break
+                    cursor.executemany(sql, lote)
+                    creados += len(lote)
+            finally:
+                cursor.close()
+        else:
+            campos = ['placa', 'marca', 'color', 'modelo', 'placa_normalizada']
+            while True:
+                lote = [Vehiculo(**dict(zip(campos, fila))) for _, fila in zip(range(tamano_lote), filas)]
+                if not lote:
+                    break
+                Vehiculo.objects.using(using).bulk_create(lote)
+                creados += len(lote)
+    return creados
@@ -0,0 +1,165 @@
+"""
+Importación y exportación masiva de vehículos.
+
+Cada fila se valida con las reglas de VehiculoForm, pero la unicidad de la
+placa se revisa por lotes (una consulta por lote en lugar de una por fila) y
+los vehículos válidos se insertan con bulk_create. Los errores se reportan
+por número de línea del archivo, sin detener la importación.
+"""
+
+import csv
+import io
+import json
+
+from django.db import IntegrityError, transaction
+
+from .forms import VehiculoForm
+from .models import Vehiculo
+
+TAMANO_LOTE = 1000
+CAMPOS = ['placa', 'marca', 'color', 'modelo']
+
+# El archivo puede traer el código del color ('1') o su nombre ('ROJO').
+_COLOR_POR_NOMBRE = {nombre: codigo for codigo, nombre in Vehiculo.COLORLIST}
+
+
+class VehiculoImportForm(VehiculoForm):
+    """VehiculoForm sin la consulta de unicidad por fila; se hace por lote."""
+
+    def validate_unique(self):
+        pass
+
+
+def validar_vehiculo(datos, instancia=None):
+    """
+    Retorna (Vehiculo sin guardar, None) o (None, errores por campo).
+    Con `instancia` los datos se aplican sobre ese vehículo.
+    """
+    form = VehiculoImportForm(data=datos, instance=instancia)
+    if form.is_valid():
+        return form.instance, None
+    return None, form.errors.get_json_data(escape_html=False)
+
+
+def leer_registros(archivo, formato):
+    """Itera (número de línea, dict) de un archivo binario CSV o JSONL."""
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    if formato == 'jsonl':
+        for n, linea in enumerate(texto, start=1):
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                registro = None
+            yield n, registro if isinstance(registro, dict) else None
+    else:
+        for n, row in enumerate(csv.DictReader(texto), start=2):
+            yield n, row
+
+
+def formato_de(nombre):
+    return 'jsonl' if nombre.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def datos_formulario(registro):
+    """Los valores de un registro como los recibiría VehiculoForm."""
+    datos = {campo: str(registro.get(campo) or '').strip() for campo in CAMPOS}
+    datos['color'] = _COLOR_POR_NOMBRE.get(datos['color'].upper(), datos['color'])
+    return datos
+
+
+def _error(linea, campo, mensaje, codigo):
+    # misma forma que Form.errors.get_json_data()
+    return {'linea': linea, 'errores': {campo: [{'message': mensaje, 'code': codigo}]}}
+
+
+def _insertar_lote(lote, resultado):
+    """Inserta [(línea, Vehiculo)]; si otro proceso ganó alguna placa, fila por fila."""
+    try:
+        with transaction.atomic():
+            Vehiculo.objects.bulk_create([v for _, v in lote])
+        resultado['creados'] += len(lote)
+        if 'vehiculos' in resultado:
+            resultado['vehiculos'].extend(v for _, v in lote)
+        return
+    except IntegrityError:
+        pass
+    for linea, vehiculo in lote:
+        try:
+            with transaction.atomic():
+                vehiculo.save(force_insert=True)
+            resultado['creados'] += 1
+            if 'vehiculos' in resultado:
+                resultado['vehiculos'].append(vehiculo)
+        except IntegrityError:
+            resultado['errores'].append(_error(linea, 'placa', 'Ya existe un vehículo con esta placa.', 'unique'))
+
+
+def _procesar_lote(lote, placas_archivo, resultado):
+    validos = []
+    for linea, registro in lote:
+        if registro is None:
+            resultado['errores'].append(_error(linea, '__all__', 'Registro con formato inválido.', 'invalid'))
+            continue
+        vehiculo, errores = validar_vehiculo(datos_formulario(registro))
+        if errores:
+            resultado['errores'].append({'linea': linea, 'errores': errores})
+            continue
+        validos.append((linea, vehiculo))
+
+    # por la clave normalizada: 'abc-123' choca con 'ABC123'
+    claves = {v.placa_normalizada for _, v in validos}
+    existentes = set(
+        Vehiculo.objects.filter(placa_normalizada__in=claves).values_list('placa_normalizada', flat=True)
+    )
+    nuevos = []
+    for linea, vehiculo in validos:
+        if vehiculo.placa_normalizada in existentes or vehiculo.placa_normalizada in placas_archivo:
+            resultado['errores'].append(_error(linea, 'placa', 'Ya existe un vehículo con esta placa.', 'unique'))
+            continue
+        placas_archivo.add(vehiculo.placa_normalizada)
+        nuevos.append((linea, vehiculo))
+    if nuevos:
+        _insertar_lote(nuevos, resultado)
+
+
+def importar_vehiculos(registros, tamano_lote=TAMANO_LOTE, devolver_creados=False):
+    """
+    Importa los (línea, dict) de `registros`. Retorna
+    {'creados': int, 'errores': [{'linea': int, 'errores': {campo: [{'message', 'code'}]}}]}
+    y, con `devolver_creados`, también 'vehiculos' con los objetos insertados.
+    """
+    resultado = {'creados': 0, 'errores': []}
+    if devolver_creados:
+        resultado['vehiculos'] = []
+    placas_archivo = set()
+    lote = []
+    for item in registros:
+        lote.append(item)
+        if len(lote) >= tamano_lote:
+            _procesar_lote(lote, placas_archivo, resultado)
+            lote = []
+    if lote:
+        _procesar_lote(lote, placas_archivo, resultado)
+    return resultado
+
+
+class _Eco:
+    """Buffer de escritura que devuelve lo escrito, para csv.writer en streaming."""
+
+    def write(self, valor):
+        return valor
+
+
+def exportar_vehiculos(formato='csv', tamano_lote=2000):
+    """Genera el contenido de la tabla completa línea por línea, con memoria constante."""
+    filas = Vehiculo.objects.order_by('id').values_list(*CAMPOS).iterator(chunk_size=tamano_lote)
+    if formato == 'jsonl':
+        for fila in filas:
+            yield json.dumps(dict(zip(CAMPOS, fila)), ensure_ascii=False) + '\n'
+        return
+    writer = csv.writer(_Eco())
+    yield writer.writerow(CAMPOS)
+    for fila in filas:
+        yield writer.writerow(fila)
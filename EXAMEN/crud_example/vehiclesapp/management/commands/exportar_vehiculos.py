@@ -0,0 +1,22 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from vehiclesapp.importacion import exportar_vehiculos
+
+
+class Command(BaseCommand):
+    help = "Exporta todos los vehículos en CSV o JSONL, fila por fila."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--salida', help="Archivo de salida (por defecto la salida estándar).")
+
+    def handle(self, *args, **options):
+        destino = open(options['salida'], 'w', encoding='utf-8', newline='') if options['salida'] else sys.stdout
+        try:
+            for fragmento in exportar_vehiculos(options['formato']):
+                destino.write(fragmento)
+        finally:
+            if destino is not sys.stdout:
+                destino.close()
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vehiclesapp.generador import TAMANO_LOTE, generar_vehiculos
+
+
+class Command(BaseCommand):
+    help = "Agrega vehículos de prueba generados con una semilla (mismos datos con la misma semilla)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('cantidad', type=int)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por inserción.")
+        parser.add_argument('--orm', action='store_true', help="Usa bulk_create aunque la base sea SQLite.")
+
+    def handle(self, *args, **options):
+        if options['cantidad'] < 0 or options['lote'] < 1:
+            raise CommandError("La cantidad no puede ser negativa y --lote debe ser >= 1.")
+        inicio = time.perf_counter()
+        try:
+            creados = generar_vehiculos(
+                options['cantidad'],
+                semilla=options['semilla'],
+                tamano_lote=options['lote'],
+                rapido=not options['orm'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{creados} vehículos creados en {time.perf_counter() - inicio:.1f}s."
+        ))
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vehiclesapp.importacion import TAMANO_LOTE, formato_de, importar_vehiculos, leer_registros
+
+
+class Command(BaseCommand):
+    help = "Importa vehículos desde un CSV (placa, marca, color, modelo) o un JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help="Por defecto según la extensión.")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por consulta e inserción.")
+        parser.add_argument('--json', action='store_true', help="Imprime el resultado completo en JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            archivo = open(options['archivo'], 'rb')
+        except OSError as e:
+            raise CommandError(f"No se pudo abrir {options['archivo']}: {e}")
+        with archivo:
+            formato = options['formato'] or formato_de(options['archivo'])
+            resultado = importar_vehiculos(leer_registros(archivo, formato), tamano_lote=options['lote'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+        for error in resultado['errores']:
+            mensajes = '; '.join(
+                f"{campo}: {m['message']}" if campo != '__all__' else m['message']
+                for campo, lista in error['errores'].items()
+                for m in lista
+            )
+            self.stderr.write(f"línea {error['linea']}: {mensajes}")
+        estilo = self.style.WARNING if resultado['errores'] else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f"{resultado['creados']} vehículos creados, {len(resultado['errores'])} filas con errores."
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiclesapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehiculo',
+            name='color',
+            field=models.CharField(choices=[('1', 'ROJO'), ('2', 'AZUL'), ('3', 'VERDE')], max_length=4, verbose_name='color'),
+        ),
+        migrations.AlterField(
+            model_name='vehiculo',
+            name='placa',
+            field=models.CharField(max_length=6, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['marca', 'id'], name='vehiculo_marca_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['color', 'id'], name='vehiculo_color_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['modelo', 'id'], name='vehiculo_modelo_id_idx'),
+        ),
+    ]
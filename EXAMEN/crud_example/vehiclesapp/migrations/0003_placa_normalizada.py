@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+TAMANO_LOTE = 2000
+
+
+def normalizar_placa(placa):
+    # Copia de vehiclesapp.placas.normalizar_placa, congelada para la migración.
+    return ''.join(c for c in (placa or '').upper() if c.isalnum())
+
+
+def llenar_placa_normalizada(apps, schema_editor):
+    Vehiculo = apps.get_model('vehiclesapp', 'Vehiculo')
+    lote = []
+    for vehiculo in Vehiculo.objects.only('id', 'placa').iterator(chunk_size=TAMANO_LOTE):
+        vehiculo.placa_normalizada = normalizar_placa(vehiculo.placa)
+        lote.append(vehiculo)
+        if len(lote) >= TAMANO_LOTE:
+            Vehiculo.objects.bulk_update(lote, ['placa_normalizada'])
+            lote = []
+    if lote:
+        Vehiculo.objects.bulk_update(lote, ['placa_normalizada'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiclesapp', '0002_indices_listado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='placa_normalizada',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=6),
+        ),
+        migrations.RunPython(llenar_placa_normalizada, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:22
+
+from django.db import migrations, models
+from django.db.models import Count
+
+MAX_REPORTADAS = 50
+
+
+def revisar_colisiones(apps, schema_editor):
+    """
+    Antes de volver única la clave, lista las placas que ya chocan ('abc-123'
+    y 'ABC123', o placas sin letras ni números). No borra nada: quien
+    administra los datos decide qué vehículo queda y vuelve a migrar.
+    """
+    Vehiculo = apps.get_model('vehiclesapp', 'Vehiculo')
+    repetidas = list(
+        Vehiculo.objects.values('placa_normalizada')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by('placa_normalizada')
+        .values_list('placa_normalizada', flat=True)[:MAX_REPORTADAS + 1]
+    )
+    if not repetidas:
+        return
+    lineas = []
+    for clave in repetidas[:MAX_REPORTADAS]:
+        vehiculos = Vehiculo.objects.filter(placa_normalizada=clave).order_by('id').values_list('id', 'placa')
+        lineas.append(f"  {clave or '(vacía)'}: " + ', '.join(f"id {pk} '{placa}'" for pk, placa in vehiculos))
+    if len(repetidas) > MAX_REPORTADAS:
+        lineas.append(f"  ... y más; se muestran las primeras {MAX_REPORTADAS}.")
+    raise RuntimeError(
+        "Hay vehículos con la misma placa normalizada; corrija o elimine los repetidos y vuelva a migrar:\n"
+        + '\n'.join(lineas)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiclesapp', '0003_placa_normalizada'),
+    ]
+
+    operations = [
+        migrations.RunPython(revisar_colisiones, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='vehiculo',
+            name='placa_normalizada',
+            field=models.CharField(blank=True, editable=False, max_length=6, unique=True),
+        ),
+    ]
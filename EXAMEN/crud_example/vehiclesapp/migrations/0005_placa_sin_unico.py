@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiclesapp', '0004_placa_normalizada_unica'),
+    ]
+
+    # La unicidad pasó a placa_normalizada (0004); el listado ordenado por
+    # placa usa este índice en lugar del único.
+    operations = [
+        migrations.AlterField(
+            model_name='vehiculo',
+            name='placa',
+            field=models.CharField(max_length=6),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['placa', 'id'], name='vehiculo_placa_id_idx'),
+        ),
+    ]
@@ -1,5 +1,17 @@
 from django.db import models
 
+from .placas import normalizar_placa
+
+
+class VehiculoQuerySet(models.QuerySet):
+    def por_placa(self, placa):
+        """Vehículos cuya placa coincide sin importar mayúsculas ni separadores."""
+        clave = normalizar_placa(placa)
+        if not clave:
+            return self.none()
+        return self.filter(placa_normalizada=clave)
+
+
 class Vehiculo(models.Model):
     COLORLIST = (
         ('1', 'ROJO'),
@@ -11,6 +23,33 @@ class Vehiculo(models.Model):
     marca = models.CharField(max_length=10)
     color = models.CharField('color', max_length=4, choices=COLORLIST)
     modelo = models.IntegerField()
+    # placa sin separadores y en mayúsculas; se mantiene en clean() y save().
+    # Es la columna única: 'abc-123' y 'ABC123' son el mismo vehículo.
+    placa_normalizada = models.CharField(max_length=6, blank=True, editable=False, unique=True)
+
+    objects = VehiculoQuerySet.as_manager()
+
+    class Meta:
+        # El listado pagina por (campo de orden, id).
+        indexes = [
+            models.Index(fields=['placa', 'id'], name='vehiculo_placa_id_idx'),
+            models.Index(fields=['marca', 'id'], name='vehiculo_marca_id_idx'),
+            models.Index(fields=['color', 'id'], name='vehiculo_color_id_idx'),
+            models.Index(fields=['modelo', 'id'], name='vehiculo_modelo_id_idx'),
+        ]
+    
+    def clean(self):
+        # los formularios (y la importación y la API, que validan con ellos)
+        # dejan la clave lista antes de bulk_create / bulk_update
+        super().clean()
+        self.placa_normalizada = normalizar_placa(self.placa)
+
+    def save(self, *args, **kwargs):
+        self.placa_normalizada = normalizar_placa(self.placa)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'placa' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'placa_normalizada'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.marca} {self.modelo} - {self.placa}"
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Clave normalizada de placas.
+
+Las placas se escriben de muchas formas ("abc-123", "ABC 123"); la clave las
+reduce a mayúsculas sin separadores para que buscar una placa sea una
+consulta exacta sobre un índice. Las reservas de parking_final guardan la
+misma clave (reservations/plates.py), así que una placa de este registro se
+busca allá con el mismo valor.
+"""
+
+
+def normalizar_placa(placa):
+    """'abc-123' → 'ABC123'."""
+    return ''.join(c for c in (placa or '').upper() if c.isalnum())
@@ -1,3 +1,193 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .consultas import codificar_cursor, pagina_keyset
+from .forms import VehiculoForm
+from .importacion import importar_vehiculos
+from .models import Vehiculo
+
+
+class PlacaUnicaTests(TestCase):
+    def setUp(self):
+        self.auto = Vehiculo.objects.create(placa='ABC-12', marca='MAZDA', color='1', modelo=2020)
+
+    def test_formulario_compara_la_placa_normalizada(self):
+        form = VehiculoForm(data={'placa': 'abc12', 'marca': 'KIA', 'color': '2', 'modelo': 2018})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.get_json_data()['placa'][0]['code'], 'unique')
+
+        # editar el mismo vehículo con otra escritura de su placa es válido
+        form = VehiculoForm(data={'placa': 'abc 12', 'marca': 'KIA', 'color': '2', 'modelo': 2018}, instance=self.auto)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_formulario_rechaza_placa_sin_letras_ni_numeros(self):
+        form = VehiculoForm(data={'placa': '--', 'marca': 'KIA', 'color': '2', 'modelo': 2018})
+        self.assertFalse(form.is_valid())
+
+    def test_importacion_compara_la_placa_normalizada(self):
+        registros = [
+            (2, {'placa': 'abc12', 'marca': 'KIA', 'color': '2', 'modelo': 2018}),
+            (3, {'placa': 'xyz-9', 'marca': 'KIA', 'color': '2', 'modelo': 2018}),
+            (4, {'placa': 'XYZ9', 'marca': 'FORD', 'color': '1', 'modelo': 2011}),
+        ]
+        resultado = importar_vehiculos(registros)
+        self.assertEqual(resultado['creados'], 1)
+        self.assertEqual([e['linea'] for e in resultado['errores']], [2, 4])
+        self.assertEqual(Vehiculo.objects.por_placa('xyz9').count(), 1)
+
+    def test_importacion_valida_cada_fila_por_separado(self):
+        registros = [
+            (2, {'placa': 'QWE1', 'marca': 'KIA', 'color': '9', 'modelo': 'viejo'}),
+            (3, {'placa': 'QWE2', 'marca': 'FORD', 'color': 'ROJO', 'modelo': 2011}),
+            (4, {'placa': 'QWE3', 'marca': '', 'color': '2', 'modelo': 2015}),
+        ]
+        resultado = importar_vehiculos(registros)
+        # los errores de una fila no pasan a la siguiente
+        self.assertEqual([(e['linea'], sorted(e['errores'])) for e in resultado['errores']],
+                         [(2, ['color', 'modelo']), (4, ['marca'])])
+        creado = Vehiculo.objects.get(placa='QWE2')
+        self.assertEqual((creado.marca, creado.color, creado.modelo), ('FORD', '1', 2011))
+
+
+class PaginaKeysetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        marcas = ['KIA', 'MAZDA', 'FORD']
+        Vehiculo.objects.bulk_create([
+            Vehiculo(placa=f'AAA{i:03d}', placa_normalizada=f'AAA{i:03d}', marca=marcas[i % 3],
+                     color=str(i % 3 + 1), modelo=2000 + i % 4)
+            for i in range(23)
+        ])
+
+    def recorrer(self, orden, tamano=5):
+        """Todas las páginas hacia adelante y luego hacia atrás desde la última."""
+        qs = Vehiculo.objects.all()
+        adelante, paginas, cursor = [], [], ''
+        while True:
+            pagina = pagina_keyset(qs, orden=orden, despues=cursor, tamano=tamano)
+            paginas.append(pagina)
+            adelante += [v.id for v in pagina['objetos']]
+            cursor = pagina['siguiente']
+            if cursor is None:
+                break
+        atras = [v.id for v in paginas[-1]['objetos']]
+        cursor = paginas[-1]['anterior']
+        while cursor:
+            pagina = pagina_keyset(qs, orden=orden, antes=cursor, tamano=tamano)
+            atras = [v.id for v in pagina['objetos']] + atras
+            cursor = pagina['anterior']
+        return adelante, atras
+
+    def test_ida_y_vuelta_en_cada_orden(self):
+        for orden in ['id', '-id', 'placa', 'marca', '-marca', 'modelo', '-modelo', 'color']:
+            with self.subTest(orden=orden):
+                desempate = '-id' if orden.startswith('-') else 'id'
+                esperado = list(Vehiculo.objects.order_by(orden, desempate).values_list('id', flat=True))
+                adelante, atras = self.recorrer(orden)
+                self.assertEqual(adelante, esperado)
+                self.assertEqual(atras, esperado)
+
+    def test_cursor_invalido_es_la_primera_pagina(self):
+        primera = [v.id for v in pagina_keyset(Vehiculo.objects.all(), orden='modelo', tamano=5)['objetos']]
+        for cursor in ['basura', codificar_cursor([2001], 3), codificar_cursor('2001', 3),
+                       codificar_cursor(2001, '3'), codificar_cursor(True, 3)]:
+            with self.subTest(cursor=cursor):
+                pagina = pagina_keyset(Vehiculo.objects.all(), orden='modelo', despues=cursor, tamano=5)
+                self.assertEqual([v.id for v in pagina['objetos']], primera)
+                self.assertIsNone(pagina['anterior'])
+
+    def test_vistas_con_cursor_invalido(self):
+        cursor = codificar_cursor([1, 2], 3)
+        for url in [reverse('lista_vehiculos'), reverse('api_vehiculos')]:
+            with self.subTest(url=url):
+                respuesta = self.client.get(url, {'orden': 'modelo', 'despues': cursor})
+                self.assertEqual(respuesta.status_code, 200)
+
+
+@override_settings(VEHICULOS_API_TOKEN='secreto')
+class APIVehiculosTests(TestCase):
+    def setUp(self):
+        self.url = reverse('api_vehiculos')
+        self.auto = Vehiculo.objects.create(placa='ABC123', marca='MAZDA', color='1', modelo=2020)
+
+    def enviar(self, metodo, url, datos, **extra):
+        extra.setdefault('HTTP_AUTHORIZATION', 'Bearer secreto')
+        extra.setdefault('content_type', 'application/json')
+        return getattr(self.client, metodo)(url, json.dumps(datos), **extra)
+
+    def test_get_con_etag_y_304(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        detalle = reverse('api_vehiculo', args=[self.auto.id])
+        etag_detalle = self.client.get(detalle)['ETag']
+        self.assertEqual(self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 304)
+        self.enviar('patch', detalle, {'marca': 'KIA'})
+        self.assertEqual(self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 200)
+
+    def test_crear_en_lote(self):
+        respuesta = self.enviar('post', self.url, [
+            {'placa': 'XYZ789', 'marca': 'KIA', 'color': '2', 'modelo': 2018},
+            {'placa': 'QWE456', 'marca': 'FORD', 'color': '3', 'modelo': 2015},
+        ])
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual([v['placa'] for v in respuesta.json()['vehiculos']], ['XYZ789', 'QWE456'])
+        self.assertEqual(Vehiculo.objects.count(), 3)
+
+    def test_lote_con_error_no_guarda_nada(self):
+        respuesta = self.enviar('post', self.url, [
+            {'placa': 'XYZ789', 'marca': 'KIA', 'color': '2', 'modelo': 2018},
+            {'placa': 'abc123', 'marca': 'FORD', 'color': '3', 'modelo': 2015},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([e['indice'] for e in respuesta.json()['errores']], [1])
+        self.assertEqual(Vehiculo.objects.count(), 1)
+
+    def test_actualizar_y_eliminar_en_lote(self):
+        otro = Vehiculo.objects.create(placa='DEF456', marca='FORD', color='2', modelo=2010)
+        respuesta = self.enviar('patch', self.url, [
+            {'id': self.auto.id, 'modelo': 2021},
+            {'id': otro.id, 'color': '3'},
+        ])
+        self.assertEqual(respuesta.status_code, 200)
+        self.auto.refresh_from_db()
+        otro.refresh_from_db()
+        self.assertEqual((self.auto.modelo, otro.color), (2021, '3'))
+
+        respuesta = self.enviar('patch', self.url, [{'id': self.auto.id, 'placa': 'def-456'}])
+        self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = self.enviar('delete', self.url, {'ids': [self.auto.id, otro.id]})
+        self.assertEqual(respuesta.json(), {'eliminados': 2})
+        self.assertFalse(Vehiculo.objects.exists())
+
+    def test_escritura_sin_autenticacion(self):
+        respuesta = self.enviar('post', self.url, [], HTTP_AUTHORIZATION='')
+        self.assertEqual(respuesta.status_code, 401)
+        respuesta = self.enviar('delete', self.url, {'ids': [self.auto.id]}, HTTP_AUTHORIZATION='Bearer otro')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertTrue(Vehiculo.objects.exists())
+
+    def test_rechaza_cuerpo_que_no_es_json(self):
+        datos = [{'placa': 'XYZ789', 'marca': 'KIA', 'color': '2', 'modelo': 2018}]
+        respuesta = self.enviar('post', self.url, datos, content_type='text/plain')
+        self.assertEqual(respuesta.status_code, 415)
+        self.assertEqual(Vehiculo.objects.count(), 1)
+
+    def test_sesion_requiere_csrf(self):
+        User.objects.create_user('operador', password='clave-segura-1')
+        cliente = Client(enforce_csrf_checks=True)
+        cliente.login(username='operador', password='clave-segura-1')
+        datos = json.dumps([{'placa': 'XYZ789', 'marca': 'KIA', 'color': '2', 'modelo': 2018}])
+        respuesta = cliente.post(self.url, datos, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 403)
+
+        cliente.get(reverse('crear_vehiculo'))
+        token = cliente.cookies['csrftoken'].value
+        respuesta = cliente.post(self.url, datos, content_type='application/json', HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(respuesta.status_code, 201)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.inicio, name='home'),          
@@ -7,4 +7,8 @@ urlpatterns = [
     path('crear/', views.crear_vehiculo, name='crear_vehiculo'),
     path('editar/<int:id>/', views.editar_vehiculo, name='editar_vehiculo'),
     path('eliminar/<int:id>/', views.eliminar_vehiculo, name='eliminar_vehiculo'),
+    path('vehiculos/importar/', views.importar_vehiculos, name='importar_vehiculos'),
+    path('vehiculos/exportar/', views.exportar_vehiculos, name='exportar_vehiculos'),
+    path('api/vehiculos/', api.vehiculos, name='api_vehiculos'),
+    path('api/vehiculos/<int:id>/', api.vehiculo, name='api_vehiculo'),
 ]
\ No newline at end of file
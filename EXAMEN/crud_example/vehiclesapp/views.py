@@ -1,13 +1,42 @@
-from django.shortcuts import render, redirect
-from .forms import VehiculoForm
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from .consultas import TAMANO_PAGINA, filtrar_vehiculos, pagina_keyset
+from .forms import FiltroVehiculoForm, ImportarVehiculosForm, VehiculoForm
+from .importacion import exportar_vehiculos as generar_exportacion
+from .importacion import formato_de, importar_vehiculos as importar_registros, leer_registros
 from .models import Vehiculo  # ← Agregar esta línea
 
 def inicio(request):
     return render(request, 'inicio.html')
 
 def lista_vehiculos(request):
-    vehiculos = Vehiculo.objects.all()  # ← Obtener todos los vehículos
-    return render(request, 'lista_vehiculos.html', {'vehiculos': vehiculos})
+    filtros = FiltroVehiculoForm(request.GET or None)
+    datos = filtros.cleaned_data if filtros.is_valid() else {}
+    vehiculos = filtrar_vehiculos(
+        Vehiculo.objects.all(),
+        placa=datos.get('placa', ''),
+        marca=datos.get('marca', ''),
+        color=datos.get('color', ''),
+        modelo_min=datos.get('modelo_min'),
+        modelo_max=datos.get('modelo_max'),
+    )
+    pagina = pagina_keyset(
+        vehiculos,
+        orden=datos.get('orden') or 'id',
+        despues=request.GET.get('despues', ''),
+        antes=request.GET.get('antes', ''),
+        tamano=datos.get('por_pagina') or TAMANO_PAGINA,
+    )
+    # los enlaces de página conservan los filtros y cambian solo el cursor
+    parametros = request.GET.copy()
+    for clave in ('despues', 'antes'):
+        parametros.pop(clave, None)
+    return render(request, 'lista_vehiculos.html', {
+        'vehiculos': pagina['objetos'],
+        'pagina': pagina,
+        'filtros': filtros,
+        'parametros': parametros.urlencode(),
+    })
 
 def crear_vehiculo(request):
     if request.method == 'POST':
@@ -21,7 +50,7 @@ def crear_vehiculo(request):
     return render(request, 'crear_vehiculo.html', {'form': form})
 
 def editar_vehiculo(request, id):
-    vehiculo = Vehiculo.objects.get(id=id)
+    vehiculo = get_object_or_404(Vehiculo, id=id)
     if request.method == 'POST':
         form = VehiculoForm(request.POST, instance=vehiculo)
         if form.is_valid():
@@ -33,8 +62,32 @@ def editar_vehiculo(request, id):
     return render(request, 'editar_vehiculo.html', {'form': form})
 
 def eliminar_vehiculo(request, id):
-    vehiculo = Vehiculo.objects.get(id=id)
+    vehiculo = get_object_or_404(Vehiculo, id=id)
     if request.method == 'POST':
         vehiculo.delete()
         return redirect('lista_vehiculos')
-    return render(request, 'eliminar_vehiculo.html', {'vehiculo': vehiculo})
\ No newline at end of file
+    return render(request, 'eliminar_vehiculo.html', {'vehiculo': vehiculo})
+
+# Cuántos errores se muestran en la página; el resto solo se cuenta.
+ERRORES_VISIBLES = 100
+
+def importar_vehiculos(request):
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarVehiculosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            resultado = importar_registros(leer_registros(archivo.file, formato_de(archivo.name)))
+            resultado['total_errores'] = len(resultado['errores'])
+            resultado['errores'] = resultado['errores'][:ERRORES_VISIBLES]
+    else:
+        form = ImportarVehiculosForm()
+
+    return render(request, 'importar_vehiculos.html', {'form': form, 'resultado': resultado})
+
+def exportar_vehiculos(request):
+    formato = 'jsonl' if request.GET.get('formato') == 'jsonl' else 'csv'
+    tipo = 'application/x-ndjson' if formato == 'jsonl' else 'text/csv'
+    response = StreamingHttpResponse(generar_exportacion(formato), content_type=f'{tipo}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="vehiculos.{formato}"'
+    return response
\ No newline at end of file
@@ -2,8 +2,20 @@
 MovieTime - Gestión de venta de boletos por consola con persistencia en CSV.
 
 Archivos:
-  - funciones.csv: codigo,pelicula,hora,precio
+  - funciones.csv: codigo,pelicula,hora,precio,capacidad
   - ventas.csv:    fecha_hora,codigo_funcion,cantidad,total
+  - ventas_resumen/: totales por día (AAAA-MM-DD.json) y checkpoint.json,
+    derivados de ventas.csv; se pueden reconstruir desde el menú.
+  - asientos/:     mapa de asientos de cada función con capacidad.
+  - funciones.seq: último número de código FUN asignado y su ancho.
+  - ventas.bin:    copia binaria opcional de ventas.csv (csv-a-bin / rango --bin).
+
+Con --storage sqlite (o MOVIETIME_STORAGE=sqlite) todo se guarda en una base
+SQLite (--db / MOVIETIME_DB, por defecto movietime.db). `python main.py
+migrar-sqlite` copia los CSV existentes a la base.
+
+Sin subcomando se abre el menú interactivo. Para operar sin teclado:
+importar-funciones, replay-ventas, reporte (JSON) y serve (API HTTP/JSON).
 
 Requisitos cubiertos:
 - Registrar funciones (película, hora, precio) con código único (ingresado o autogenerado).
@@ -13,13 +25,66 @@ Requisitos cubiertos:
 - Persistencia en CSV, interfaz clara, validaciones básicas.
 """
 
+import argparse
+import atexit
+import bisect
+import calendar
 import csv
+import io
+import json
+import mmap
 import os
-from datetime import datetime, date
-from typing import Dict, List, Optional
+import secrets
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
 
 FUNCIONES_CSV = "funciones.csv"
 VENTAS_CSV = "ventas.csv"
+RESUMEN_DIR = "ventas_resumen"
+FUNCIONES_CAMPOS = ["codigo", "pelicula", "hora", "precio", "capacidad"]
+SECUENCIA_PATH = "funciones.seq"
+CODIGO_PREFIJO = "FUN"
+CODIGO_ANCHO = int(os.environ.get("MOVIETIME_CODIGO_ANCHO", "3"))
+
+# ------------------------- Dinero -------------------------
+#
+# Precios y totales se manejan como enteros en centavos de punta a punta; los
+# CSV y el JSON siguen guardando texto "12000.50". Convertir sin pasar por
+# float evita que la suma de millones de ventas se desvíe.
+
+def a_centavos(texto: str) -> int:
+    """'12000.5', '12000,50' o '12000' → centavos exactos."""
+    s = texto.strip().replace(",", ".")
+    negativo = s.startswith("-")
+    entero, _, dec = (s[1:] if s[:1] in ("+", "-") else s).partition(".")
+    if (not (entero or dec) or (entero and not entero.isdigit()) or (dec and not dec.isdigit())
+            or dec[2:].strip("0")):
+        raise ValueError(f"Monto inválido: {texto!r}")
+    centavos = int(entero or "0") * 100 + int((dec + "00")[:2])
+    return -centavos if negativo else centavos
+
+def centavos_a_texto(centavos: int) -> str:
+    """1200050 → '12000.50', el formato de los CSV."""
+    signo = "-" if centavos < 0 else ""
+    pesos, cent = divmod(abs(centavos), 100)
+    return f"{signo}{pesos}.{cent:02d}"
+
+def formatear_dinero(centavos: int) -> str:
+    """1200050 → '$12.000,50'; los centavos se omiten cuando son cero."""
+    signo = "-" if centavos < 0 else ""
+    pesos, cent = divmod(abs(centavos), 100)
+    miles = f"{pesos:_}".replace("_", ".")
+    return f"{signo}${miles},{cent:02d}" if cent else f"{signo}${miles}"
 
 # ------------------------- Utilidades de archivo -------------------------
 
@@ -28,75 +93,1511 @@ def ensure_csv_headers():
     try:
         if not os.path.exists(FUNCIONES_CSV):
             with open(FUNCIONES_CSV, "w", newline="", encoding="utf-8") as f:
-                csv.writer(f).writerow(["codigo", "pelicula", "hora", "precio"])
+                csv.writer(f).writerow(FUNCIONES_CAMPOS)
         if not os.path.exists(VENTAS_CSV):
             with open(VENTAS_CSV, "w", newline="", encoding="utf-8") as f:
                 csv.writer(f).writerow(["fecha_hora", "codigo_funcion", "cantidad", "total"])
     except Exception as e:
         print(f"⚠️ Error asegurando CSV: {e}")
 
-def load_funciones() -> Dict[str, Dict[str, str]]:
+def _actualizar_encabezado_funciones(path: str) -> bool:
     """
-    Retorna dict por código:
-    { codigo: { "pelicula": str, "hora": str, "precio": float_str } }
+    Agrega la columna capacidad al encabezado de un funciones.csv antiguo.
+    Las filas viejas quedan con capacidad vacía (sin límite).
     """
+    with open(path, "rb") as f:
+        primera = f.readline()
+        if b"capacidad" in primera:
+            return False
+        resto = f.read()
+    fin = b"\r\n" if primera.endswith(b"\r\n") else b"\n"
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(",".join(FUNCIONES_CAMPOS).encode("utf-8") + fin + resto)
+    os.replace(tmp, path)
+    return True
+
+class FuncionesRepo:
+    """
+    Índice en memoria de funciones.csv.
+
+    El archivo se lee una sola vez; después solo se vuelve a cargar si su
+    firma (mtime, tamaño) cambió por una edición externa. Las altas hechas
+    desde este proceso se agregan al índice sin releer el archivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._firma: Optional[Tuple[int, int]] = None
+        self.por_codigo: Dict[str, Dict[str, str]] = {}
+        self.por_pelicula: Dict[str, Set[str]] = {}
+        self.por_hora: Dict[str, Set[str]] = {}
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _indexar(self, codigo: str, data: Dict[str, str]):
+        anterior = self.por_codigo.get(codigo)
+        if anterior is not None:
+            # una fila repetida reemplaza a la anterior, como en un dict
+            self.por_pelicula.get(anterior["pelicula"].casefold(), set()).discard(codigo)
+            self.por_hora.get(anterior["hora"], set()).discard(codigo)
+        self.por_codigo[codigo] = data
+        self.por_pelicula.setdefault(data["pelicula"].casefold(), set()).add(codigo)
+        self.por_hora.setdefault(data["hora"], set()).add(codigo)
+
+    def _recargar(self, firma: Tuple[int, int]):
+        if _actualizar_encabezado_funciones(self.path):
+            firma = self._stat()
+        self.por_codigo, self.por_pelicula, self.por_hora = {}, {}, {}
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            r = csv.DictReader(f)
+            for row in r:
+                codigo = row["codigo"].strip()
+                if codigo:
+                    self._indexar(codigo, {
+                        "pelicula": row["pelicula"].strip(),
+                        "hora": row["hora"].strip(),
+                        "precio": row["precio"].strip(),
+                        "capacidad": (row.get("capacidad") or "").strip(),
+                    })
+        self._firma = firma
+
+    def refrescar(self):
+        """Relee el CSV solo si cambió desde la última lectura."""
+        firma = self._stat()
+        if firma is None:
+            ensure_csv_headers()
+            firma = self._stat()
+        if firma != self._firma:
+            self._recargar(firma)
+
+    def obtener(self, codigo: str) -> Optional[Dict[str, str]]:
+        self.refrescar()
+        return self.por_codigo.get(codigo)
+
+    def todas(self) -> Dict[str, Dict[str, str]]:
+        self.refrescar()
+        return self.por_codigo
+
+    def buscar_por_pelicula(self, pelicula: str) -> List[str]:
+        self.refrescar()
+        return sorted(self.por_pelicula.get(pelicula.strip().casefold(), ()))
+
+    def buscar_por_hora(self, hora: str) -> List[str]:
+        self.refrescar()
+        return sorted(self.por_hora.get(hora.strip(), ()))
+
+    def agregar(self, codigo: str, pelicula: str, hora: str, precio: str, capacidad: str = ""):
+        self.refrescar()
+        buf = io.StringIO()
+        csv.writer(buf).writerow([codigo, pelicula, hora, precio, capacidad])
+        linea = buf.getvalue()
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            f.write(linea)
+        firma = self._stat()
+        esperado = self._firma[1] + len(linea.encode("utf-8")) if self._firma else None
+        if firma is not None and firma[1] == esperado:
+            self._indexar(codigo, {"pelicula": pelicula, "hora": hora, "precio": precio, "capacidad": capacidad})
+            self._firma = firma
+        else:
+            # otra terminal escribió al mismo tiempo: releer en el próximo acceso
+            self._firma = None
+
+_funciones_repos: Dict[str, FuncionesRepo] = {}
+
+def get_funciones_repo() -> FuncionesRepo:
+    """Repositorio compartido para la ruta actual de FUNCIONES_CSV."""
+    path = os.path.abspath(FUNCIONES_CSV)
+    repo = _funciones_repos.get(path)
+    if repo is None:
+        repo = _funciones_repos[path] = FuncionesRepo(path)
+    return repo
+
+# ------------------------- Resumen incremental de ventas -------------------------
+#
+# Cada día tiene su archivo de totales en RESUMEN_DIR y checkpoint.json guarda
+# hasta qué byte de ventas.csv se procesó. Cada venta nueva solo suma su propia
+# fila, así que el resumen no depende de cuántas ventas históricas haya.
+# Los archivos de día guardan también su propio offset: si el proceso se cae
+# entre escribir un día y el checkpoint, las filas ya sumadas no se repiten.
+
+HUELLA_BYTES = 32
+RESUMEN_VERSION = 2  # 2: totales en centavos enteros
+
+def _leer_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def _escribir_json(path: str, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, path)
+
+def _checkpoint_path() -> str:
+    return os.path.join(RESUMEN_DIR, "checkpoint.json")
+
+def _dia_path(dia: str) -> str:
+    return os.path.join(RESUMEN_DIR, f"{dia}.json")
+
+def _dia_vacio() -> Dict:
+    return {"offset": 0, "boletos": 0, "total_centavos": 0, "por_funcion": {}, "por_hora": {}}
+
+def _fecha_valida(fecha_hora: str) -> bool:
+    # "YYYY-MM-DD HH:MM:SS" validado por posiciones fijas, sin strptime
+    return (
+        len(fecha_hora) == 19
+        and fecha_hora[4] == "-" and fecha_hora[7] == "-" and fecha_hora[10] == " "
+        and fecha_hora[13] == ":" and fecha_hora[16] == ":"
+        and fecha_hora[:4].isdigit() and fecha_hora[5:7].isdigit() and fecha_hora[8:10].isdigit()
+        and fecha_hora[11:13].isdigit()
+    )
+
+def _sumar(grupo: Dict, clave: str, cantidad: int, centavos: int):
+    g = grupo.setdefault(clave, {"boletos": 0, "total_centavos": 0})
+    g["boletos"] += cantidad
+    g["total_centavos"] += centavos
+
+def _huella(f, offset: int) -> str:
+    inicio = max(0, offset - HUELLA_BYTES)
+    f.seek(inicio)
+    return f.read(offset - inicio).hex()
+
+def _procesar_ventas_desde(offset: int, huella_esperada: Optional[str]) -> bool:
+    """
+    Suma a los archivos de día las filas de ventas.csv desde `offset`.
+    Retorna False si el archivo ya no coincide con el checkpoint.
+    """
+    with open(VENTAS_CSV, "rb") as f:
+        if huella_esperada is not None and _huella(f, offset) != huella_esperada:
+            return False
+        f.seek(offset)
+
+        dias: Dict[str, Dict] = {}
+        pos = offset
+        # línea por línea: una reconstrucción no carga todo ventas.csv en memoria
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break  # línea a medio escribir: se toma en la próxima
+            inicio_fila = pos
+            pos += len(linea)
+            try:
+                row = next(csv.reader([linea.decode("utf-8")]))
+                fecha_hora, codigo, cantidad_s, total_s = row[0], row[1], row[2], row[3]
+                if not _fecha_valida(fecha_hora):
+                    continue  # encabezado o fila mal formada
+                cantidad, total = int(cantidad_s), a_centavos(total_s)
+            except (StopIteration, IndexError, UnicodeDecodeError, ValueError):
+                continue
+            dia = fecha_hora[:10]
+            agg = dias.get(dia)
+            if agg is None:
+                agg = dias[dia] = _leer_json(_dia_path(dia), None) or _dia_vacio()
+            if inicio_fila < agg["offset"]:
+                continue  # ya sumada antes de una caída
+            agg["boletos"] += cantidad
+            agg["total_centavos"] += total
+            _sumar(agg["por_funcion"], codigo, cantidad, total)
+            _sumar(agg["por_hora"], fecha_hora[11:13], cantidad, total)
+
+        if pos == offset:
+            return True
+        nuevo_offset = pos
+        for dia, agg in dias.items():
+            agg["offset"] = nuevo_offset
+            _escribir_json(_dia_path(dia), agg)
+        _escribir_json(_checkpoint_path(), {"offset": nuevo_offset, "huella": _huella(f, nuevo_offset),
+                                            "version": RESUMEN_VERSION})
+    return True
+
+def sync_resumen_ventas():
+    """Incorpora al resumen las ventas agregadas desde el último checkpoint."""
     ensure_csv_headers()
-    funciones: Dict[str, Dict[str, str]] = {}
-    with open(FUNCIONES_CSV, "r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            codigo = row["codigo"].strip()
-            if codigo:
-                funciones[codigo] = {
-                    "pelicula": row["pelicula"].strip(),
-                    "hora": row["hora"].strip(),
-                    "precio": row["precio"].strip(),
-                }
-    return funciones
-
-def save_funcion(codigo: str, pelicula: str, hora: str, precio: float):
-    ensure_csv_headers()
-    with open(FUNCIONES_CSV, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow([codigo, pelicula, hora, f"{precio:.2f}"])
+    os.makedirs(RESUMEN_DIR, exist_ok=True)
+    ck = _leer_json(_checkpoint_path(), None)
+    if ck is None or ck.get("version") != RESUMEN_VERSION:
+        # sin resumen o guardado con un formato anterior
+        rebuild_resumen_ventas()
+        return
+    offset = ck.get("offset", 0)
+    if offset > os.path.getsize(VENTAS_CSV) or not _procesar_ventas_desde(offset, ck.get("huella")):
+        # ventas.csv fue truncado o reescrito: el resumen ya no es confiable
+        rebuild_resumen_ventas()
 
-def save_venta(codigo_funcion: str, cantidad: int, total: float):
+def rebuild_resumen_ventas():
+    """Descarta los totales guardados y los recalcula leyendo todo ventas.csv."""
     ensure_csv_headers()
-    with open(VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        w.writerow([now, codigo_funcion, str(cantidad), f"{total:.2f}"])
+    os.makedirs(RESUMEN_DIR, exist_ok=True)
+    for nombre in os.listdir(RESUMEN_DIR):
+        if nombre.endswith(".json") or nombre.endswith(".tmp"):
+            os.remove(os.path.join(RESUMEN_DIR, nombre))
+    _procesar_ventas_desde(0, None)
+
+# ------------------------- Inventario de asientos -------------------------
+#
+# Cada función con capacidad tiene asientos/<codigo>.bin: un encabezado con
+# los contadores (para consultar disponibilidad sin recorrer nada) y dos
+# bitmaps de `capacidad` bits, vendidos y retenidos. Toda modificación se hace
+# bajo un bloqueo exclusivo del archivo, así que varias taquillas pueden
+# retener y vender a la vez. Las retenciones y su vencimiento van en
+# asientos/<codigo>.holds.json, que solo se toca con el mismo bloqueo.
+
+ASIENTOS_DIR = "asientos"
+RETENCION_SEGUNDOS = 300
+
+# magic, capacidad, vendidos, retenidos, próximo vencimiento de una retención
+_ASIENTOS_HEADER = struct.Struct("<4sIIId")
+_ASIENTOS_MAGIC = b"AS01"
+
+class AsientosInsuficientes(ValueError):
+    def __init__(self, codigo: str, disponibles: int):
+        super().__init__(f"La función {codigo} solo tiene {disponibles} asientos disponibles.")
+        self.disponibles = disponibles
+
+@contextmanager
+def _bloqueo_exclusivo(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _asientos_path(codigo: str) -> str:
+    return os.path.join(ASIENTOS_DIR, f"{codigo}.bin")
+
+def _holds_path(codigo: str) -> str:
+    return os.path.join(ASIENTOS_DIR, f"{codigo}.holds.json")
+
+def crear_mapa_asientos(codigo: str, capacidad: int):
+    """Crea el mapa vacío de una función; no hace nada si ya existe."""
+    os.makedirs(ASIENTOS_DIR, exist_ok=True)
+    nbytes = (capacidad + 7) // 8
+    try:
+        fd = os.open(_asientos_path(codigo), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0))
+    except FileExistsError:
+        return
+    with os.fdopen(fd, "wb") as f:
+        f.write(_ASIENTOS_HEADER.pack(_ASIENTOS_MAGIC, capacidad, 0, 0, 0.0) + bytes(2 * nbytes))
+
+class _MapaAsientos:
+    """Estado de un mapa leído bajo bloqueo; se vuelve a escribir entero al salir."""
+
+    def __init__(self, codigo: str, raw: bytes):
+        magic, self.capacidad, self.vendidos, self.retenidos, self.proxima = _ASIENTOS_HEADER.unpack_from(raw)
+        if magic != _ASIENTOS_MAGIC:
+            raise ValueError(f"Mapa de asientos inválido para {codigo}.")
+        self.codigo = codigo
+        nbytes = (self.capacidad + 7) // 8
+        base = _ASIENTOS_HEADER.size
+        self.bits_vendidos = bytearray(raw[base:base + nbytes])
+        self.bits_retenidos = bytearray(raw[base + nbytes:base + 2 * nbytes])
+        self.holds: Dict[str, Dict] = _leer_json(_holds_path(codigo), {})
+
+    def serializar(self) -> bytes:
+        return (_ASIENTOS_HEADER.pack(_ASIENTOS_MAGIC, self.capacidad, self.vendidos, self.retenidos, self.proxima)
+                + bytes(self.bits_vendidos) + bytes(self.bits_retenidos))
+
+    @property
+    def disponibles(self) -> int:
+        return self.capacidad - self.vendidos - self.retenidos
+
+    def _marcar(self, bits: bytearray, asiento: int, valor: bool):
+        i, b = divmod(asiento - 1, 8)
+        if valor:
+            bits[i] |= 1 << b
+        else:
+            bits[i] &= ~(1 << b)
+
+    def vencer_retenciones(self, ahora: float) -> bool:
+        if not self.retenidos or self.proxima > ahora:
+            return False
+        for token, hold in list(self.holds.items()):
+            if hold["expira"] <= ahora:
+                self._soltar(token)
+        return True
+
+    def _soltar(self, token: str) -> List[int]:
+        hold = self.holds.pop(token)
+        for a in hold["asientos"]:
+            self._marcar(self.bits_retenidos, a, False)
+        self.retenidos -= len(hold["asientos"])
+        self.proxima = min((h["expira"] for h in self.holds.values()), default=0.0)
+        return hold["asientos"]
+
+    def libres(self, cantidad: int) -> List[int]:
+        if cantidad > self.disponibles:
+            raise AsientosInsuficientes(self.codigo, self.disponibles)
+        asientos: List[int] = []
+        for i, (v, r) in enumerate(zip(self.bits_vendidos, self.bits_retenidos)):
+            ocupados = v | r
+            if ocupados == 0xFF:
+                continue
+            for b in range(8):
+                n = i * 8 + b + 1
+                if n > self.capacidad:
+                    break
+                if not ocupados & (1 << b):
+                    asientos.append(n)
+                    if len(asientos) == cantidad:
+                        return asientos
+        raise AsientosInsuficientes(self.codigo, len(asientos))
+
+    def retener(self, asientos: List[int], ttl: float, ahora: float) -> str:
+        token = secrets.token_hex(8)
+        for a in asientos:
+            self._marcar(self.bits_retenidos, a, True)
+        self.retenidos += len(asientos)
+        self.holds[token] = {"asientos": asientos, "expira": ahora + ttl}
+        self.proxima = min(h["expira"] for h in self.holds.values())
+        return token
+
+    def vender(self, asientos: List[int]):
+        for a in asientos:
+            self._marcar(self.bits_vendidos, a, True)
+        self.vendidos += len(asientos)
+
+    def devolver(self, asientos: List[int]):
+        for a in asientos:
+            i, b = divmod(a - 1, 8)
+            if self.bits_vendidos[i] & (1 << b):
+                self._marcar(self.bits_vendidos, a, False)
+                self.vendidos -= 1
+
+@contextmanager
+def _mapa_bloqueado(codigo: str):
+    try:
+        f = open(_asientos_path(codigo), "r+b")
+    except FileNotFoundError:
+        raise ValueError(f"La función {codigo} no tiene mapa de asientos.") from None
+    with f, _bloqueo_exclusivo(f):
+        f.seek(0)
+        mapa = _MapaAsientos(codigo, f.read())
+        holds_antes = len(mapa.holds)
+        mapa.vencer_retenciones(time.time())
+        yield mapa
+        f.seek(0)
+        f.write(mapa.serializar())
+        f.flush()
+        if mapa.holds or holds_antes:
+            _escribir_json(_holds_path(codigo), mapa.holds)
+
+def asientos_disponibles(codigo: str) -> Optional[int]:
+    """
+    Asientos libres de una función leyendo solo el encabezado; None si no
+    tiene capacidad definida (venta sin límite).
+    """
+    try:
+        with open(_asientos_path(codigo), "rb") as f:
+            raw = f.read(_ASIENTOS_HEADER.size)
+    except FileNotFoundError:
+        return None
+    _, capacidad, vendidos, retenidos, proxima = _ASIENTOS_HEADER.unpack(raw)
+    if retenidos and proxima <= time.time():
+        with _mapa_bloqueado(codigo) as mapa:
+            return mapa.disponibles
+    return capacidad - vendidos - retenidos
+
+def retener_asientos(codigo: str, cantidad: int, ttl: float = RETENCION_SEGUNDOS) -> Tuple[str, List[int]]:
+    """Aparta `cantidad` asientos por `ttl` segundos. Retorna (token, asientos)."""
+    with _mapa_bloqueado(codigo) as mapa:
+        asientos = mapa.libres(cantidad)
+        return mapa.retener(asientos, ttl, time.time()), asientos
+
+def confirmar_retencion(codigo: str, token: str) -> List[int]:
+    """Convierte una retención vigente en venta."""
+    with _mapa_bloqueado(codigo) as mapa:
+        if token not in mapa.holds:
+            raise ValueError("La retención no existe o ya venció.")
+        asientos = mapa._soltar(token)
+        mapa.vender(asientos)
+        return asientos
+
+def liberar_retencion(codigo: str, token: str):
+    with _mapa_bloqueado(codigo) as mapa:
+        if token in mapa.holds:
+            mapa._soltar(token)
+
+def vender_asientos(codigo: str, cantidad: int) -> List[int]:
+    """Asigna y vende `cantidad` asientos en una sola operación atómica."""
+    with _mapa_bloqueado(codigo) as mapa:
+        asientos = mapa.libres(cantidad)
+        mapa.vender(asientos)
+        return asientos
+
+def devolver_asientos(codigo: str, asientos: List[int]):
+    with _mapa_bloqueado(codigo) as mapa:
+        mapa.devolver(asientos)
+
+# ------------------------- Escritura de ventas por lotes -------------------------
+
+FSYNC_POLICIES = ("siempre", "lote", "nunca")
+FSYNC_POLICY = os.environ.get("MOVIETIME_FSYNC", "lote")
+LOTE_VENTAS = int(os.environ.get("MOVIETIME_LOTE_VENTAS", "50"))
+LOTE_SEGUNDOS = float(os.environ.get("MOVIETIME_LOTE_SEGUNDOS", "2"))
+TERMINAL = os.environ.get("MOVIETIME_TERMINAL", "taquilla")
+# última línea del diario mientras un lote se escribe: tamaño previo de ventas.csv
+_MARCA_LOTE = b"#offset "
+
+class VentasWriter:
+    """
+    Escritor de ventas de larga vida sobre ventas.csv.
+
+    Cada venta se anota primero en el diario de la terminal y queda en
+    memoria; el lote pasa a ventas.csv con una sola escritura al llegar a
+    `max_filas` ventas o `max_segundos` desde la primera pendiente. Antes de
+    escribirlo se anota en el diario el tamaño de ventas.csv; si el proceso
+    muere, el próximo escritor sigue el lote desde esa posición.
+
+    Política de fsync: "siempre" (diario en cada venta; diario y CSV en cada
+    lote), "lote" (diario y CSV en cada lote) o "nunca" (lo decide el
+    sistema). Cada terminal concurrente debe usar su propio diario; las
+    escrituras en ventas.csv se hacen bajo bloqueo.
+    """
+
+    def __init__(self, path: str, journal_path: str, max_filas: int = LOTE_VENTAS,
+                 max_segundos: float = LOTE_SEGUNDOS, fsync: str = FSYNC_POLICY):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync}")
+        self.path = path
+        self.journal_path = journal_path
+        self.max_filas = max(1, max_filas)
+        self.max_segundos = max_segundos
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._pendientes: List[bytes] = []
+        self._timer: Optional[threading.Timer] = None
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        self._archivo = os.fdopen(self._fd, "ab", buffering=0, closefd=False)
+        with _bloqueo_exclusivo(self._archivo):
+            self._recuperar()
+        self._journal = open(journal_path, "ab")
+
+    def _escribir(self, datos: bytes):
+        vista = memoryview(datos)
+        while vista:
+            vista = vista[os.write(self._fd, vista):]
+        if self.fsync != "nunca":
+            os.fsync(self._fd)
+
+    def _recuperar(self):
+        """
+        Reaplica un diario que quedó con ventas tras una caída. Sin marca, el
+        lote no alcanzó a escribirse; con marca, lo que ya hay en ventas.csv
+        desde esa posición es el comienzo del lote y se escribe el resto.
+        """
+        try:
+            with open(self.journal_path, "rb") as f:
+                diario = f.read()
+        except FileNotFoundError:
+            return
+        # una fila anotada a medias no llegó a confirmarse
+        lote = diario[:diario.rfind(b"\n") + 1]
+        inicio = lote.rfind(b"\n", 0, len(lote) - 1) + 1
+        escrito = 0
+        if lote.startswith(_MARCA_LOTE, inicio):
+            offset = int(lote[inicio + len(_MARCA_LOTE):])
+            lote = lote[:inicio]
+            escrito = min(max(0, os.fstat(self._fd).st_size - offset), len(lote))
+        if escrito < len(lote):
+            self._escribir(lote[escrito:])
+        with open(self.journal_path, "wb"):
+            pass
+
+    def agregar(self, fila: bytes):
+        with self._lock:
+            self._journal.write(fila)
+            self._journal.flush()
+            if self.fsync == "siempre":
+                os.fsync(self._journal.fileno())
+            self._pendientes.append(fila)
+            if len(self._pendientes) >= self.max_filas:
+                self.flush()
+            elif self._timer is None and self.max_segundos > 0:
+                self._timer = threading.Timer(self.max_segundos, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pendientes:
+                return False
+            with _bloqueo_exclusivo(self._archivo):
+                sin_marca = self._journal.tell()
+                self._journal.write(b"%s%d\n" % (_MARCA_LOTE, os.fstat(self._fd).st_size))
+                self._journal.flush()
+                try:
+                    if self.fsync != "nunca":
+                        os.fsync(self._journal.fileno())
+                    self._escribir(b"".join(self._pendientes))
+                except OSError:
+                    # el lote sigue pendiente; la marca se pone de nuevo al reintentar
+                    self._journal.truncate(sin_marca)
+                    raise
+            self._pendientes = []
+            # el lote ya está en ventas.csv: el diario puede vaciarse
+            self._journal.truncate(0)
+            self._journal.flush()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._fd < 0:
+                return
+            self.flush()
+            self._journal.close()
+            self._archivo.close()
+            os.close(self._fd)
+            self._fd = -1
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+
+def benchmark_ventas(n_ventas: int = 100_000) -> Dict[str, float]:
+    """Ventas por segundo del ciclo de venta: escritura directa vs. por lotes."""
+    anterior = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix="movietime-ventas-")
+    resultados: Dict[str, float] = {}
+    try:
+        os.chdir(tmp)
+
+        def fila() -> bytes:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            return f"{now},FUN001,2,24000.00\r\n".encode("utf-8")
+
+        ensure_csv_headers()
+        t0 = time.perf_counter()
+        for _ in range(n_ventas):
+            # el camino anterior: verificar, abrir, escribir y cerrar por venta
+            ensure_csv_headers()
+            with open(VENTAS_CSV, "ab") as f:
+                f.write(fila())
+        resultados["directo"] = n_ventas / (time.perf_counter() - t0)
+
+        for politica in FSYNC_POLICIES:
+            n = n_ventas if politica != "siempre" else min(n_ventas, 2_000)
+            writer = VentasWriter(VENTAS_CSV, f"{VENTAS_CSV}.bench.journal", max_segundos=0, fsync=politica)
+            t0 = time.perf_counter()
+            for _ in range(n):
+                writer.agregar(fila())
+            writer.close()
+            resultados[f"lotes/{politica}"] = n / (time.perf_counter() - t0)
+        return resultados
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+# ------------------------- Backends de almacenamiento -------------------------
+#
+# La lógica de negocio solo habla con get_storage(). El backend CSV es el de
+# siempre; el SQLite (WAL, índices por código y fecha, transacciones) se activa
+# con MOVIETIME_STORAGE=sqlite o con --storage sqlite y permite que varias
+# taquillas escriban a la vez sin intercalar filas.
+
+class CSVStorage:
+    """funciones.csv + ventas.csv, con el índice en memoria y el resumen incremental."""
+
+    nombre = "csv"
+
+    def __init__(self):
+        self._writer: Optional[VentasWriter] = None
+
+    def writer(self) -> VentasWriter:
+        if self._writer is None:
+            ensure_csv_headers()
+            path = os.path.abspath(VENTAS_CSV)
+            self._writer = VentasWriter(path, f"{path}.{TERMINAL}.journal",
+                                        LOTE_VENTAS, LOTE_SEGUNDOS, FSYNC_POLICY)
+            atexit.register(self._writer.close)
+        return self._writer
+
+    def funciones(self) -> Dict[str, Dict[str, str]]:
+        return get_funciones_repo().todas()
+
+    def obtener_funcion(self, codigo: str) -> Optional[Dict[str, str]]:
+        return get_funciones_repo().obtener(codigo)
+
+    def save_funcion(self, codigo: str, pelicula: str, hora: str, precio_centavos: int, capacidad: int = 0):
+        get_funciones_repo().agregar(codigo, pelicula, hora, centavos_a_texto(precio_centavos),
+                                     str(capacidad) if capacidad else "")
+
+    def save_venta(self, codigo_funcion: str, cantidad: int, total_centavos: int, fecha_hora: Optional[str] = None):
+        buf = io.StringIO()
+        now = fecha_hora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        csv.writer(buf).writerow([now, codigo_funcion, str(cantidad), centavos_a_texto(total_centavos)])
+        self.writer().agregar(buf.getvalue().encode("utf-8"))
+
+    def flush(self):
+        # abrir el escritor reaplica cualquier diario pendiente de una caída
+        self.writer().flush()
+
+    def load_ventas_del_dia(self, hoy: date) -> List[Dict[str, str]]:
+        self.flush()
+        ensure_csv_headers()
+        ventas: List[Dict[str, str]] = []
+        with open(VENTAS_CSV, "r", newline="", encoding="utf-8") as f:
+            r = csv.DictReader(f)
+            for row in r:
+                # fecha_hora con formato "YYYY-MM-DD HH:MM:SS"
+                try:
+                    dt = datetime.strptime(row["fecha_hora"], "%Y-%m-%d %H:%M:%S")
+                except Exception:
+                    # si la fila está mal formada, la ignoramos
+                    continue
+                if dt.date() == hoy:
+                    ventas.append(row)
+        return ventas
+
+    def siguiente_numero(self) -> Tuple[int, int]:
+        """Reserva el próximo número de la secuencia bajo bloqueo. Retorna (número, ancho)."""
+        fd = os.open(SECUENCIA_PATH, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        with os.fdopen(fd, "r+b") as f, _bloqueo_exclusivo(f):
+            f.seek(0)
+            try:
+                estado = json.loads(f.read() or b"null")
+            except ValueError:
+                estado = None
+            if not isinstance(estado, dict):
+                # primera vez: se parte del mayor código existente
+                estado = {"ultimo": max_numero_codigo(self.funciones()), "ancho": CODIGO_ANCHO}
+            estado["ultimo"] += 1
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(estado).encode("utf-8"))
+            f.flush()
+            return estado["ultimo"], estado["ancho"]
+
+    def fijar_secuencia(self, ultimo: int, ancho: int):
+        _escribir_json(SECUENCIA_PATH, {"ultimo": ultimo, "ancho": ancho})
+
+    def renombrar_codigos(self, mapa: Dict[str, str]):
+        """Reescribe funciones.csv y ventas.csv con los códigos nuevos."""
+        # el escritor apunta al archivo viejo: cerrarlo antes de reemplazarlo
+        self.close()
+        ensure_csv_headers()
+        for path, columna in ((FUNCIONES_CSV, 0), (VENTAS_CSV, 1)):
+            tmp = f"{path}.tmp"
+            with open(path, "r", newline="", encoding="utf-8") as src, \
+                    open(tmp, "w", newline="", encoding="utf-8") as dst:
+                w = csv.writer(dst)
+                for row in csv.reader(src):
+                    if len(row) > columna and row[columna] in mapa:
+                        row[columna] = mapa[row[columna]]
+                    w.writerow(row)
+            os.replace(tmp, path)
+        rebuild_resumen_ventas()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            atexit.unregister(self._writer.close)
+            self._writer = None
+
+    def resumen_del_dia(self, hoy: date) -> Dict:
+        # el resumen se pone al día con las ventas escritas desde la última consulta
+        self.flush()
+        sync_resumen_ventas()
+        return _leer_json(_dia_path(hoy.isoformat()), None) or _dia_vacio()
+
+class SQLiteStorage:
+    """
+    Base SQLite en modo WAL. Los montos se guardan en centavos enteros para
+    que las sumas sean exactas; hacia afuera se exponen igual que en CSV.
+    """
+
+    nombre = "sqlite"
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS funciones (
+            codigo TEXT PRIMARY KEY,
+            pelicula TEXT NOT NULL,
+            hora TEXT NOT NULL,
+            precio_centavos INTEGER NOT NULL,
+            capacidad INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS ventas (
+            id INTEGER PRIMARY KEY,
+            fecha_hora TEXT NOT NULL,
+            codigo_funcion TEXT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            total_centavos INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ventas_fecha_hora ON ventas (fecha_hora);
+        CREATE INDEX IF NOT EXISTS ventas_codigo_funcion ON ventas (codigo_funcion);
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre TEXT PRIMARY KEY,
+            ultimo INTEGER NOT NULL,
+            ancho INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.ESQUEMA)
+        columnas = {row[1] for row in self.conn.execute("PRAGMA table_info(funciones)")}
+        if "capacidad" not in columnas:
+            self.conn.execute("ALTER TABLE funciones ADD COLUMN capacidad INTEGER NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def _fila_funcion(pelicula: str, hora: str, precio_centavos: int, capacidad: int) -> Dict[str, str]:
+        return {"pelicula": pelicula, "hora": hora, "precio": centavos_a_texto(precio_centavos),
+                "capacidad": str(capacidad) if capacidad else ""}
+
+    def funciones(self) -> Dict[str, Dict[str, str]]:
+        cur = self.conn.execute("SELECT codigo, pelicula, hora, precio_centavos, capacidad FROM funciones")
+        return {c: self._fila_funcion(p, h, pc, cap) for c, p, h, pc, cap in cur}
+
+    def obtener_funcion(self, codigo: str) -> Optional[Dict[str, str]]:
+        row = self.conn.execute(
+            "SELECT pelicula, hora, precio_centavos, capacidad FROM funciones WHERE codigo = ?", (codigo,)
+        ).fetchone()
+        return self._fila_funcion(*row) if row else None
+
+    @contextmanager
+    def transaccion(self):
+        # isolation_level=None deja la conexión en autocommit: las escrituras
+        # sueltas ya son atómicas y los lotes abren su propia transacción
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def save_funcion(self, codigo: str, pelicula: str, hora: str, precio_centavos: int, capacidad: int = 0):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO funciones (codigo, pelicula, hora, precio_centavos, capacidad)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (codigo, pelicula, hora, precio_centavos, capacidad),
+        )
+
+    def save_venta(self, codigo_funcion: str, cantidad: int, total_centavos: int, fecha_hora: Optional[str] = None):
+        now = fecha_hora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.conn.execute(
+            "INSERT INTO ventas (fecha_hora, codigo_funcion, cantidad, total_centavos) VALUES (?, ?, ?, ?)",
+            (now, codigo_funcion, cantidad, total_centavos),
+        )
+
+    @staticmethod
+    def _rango_dia(hoy: date) -> Tuple[str, str]:
+        # fecha_hora es texto ordenable: el día es un rango sobre el índice
+        return (hoy.isoformat(), (hoy + timedelta(days=1)).isoformat())
+
+    def load_ventas_del_dia(self, hoy: date) -> List[Dict[str, str]]:
+        cur = self.conn.execute(
+            "SELECT fecha_hora, codigo_funcion, cantidad, total_centavos FROM ventas"
+            " WHERE fecha_hora >= ? AND fecha_hora < ? ORDER BY id",
+            self._rango_dia(hoy),
+        )
+        return [
+            {"fecha_hora": f, "codigo_funcion": c, "cantidad": str(q), "total": centavos_a_texto(t)}
+            for f, c, q, t in cur
+        ]
+
+    def resumen_del_dia(self, hoy: date) -> Dict:
+        resumen = _dia_vacio()
+        cur = self.conn.execute(
+            "SELECT codigo_funcion, substr(fecha_hora, 12, 2), SUM(cantidad), SUM(total_centavos) FROM ventas"
+            " WHERE fecha_hora >= ? AND fecha_hora < ? GROUP BY 1, 2",
+            self._rango_dia(hoy),
+        )
+        for codigo, hora, cantidad, centavos in cur:
+            resumen["boletos"] += cantidad
+            resumen["total_centavos"] += centavos
+            _sumar(resumen["por_funcion"], codigo, cantidad, centavos)
+            _sumar(resumen["por_hora"], hora, cantidad, centavos)
+        return resumen
+
+    def siguiente_numero(self) -> Tuple[int, int]:
+        with self.transaccion():
+            row = self.conn.execute("SELECT ultimo, ancho FROM secuencias WHERE nombre = 'funciones'").fetchone()
+            if row is None:
+                codigos = [c for (c,) in self.conn.execute("SELECT codigo FROM funciones")]
+                ultimo, ancho = max_numero_codigo(codigos) + 1, CODIGO_ANCHO
+                self.conn.execute("INSERT INTO secuencias (nombre, ultimo, ancho) VALUES ('funciones', ?, ?)",
+                                  (ultimo, ancho))
+            else:
+                ultimo, ancho = row[0] + 1, row[1]
+                self.conn.execute("UPDATE secuencias SET ultimo = ? WHERE nombre = 'funciones'", (ultimo,))
+        return ultimo, ancho
+
+    def fijar_secuencia(self, ultimo: int, ancho: int):
+        self.conn.execute("INSERT OR REPLACE INTO secuencias (nombre, ultimo, ancho) VALUES ('funciones', ?, ?)",
+                          (ultimo, ancho))
+
+    def renombrar_codigos(self, mapa: Dict[str, str]):
+        pares = [(nuevo, viejo) for viejo, nuevo in mapa.items()]
+        with self.transaccion():
+            self.conn.executemany("UPDATE funciones SET codigo = ? WHERE codigo = ?", pares)
+            self.conn.executemany("UPDATE ventas SET codigo_funcion = ? WHERE codigo_funcion = ?", pares)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+STORAGE = os.environ.get("MOVIETIME_STORAGE", "csv")
+SQLITE_DB = os.environ.get("MOVIETIME_DB", "movietime.db")
+
+_storage = None
+
+def get_storage():
+    """Backend activo según STORAGE ("csv" o "sqlite")."""
+    global _storage
+    if _storage is None or _storage.nombre != STORAGE:
+        if _storage is not None:
+            _storage.close()
+        _storage = SQLiteStorage(SQLITE_DB) if STORAGE == "sqlite" else CSVStorage()
+    return _storage
+
+def load_funciones() -> Dict[str, Dict[str, str]]:
+    """
+    Retorna dict por código:
+    { codigo: { "pelicula": str, "hora": str, "precio": "12000.00", "capacidad": int_str } }
+    """
+    return dict(get_storage().funciones())
+
+def save_funcion(codigo: str, pelicula: str, hora: str, precio_centavos: int, capacidad: int = 0):
+    get_storage().save_funcion(codigo, pelicula, hora, precio_centavos, capacidad)
+    if capacidad:
+        crear_mapa_asientos(codigo, capacidad)
+
+def save_venta(codigo_funcion: str, cantidad: int, total_centavos: int, fecha_hora: Optional[str] = None):
+    get_storage().save_venta(codigo_funcion, cantidad, total_centavos, fecha_hora)
 
 def load_ventas_del_dia(hoy: date) -> List[Dict[str, str]]:
+    return get_storage().load_ventas_del_dia(hoy)
+
+def resumen_del_dia(hoy: date) -> Dict:
+    """Totales de un día: boletos, total en centavos y desgloses por función y por hora."""
+    return get_storage().resumen_del_dia(hoy)
+
+def migrar_csv_a_sqlite(db_path: str, lote: int = 10_000) -> Tuple[int, int]:
+    """
+    Copia funciones.csv y ventas.csv a una base SQLite nueva.
+    Se niega a correr sobre una base que ya tenga ventas, para no duplicarlas.
+    """
     ensure_csv_headers()
-    ventas: List[Dict[str, str]] = []
-    with open(VENTAS_CSV, "r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            # fecha_hora con formato "YYYY-MM-DD HH:MM:SS"
+    destino = SQLiteStorage(db_path)
+    try:
+        if destino.conn.execute("SELECT 1 FROM ventas LIMIT 1").fetchone():
+            raise ValueError(f"{db_path} ya tiene ventas; la migración es de una sola vez.")
+        if isinstance(_storage, CSVStorage):
+            _storage.flush()
+
+        funciones = [
+            (codigo, d["pelicula"], d["hora"], a_centavos(d["precio"] or "0"), int(d["capacidad"] or 0))
+            for codigo, d in CSVStorage().funciones().items()
+        ]
+        n_ventas = 0
+        with destino.transaccion():
+            destino.conn.executemany(
+                "INSERT OR REPLACE INTO funciones (codigo, pelicula, hora, precio_centavos, capacidad)"
+                " VALUES (?, ?, ?, ?, ?)",
+                funciones,
+            )
+            with open(VENTAS_CSV, "r", newline="", encoding="utf-8") as f:
+                buffer = []
+                for row in csv.DictReader(f):
+                    try:
+                        if not _fecha_valida(row["fecha_hora"]):
+                            continue
+                        buffer.append((row["fecha_hora"], row["codigo_funcion"],
+                                       int(row["cantidad"]), a_centavos(row["total"])))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if len(buffer) >= lote:
+                        destino.conn.executemany(
+                            "INSERT INTO ventas (fecha_hora, codigo_funcion, cantidad, total_centavos)"
+                            " VALUES (?, ?, ?, ?)", buffer)
+                        n_ventas += len(buffer)
+                        buffer = []
+                if buffer:
+                    destino.conn.executemany(
+                        "INSERT INTO ventas (fecha_hora, codigo_funcion, cantidad, total_centavos)"
+                        " VALUES (?, ?, ?, ?)", buffer)
+                    n_ventas += len(buffer)
+        return len(funciones), n_ventas
+    finally:
+        destino.close()
+
+def benchmark_storage(n_ventas: int = 1_000_000, dias: int = 30, muestras: int = 1_000) -> Dict[str, Dict[str, float]]:
+    """
+    Compara ambos backends sobre n_ventas sintéticas repartidas en `dias` días,
+    en un directorio temporal. Retorna segundos por operación y backend.
+    """
+    global STORAGE, SQLITE_DB, _storage
+    anterior = (os.getcwd(), STORAGE, SQLITE_DB)
+    tmp = tempfile.mkdtemp(prefix="movietime-bench-")
+    resultados: Dict[str, Dict[str, float]] = {}
+    try:
+        os.chdir(tmp)
+        ensure_csv_headers()
+        inicio = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=dias - 1)
+        with open(FUNCIONES_CSV, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([f"FUN{i:03d}", f"Película {i}", "18:00", "12000.00", ""] for i in range(1, 21))
+        with open(VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            paso = dias * 12 * 3600 / n_ventas
+            for i in range(n_ventas):
+                ts = inicio + timedelta(seconds=int(i * paso) % (12 * 3600), days=int(i * paso) // (12 * 3600))
+                cantidad = i % 4 + 1
+                w.writerow([ts.strftime("%Y-%m-%d %H:%M:%S"), f"FUN{i % 20 + 1:03d}", cantidad, f"{cantidad * 12000:.2f}"])
+        ultimo_dia = (inicio + timedelta(days=dias - 1)).date()
+
+        def medir(fn) -> float:
+            t0 = time.perf_counter()
+            fn()
+            return time.perf_counter() - t0
+
+        STORAGE = "csv"
+        csv_storage = get_storage()
+        resultados["csv"] = {
+            "carga_inicial": medir(rebuild_resumen_ventas),
+            "load_ventas_del_dia": medir(lambda: csv_storage.load_ventas_del_dia(ultimo_dia)),
+            "resumen_del_dia": medir(lambda: csv_storage.resumen_del_dia(ultimo_dia)),
+            "save_venta": medir(lambda: [csv_storage.save_venta("FUN001", 1, 1_200_000) for _ in range(muestras)]) / muestras,
+        }
+        csv_storage.close()
+
+        STORAGE, SQLITE_DB = "sqlite", os.path.join(tmp, "bench.db")
+        carga = medir(lambda: migrar_csv_a_sqlite(SQLITE_DB))
+        sqlite_storage = get_storage()
+        resultados["sqlite"] = {
+            "carga_inicial": carga,
+            "load_ventas_del_dia": medir(lambda: sqlite_storage.load_ventas_del_dia(ultimo_dia)),
+            "resumen_del_dia": medir(lambda: sqlite_storage.resumen_del_dia(ultimo_dia)),
+            "save_venta": medir(lambda: [sqlite_storage.save_venta("FUN001", 1, 1_200_000) for _ in range(muestras)]) / muestras,
+        }
+        sqlite_storage.close()
+        return resultados
+    finally:
+        _storage = None
+        os.chdir(anterior[0])
+        STORAGE, SQLITE_DB = anterior[1], anterior[2]
+        shutil.rmtree(tmp, ignore_errors=True)
+
+# ------------------------- Análisis por rango de fechas -------------------------
+#
+# Una sola pasada por ventas.csv agrupa por día y por función; las películas
+# salen después de sumar las funciones. Las fechas se comparan como los
+# primeros 10 bytes de la línea (AAAA-MM-DD ordena igual que la fecha), sin
+# strptime. Con `procesos` > 1 el archivo se parte en trozos alineados a
+# líneas y cada proceso analiza el suyo.
+
+def _analizar_trozo(path: str, inicio: int, fin: int, desde: bytes, hasta: bytes) -> Tuple[Dict, Dict]:
+    por_dia: Dict[bytes, List] = {}
+    por_funcion: Dict[bytes, List] = {}
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        pos = inicio
+        for linea in f:
+            if pos >= fin:
+                break
+            pos += len(linea)
+            dia = linea[:10]
+            if dia < desde or dia > hasta or linea[10:11] != b" ":
+                continue  # fuera del rango, encabezado o fila mal formada
+            if b'"' in linea:
+                campos = [c.encode("utf-8") for c in next(csv.reader([linea.decode("utf-8")]))]
+            else:
+                campos = linea.rstrip(b"\r\n").split(b",")
             try:
-                dt = datetime.strptime(row["fecha_hora"], "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                # si la fila está mal formada, la ignoramos
+                cantidad = int(campos[2])
+                total = a_centavos(campos[3].decode("ascii"))
+            except (IndexError, ValueError):
                 continue
-            if dt.date() == hoy:
-                ventas.append(row)
-    return ventas
+            for grupo, clave in ((por_dia, dia), (por_funcion, campos[1])):
+                acc = grupo.get(clave)
+                if acc is None:
+                    grupo[clave] = [cantidad, total]
+                else:
+                    acc[0] += cantidad
+                    acc[1] += total
+    return (
+        {k.decode("utf-8"): v for k, v in por_dia.items()},
+        {k.decode("utf-8"): v for k, v in por_funcion.items()},
+    )
+
+def _trozos(path: str, n: int) -> List[Tuple[int, int]]:
+    """Parte el archivo en n rangos de bytes que empiezan al inicio de una línea."""
+    tam = os.path.getsize(path)
+    cortes = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n):
+            f.seek(max(tam * i // n - 1, cortes[-1]))
+            f.readline()
+            cortes.append(max(f.tell(), cortes[-1]))
+    cortes.append(tam)
+    return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+def _acumular(destino: Dict[str, List], origen: Dict[str, List]):
+    for clave, (cantidad, total) in origen.items():
+        acc = destino.setdefault(clave, [0, 0])
+        acc[0] += cantidad
+        acc[1] += total
+
+def analisis_rango(desde: date, hasta: date, procesos: int = 0, binario: bool = False) -> Dict:
+    """
+    Totales de [desde, hasta] agrupados por día, función y película.
+    Con `binario` se lee ventas.bin (sincronizado antes) en lugar del CSV;
+    con el backend SQLite no hay ventas.csv y se consulta la base.
+    """
+    storage = get_storage()
+    storage.flush()
+    por_dia: Dict[str, List] = {}
+    por_funcion: Dict[str, List] = {}
+
+    if binario and not isinstance(storage, SQLiteStorage):
+        sincronizar_bin()
+        por_dia, por_funcion = BinLogVentas(VENTAS_BIN).agregar_rango(desde, hasta)
+    elif isinstance(storage, SQLiteStorage):
+        cur = storage.conn.execute(
+            "SELECT substr(fecha_hora, 1, 10), codigo_funcion, SUM(cantidad), SUM(total_centavos) FROM ventas"
+            " WHERE fecha_hora >= ? AND fecha_hora < ? GROUP BY 1, 2",
+            (desde.isoformat(), (hasta + timedelta(days=1)).isoformat()),
+        )
+        for dia, codigo, cantidad, centavos in cur:
+            _acumular(por_dia, {dia: [cantidad, centavos]})
+            _acumular(por_funcion, {codigo: [cantidad, centavos]})
+    else:
+        ensure_csv_headers()
+        args = (desde.isoformat().encode(), hasta.isoformat().encode())
+        if procesos > 1:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                futuros = [pool.submit(_analizar_trozo, VENTAS_CSV, a, b, *args)
+                           for a, b in _trozos(VENTAS_CSV, procesos * 4)]
+                parciales = [fut.result() for fut in futuros]
+        else:
+            parciales = [_analizar_trozo(VENTAS_CSV, 0, os.path.getsize(VENTAS_CSV), *args)]
+        for dias, funciones in parciales:
+            _acumular(por_dia, dias)
+            _acumular(por_funcion, funciones)
+
+    funciones = storage.funciones()
+    por_pelicula: Dict[str, List] = {}
+    for codigo, acc in por_funcion.items():
+        pelicula = funciones[codigo]["pelicula"] if codigo in funciones else "(desconocida)"
+        _acumular(por_pelicula, {pelicula: acc})
+
+    def salida(grupo: Dict[str, List], orden=None) -> Dict[str, Dict]:
+        return {k: {"boletos": v[0], "total_centavos": v[1]} for k, v in sorted(grupo.items(), key=orden)}
+
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "boletos": sum(v[0] for v in por_dia.values()),
+        "total_centavos": sum(v[1] for v in por_dia.values()),
+        "por_dia": salida(por_dia),
+        "por_funcion": salida(por_funcion, orden=lambda kv: clave_codigo(kv[0])),
+        "por_pelicula": salida(por_pelicula),
+    }
+
+# ------------------------- Registro binario de ventas -------------------------
+#
+# ventas.bin es una copia de ventas.csv en registros de ancho fijo
+# (timestamp int64, id de función int32, cantidad int32, total en centavos
+# int64) que se lee con mmap sin parsear texto. Los ids de función se
+# traducen a códigos con ventas.bin.codigos (un código por línea). El
+# encabezado guarda cuántos registros son válidos, hasta qué byte de
+# ventas.csv se convirtió y la huella de los bytes previos, así que
+# sincronizar solo agrega lo nuevo, una caída a mitad de camino se descarta
+# en la siguiente sincronización y si ventas.csv se reescribió se rehace.
+# Los timestamps son la hora local tal cual se escribió en el CSV, contada
+# como si fuera UTC, para que la conversión de ida y vuelta sea exacta.
+
+VENTAS_BIN = "ventas.bin"
+
+def _fecha_a_ts(fecha_hora: str) -> int:
+    return calendar.timegm((int(fecha_hora[0:4]), int(fecha_hora[5:7]), int(fecha_hora[8:10]),
+                            int(fecha_hora[11:13]), int(fecha_hora[14:16]), int(fecha_hora[17:19])))
+
+def _ts_a_fecha(ts: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+class BinLogVentas:
+    REGISTRO = struct.Struct("<qiiq")
+    # magic, tamaño de registro, flags, registros, offset en el CSV, huella del CSV antes del offset
+    CABECERA = struct.Struct(f"<8sIIqq{HUELLA_BYTES}s")
+    MAGIC = b"MTVENTA2"
+    MAGICS_ANTERIORES = (b"MTVENTA1",)
+    DESORDENADO = 1  # algún registro llegó con hora anterior al último: no se puede bisecar
+
+    def __init__(self, path: str = VENTAS_BIN):
+        self.path = path
+        self.codigos_path = f"{path}.codigos"
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(self.CABECERA.pack(self.MAGIC, self.REGISTRO.size, 0, 0, 0, b""))
+        try:
+            with open(self.codigos_path, "r", encoding="utf-8") as f:
+                self.codigos = [linea.rstrip("\n") for linea in f]
+        except FileNotFoundError:
+            self.codigos = []
+        self._ids = {c: i for i, c in enumerate(self.codigos)}
+
+    def cabecera(self) -> Tuple[int, int, int, bytes]:
+        """(flags, registros, offset en el CSV, huella)."""
+        with open(self.path, "rb") as f:
+            datos = f.read(self.CABECERA.size)
+        if datos[:len(self.MAGIC)] != self.MAGIC or len(datos) < self.CABECERA.size:
+            raise ValueError(f"{self.path} no es un registro binario de ventas.")
+        magic, tam, flags, n, offset, huella = self.CABECERA.unpack(datos)
+        if tam != self.REGISTRO.size:
+            raise ValueError(f"{self.path} no es un registro binario de ventas.")
+        return flags, n, offset, huella
+
+    def version_anterior(self) -> bool:
+        """True si el archivo tiene un formato previo, que se regenera desde ventas.csv."""
+        with open(self.path, "rb") as f:
+            return f.read(len(self.MAGIC)) in self.MAGICS_ANTERIORES
+
+    def _ids_de(self, codigos) -> List[int]:
+        nuevos = []
+        ids = []
+        for codigo in codigos:
+            i = self._ids.get(codigo)
+            if i is None:
+                i = self._ids[codigo] = len(self.codigos)
+                self.codigos.append(codigo)
+                nuevos.append(codigo)
+            ids.append(i)
+        if nuevos:
+            with open(self.codigos_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{c}\n" for c in nuevos))
+        return ids
+
+    def agregar_lote(self, filas: List[Tuple[str, str, int, int]], csv_offset: Optional[int] = None,
+                     huella: Optional[bytes] = None):
+        """Agrega (fecha_hora, código, cantidad, centavos) y actualiza el encabezado al final."""
+        flags, n, offset, huella_actual = self.cabecera()
+        ids = self._ids_de([f[1] for f in filas])
+        with open(self.path, "r+b") as f:
+            # lo que haya después de los registros válidos es de una escritura interrumpida
+            f.truncate(self.CABECERA.size + n * self.REGISTRO.size)
+            f.seek(0, os.SEEK_END)
+            ultimo = None
+            if n:
+                f.seek(-self.REGISTRO.size, os.SEEK_END)
+                ultimo = self.REGISTRO.unpack(f.read(self.REGISTRO.size))[0]
+            datos = bytearray()
+            for (fecha_hora, _, cantidad, centavos), fid in zip(filas, ids):
+                ts = _fecha_a_ts(fecha_hora)
+                if ultimo is not None and ts < ultimo:
+                    flags |= self.DESORDENADO
+                ultimo = ts
+                datos += self.REGISTRO.pack(ts, fid, cantidad, centavos)
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(self.CABECERA.pack(self.MAGIC, self.REGISTRO.size, flags, n + len(filas),
+                                       offset if csv_offset is None else csv_offset,
+                                       huella_actual if huella is None else huella))
+
+    @contextmanager
+    def _columnas(self):
+        """
+        Vistas sobre el archivo mapeado: timestamps (int64, uno por registro)
+        y el registro entero visto como int32 (6 por registro: ts, ts, id,
+        cantidad, total, total).
+        """
+        flags, n, _, _ = self.cabecera()
+        with open(self.path, "rb") as f:
+            if n == 0:
+                yield flags, 0, memoryview(b"").cast("q"), memoryview(b"").cast("i")
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            vista = memoryview(mm)[self.CABECERA.size:self.CABECERA.size + n * self.REGISTRO.size]
+            q, i32 = vista.cast("q"), vista.cast("i")
+            ts = q[0::3]
+            try:
+                yield flags, n, ts, i32
+            finally:
+                ts.release()
+                q.release()
+                i32.release()
+                vista.release()
+                mm.close()
+
+    def iterar(self):
+        """(fecha_hora, código, cantidad, centavos) en el orden del archivo."""
+        with self._columnas() as (_, n, ts, i32):
+            for k in range(n):
+                # total int64: parte baja sin signo + parte alta con signo, como en _sumar_tramo
+                centavos = (i32[6 * k + 4] & 0xFFFFFFFF) + (i32[6 * k + 5] << 32)
+                yield _ts_a_fecha(ts[k]), self.codigos[i32[6 * k + 2]], i32[6 * k + 3], centavos
+
+    @staticmethod
+    def _sumar_tramo(i32: memoryview, a: int, b: int) -> Tuple[int, int, Dict[int, List[int]]]:
+        """Suma los registros [a, b) con columnas estriadas de la vista int32."""
+        ids = i32[6 * a + 2:6 * b:6]
+        cantidades = i32[6 * a + 3:6 * b:6]
+        lo, hi = i32[6 * a + 4:6 * b:6], i32[6 * a + 5:6 * b:6]
+        try:
+            # los totales son int64: parte baja sin signo + parte alta con signo
+            centavos = sum(x & 0xFFFFFFFF for x in lo) + (sum(hi) << 32)
+            por_id: Dict[int, List[int]] = {}
+            for fid, cant, l, h in zip(ids, cantidades, lo, hi):
+                acc = por_id.get(fid)
+                if acc is None:
+                    acc = por_id[fid] = [0, 0]
+                acc[0] += cant
+                acc[1] += (l & 0xFFFFFFFF) + (h << 32)
+            return sum(cantidades), centavos, por_id
+        finally:
+            for vista in (ids, cantidades, lo, hi):
+                vista.release()
+
+    def agregar_rango(self, desde: date, hasta: date) -> Tuple[Dict[str, List], Dict[str, List]]:
+        """Totales por día y por función de [desde, hasta] sobre el archivo mapeado."""
+        por_dia: Dict[str, List] = {}
+        por_funcion: Dict[str, List] = {}
+        inicio = calendar.timegm(desde.timetuple())
+        fin = calendar.timegm((hasta + timedelta(days=1)).timetuple())
+        with self._columnas() as (flags, n, ts, i32):
+            if flags & self.DESORDENADO:
+                tramos = [(0, n)]
+            else:
+                # los registros están en orden de hora: cada día es un tramo contiguo
+                tramos = []
+                d = desde
+                while d <= hasta:
+                    a = bisect.bisect_left(ts, calendar.timegm(d.timetuple()))
+                    b = bisect.bisect_left(ts, calendar.timegm((d + timedelta(days=1)).timetuple()))
+                    if b > a:
+                        tramos.append((a, b))
+                    d += timedelta(days=1)
+            for a, b in tramos:
+                if flags & self.DESORDENADO:
+                    for k in range(a, b):
+                        if inicio <= ts[k] < fin:
+                            cent = (i32[6 * k + 4] & 0xFFFFFFFF) + (i32[6 * k + 5] << 32)
+                            for grupo, clave in ((por_dia, _ts_a_fecha(ts[k])[:10]),
+                                                 (por_funcion, self.codigos[i32[6 * k + 2]])):
+                                acc = grupo.setdefault(clave, [0, 0])
+                                acc[0] += i32[6 * k + 3]
+                                acc[1] += cent
+                    continue
+                cantidad, centavos, por_id = self._sumar_tramo(i32, a, b)
+                acc = por_dia.setdefault(_ts_a_fecha(ts[a])[:10], [0, 0])
+                acc[0] += cantidad
+                acc[1] += centavos
+                for fid, (cant, cent) in por_id.items():
+                    acc = por_funcion.setdefault(self.codigos[fid], [0, 0])
+                    acc[0] += cant
+                    acc[1] += cent
+        return por_dia, por_funcion
+
+def _huella_bin(f, offset: int) -> bytes:
+    """La huella de _huella() con el ancho fijo del encabezado de ventas.bin."""
+    return bytes.fromhex(_huella(f, offset)).ljust(HUELLA_BYTES, b"\0")
+
+def descartar_bin(bin_path: str = VENTAS_BIN):
+    """Borra el registro binario y sus códigos; la próxima sincronización lo rehace."""
+    for ruta in (bin_path, f"{bin_path}.codigos"):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+def sincronizar_bin(bin_path: str = VENTAS_BIN, lote: int = 50_000) -> int:
+    """Convierte a binario las filas de ventas.csv aún no copiadas. Retorna cuántas agregó."""
+    get_storage().flush()
+    ensure_csv_headers()
+    log = BinLogVentas(bin_path)
+    if log.version_anterior():
+        descartar_bin(bin_path)
+        log = BinLogVentas(bin_path)
+    _, _, offset, huella = log.cabecera()
+    agregadas = 0
+    with open(VENTAS_CSV, "rb") as f, open(VENTAS_CSV, "rb") as previo:
+        if offset > os.fstat(f.fileno()).st_size or _huella_bin(previo, offset) != huella:
+            # ventas.csv fue truncado o reescrito (renumerar-codigos): se rehace desde cero
+            descartar_bin(bin_path)
+            log = BinLogVentas(bin_path)
+            offset = 0
+        f.seek(offset)
+        filas: List[Tuple[str, str, int, int]] = []
+        pos = offset
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break  # línea a medio escribir: se toma en la próxima
+            pos += len(linea)
+            try:
+                row = next(csv.reader([linea.decode("utf-8")]))
+                if _fecha_valida(row[0]):
+                    filas.append((row[0], row[1], int(row[2]), a_centavos(row[3])))
+            except (StopIteration, IndexError, UnicodeDecodeError, ValueError):
+                pass  # encabezado o fila mal formada
+            if len(filas) >= lote:
+                log.agregar_lote(filas, pos, _huella_bin(previo, pos))
+                agregadas += len(filas)
+                filas = []
+        log.agregar_lote(filas, pos, _huella_bin(previo, pos))
+        agregadas += len(filas)
+    return agregadas
+
+def bin_a_csv(bin_path: str, csv_path: str) -> int:
+    """Escribe un ventas.csv equivalente al registro binario."""
+    log = BinLogVentas(bin_path)
+    n = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["fecha_hora", "codigo_funcion", "cantidad", "total"])
+        for fecha_hora, codigo, cantidad, centavos in log.iterar():
+            w.writerow([fecha_hora, codigo, cantidad, centavos_a_texto(centavos)])
+            n += 1
+    return n
+
+def benchmark_bin(n_ventas: int = 1_000_000, dias: int = 30) -> Dict[str, float]:
+    """Segundos por operación del análisis por rango sobre CSV y sobre el registro binario."""
+    global _storage
+    anterior = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix="movietime-bin-")
+    resultados: Dict[str, float] = {}
+    try:
+        os.chdir(tmp)
+        _storage = None
+        ensure_csv_headers()
+        inicio = datetime(2026, 1, 1, 10)
+        paso = dias * 12 * 3600 / n_ventas
+        with open(VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            for i in range(n_ventas):
+                segundos = int(i * paso)
+                ts = inicio + timedelta(days=segundos // (12 * 3600), seconds=segundos % (12 * 3600))
+                cantidad = i % 4 + 1
+                w.writerow([ts.strftime("%Y-%m-%d %H:%M:%S"), f"FUN{i % 20 + 1:03d}", cantidad, f"{cantidad * 12000:.2f}"])
+        desde, hasta = inicio.date() + timedelta(days=dias // 3), inicio.date() + timedelta(days=dias // 3 + 6)
+
+        t0 = time.perf_counter()
+        sincronizar_bin()
+        resultados["csv_a_bin"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        por_csv = analisis_rango(desde, hasta)
+        resultados["rango_csv"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        por_bin = analisis_rango(desde, hasta, binario=True)
+        resultados["rango_bin"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        bin_a_csv(VENTAS_BIN, "ida_y_vuelta.csv")
+        resultados["bin_a_csv"] = time.perf_counter() - t0
+        with open(VENTAS_CSV, "rb") as a, open("ida_y_vuelta.csv", "rb") as b:
+            resultados["ida_y_vuelta_exacta"] = float(a.read() == b.read())
+        resultados["rangos_iguales"] = float(por_csv == por_bin)
+        return resultados
+    finally:
+        if _storage is not None:
+            _storage.close()
+        _storage = None
+        os.chdir(anterior)
+        shutil.rmtree(tmp, ignore_errors=True)
 
 # ------------------------- Lógica de negocio -------------------------
 
+def numero_codigo(codigo: str) -> Optional[int]:
+    """Número de un código FUN###; None si el código es manual."""
+    suf = codigo[len(CODIGO_PREFIJO):]
+    if codigo.startswith(CODIGO_PREFIJO) and suf.isdigit():
+        return int(suf)
+    return None
+
+def max_numero_codigo(existing_codes) -> int:
+    return max((n for n in map(numero_codigo, existing_codes) if n is not None), default=0)
+
+def formatear_codigo(numero: int, ancho: int = CODIGO_ANCHO) -> str:
+    return f"{CODIGO_PREFIJO}{numero:0{ancho}d}"
+
+def clave_codigo(codigo: str):
+    """Orden natural: FUN999 antes que FUN1000, códigos manuales al final."""
+    n = numero_codigo(codigo)
+    return (0, n, codigo) if n is not None else (1, 0, codigo)
+
 def generate_next_code(existing_codes: List[str]) -> str:
     """
     Genera próximo código tipo FUN###. Si no hay, arranca en FUN001.
+    Recorre todos los códigos; crear_funcion usa la secuencia persistente.
+    """
+    return formatear_codigo(max_numero_codigo(existing_codes) + 1)
+
+def siguiente_codigo() -> str:
+    """Próximo código libre según la secuencia del backend, sin recorrer las funciones."""
+    storage = get_storage()
+    while True:
+        numero, ancho = storage.siguiente_numero()
+        codigo = formatear_codigo(numero, ancho)
+        # un código manual pudo ocupar ese número: se salta
+        if storage.obtener_funcion(codigo) is None:
+            return codigo
+
+def renumerar_codigos(ancho: int) -> Dict[str, str]:
     """
-    prefix = "FUN"
-    nmax = 0
-    for c in existing_codes:
-        if c.startswith(prefix):
-            suf = c[len(prefix):]
-            if suf.isdigit():
-                nmax = max(nmax, int(suf))
-    return f"{prefix}{nmax+1:03d}"
+    Lleva todos los códigos FUN### al ancho indicado (FUN007 → FUN000007) en
+    funciones, ventas y mapas de asientos, y fija ese ancho para los códigos
+    nuevos. ventas.bin se descarta y se rehace en la próxima sincronización.
+    Debe correrse con las demás terminales detenidas.
+    """
+    if ancho < 1:
+        raise ValueError("El ancho debe ser >= 1.")
+    storage = get_storage()
+    storage.flush()
+    funciones = storage.funciones()
+    # el número más alto y la cantidad de funciones deben caber sin desbordar el ancho
+    minimo = len(str(max(max_numero_codigo(funciones), len(funciones))))
+    if ancho < minimo:
+        raise ValueError(f"Con {len(funciones)} funciones el ancho debe ser >= {minimo}.")
+    mapa = {}
+    for codigo in funciones:
+        n = numero_codigo(codigo)
+        if n is not None and formatear_codigo(n, ancho) != codigo:
+            mapa[codigo] = formatear_codigo(n, ancho)
+    choques = sorted(set(mapa.values()) & (set(funciones) - set(mapa)))
+    if choques:
+        raise ValueError(f"Los códigos {', '.join(choques)} ya existen; no se puede renumerar.")
+    if mapa:
+        storage.renombrar_codigos(mapa)
+        descartar_bin()
+        for viejo, nuevo in mapa.items():
+            for ruta in (_asientos_path, _holds_path):
+                if os.path.exists(ruta(viejo)):
+                    os.replace(ruta(viejo), ruta(nuevo))
+    storage.fijar_secuencia(max_numero_codigo(funciones), ancho)
+    return mapa
+
+def capacidad_de(funcion: Dict[str, str]) -> int:
+    """Capacidad de la sala; 0 si la función no tiene límite."""
+    try:
+        return int(funcion.get("capacidad") or 0)
+    except ValueError:
+        return 0
 
 def input_nonempty(prompt: str) -> str:
     while True:
@@ -105,17 +1606,18 @@ def input_nonempty(prompt: str) -> str:
             return s
         print("⚠️  No puede estar vacío.")
 
-def input_float(prompt: str, min_value: Optional[float] = None) -> float:
+def input_dinero(prompt: str) -> int:
+    """Lee un monto no negativo y lo retorna en centavos."""
     while True:
-        s = input(prompt).strip().replace(",", ".")
         try:
-            v = float(s)
-            if min_value is not None and v < min_value:
-                print(f"⚠️  Debe ser un número >= {min_value}.")
-                continue
-            return v
+            v = a_centavos(input(prompt))
         except ValueError:
-            print("⚠️  Ingrese un número válido.")
+            print("⚠️  Ingrese un monto válido (ej. 12000 o 12000,50).")
+            continue
+        if v < 0:
+            print("⚠️  El monto debe ser >= 0.")
+            continue
+        return v
 
 def input_int(prompt: str, min_value: Optional[int] = None) -> int:
     while True:
@@ -129,89 +1631,205 @@ def input_int(prompt: str, min_value: Optional[int] = None) -> int:
         except ValueError:
             print("⚠️  Ingrese un entero válido.")
 
+def crear_funcion(pelicula: str, hora: str, precio_centavos: int, capacidad: int = 0, codigo: str = "") -> str:
+    """Valida y registra una función con su precio en centavos. Retorna el código asignado."""
+    pelicula, hora, codigo = pelicula.strip(), hora.strip(), codigo.strip().upper()
+    if not pelicula or not hora:
+        raise ValueError("Película y hora no pueden estar vacías.")
+    if precio_centavos < 0 or capacidad < 0:
+        raise ValueError("Precio y capacidad deben ser >= 0.")
+    storage = get_storage()
+    if not codigo:
+        codigo = siguiente_codigo()
+    elif storage.obtener_funcion(codigo) is not None:
+        raise ValueError(f"Ya existe una función con el código {codigo}.")
+    save_funcion(codigo, pelicula, hora, precio_centavos, capacidad)
+    return codigo
+
+def registrar_venta(codigo: str, cantidad: int, fecha_hora: Optional[str] = None) -> Dict:
+    """
+    Vende `cantidad` boletos de una función, asignando asientos si tiene
+    capacidad. Retorna {codigo, cantidad, total_centavos, asientos}.
+    """
+    funcion = get_storage().obtener_funcion(codigo)
+    if funcion is None:
+        raise ValueError(f"La función {codigo} no existe.")
+    if cantidad < 1:
+        raise ValueError("La cantidad debe ser >= 1.")
+    try:
+        precio = a_centavos(funcion["precio"])
+    except ValueError:
+        raise ValueError("Precio inválido en la función. Corrija el registro.") from None
+
+    asientos: List[int] = []
+    capacidad = capacidad_de(funcion)
+    if capacidad:
+        crear_mapa_asientos(codigo, capacidad)  # funciones creadas en otra terminal o migradas
+        asientos = vender_asientos(codigo, cantidad)
+
+    total = precio * cantidad
+    try:
+        save_venta(codigo, cantidad, total, fecha_hora)
+    except Exception:
+        if asientos:
+            devolver_asientos(codigo, asientos)
+        raise
+    return {"codigo": codigo, "cantidad": cantidad, "total_centavos": total, "asientos": asientos}
+
+def listado_funciones(pelicula: Optional[str] = None, hora: Optional[str] = None) -> List[Dict]:
+    """Funciones ordenadas por código, opcionalmente filtradas por película y hora."""
+    storage = get_storage()
+    funciones = storage.funciones()
+    codigos = set(funciones)
+    if isinstance(storage, CSVStorage):
+        repo = get_funciones_repo()
+        if pelicula:
+            codigos &= set(repo.buscar_por_pelicula(pelicula))
+        if hora:
+            codigos &= set(repo.buscar_por_hora(hora))
+    else:
+        if pelicula:
+            codigos = {c for c in codigos if funciones[c]["pelicula"].casefold() == pelicula.strip().casefold()}
+        if hora:
+            codigos = {c for c in codigos if funciones[c]["hora"] == hora.strip()}
+    listado = []
+    for codigo in sorted(codigos, key=clave_codigo):
+        data = funciones[codigo]
+        listado.append({
+            "codigo": codigo,
+            **data,
+            "disponibles": asientos_disponibles(codigo) if capacidad_de(data) else None,
+        })
+    return listado
+
 def registrar_funcion():
-    funciones = load_funciones()
     print("\n== Registrar nueva función ==")
     pelicula = input_nonempty("Película: ")
     hora = input_nonempty("Hora (ej. 18:30): ")
-    precio = input_float("Precio del boleto: ", min_value=0.0)
+    precio = input_dinero("Precio del boleto: ")
+    capacidad = input_int("Capacidad de la sala (0 = sin límite): ", min_value=0)
 
     # código: usuario puede ingresar o autogenerar
     codigo = input("Código (deje vacío para autogenerar): ").strip().upper()
+    try:
+        asignado = crear_funcion(pelicula, hora, precio, capacidad, codigo)
+    except ValueError as e:
+        print(f"❌ {e} Operación cancelada.")
+        return
     if not codigo:
-        codigo = generate_next_code(list(funciones.keys()))
-        print(f"→ Código generado: {codigo}")
-    else:
-        if codigo in funciones:
-            print("❌ Ya existe una función con ese código. Operación cancelada.")
-            return
-
-    save_funcion(codigo, pelicula, hora, precio)
-    print(f"✅ Función '{pelicula}' registrada con código {codigo}.")
+        print(f"→ Código generado: {asignado}")
+    print(f"✅ Función '{pelicula}' registrada con código {asignado}.")
 
 def listar_funciones():
-    funciones = load_funciones()
+    funciones = listado_funciones()
     print("\n== Funciones disponibles ==")
     if not funciones:
         print("(no hay funciones registradas)")
         return
     # Encabezado
-    print(f"{'CÓDIGO':<8}  {'PELÍCULA':<30}  {'HORA':<8}  {'PRECIO':>8}")
-    print("-" * 62)
-    for codigo, data in sorted(funciones.items()):
+    print(f"{'CÓDIGO':<8}  {'PELÍCULA':<30}  {'HORA':<8}  {'PRECIO':>11}  {'LIBRES':>7}")
+    print("-" * 74)
+    for data in funciones:
         pelicula = (data['pelicula'][:27] + '...') if len(data['pelicula']) > 30 else data['pelicula']
         hora = data['hora']
         try:
-            precio = float(data['precio'])
+            precio = a_centavos(data['precio'])
         except ValueError:
-            precio = 0.0
-        print(f"{codigo:<8}  {pelicula:<30}  {hora:<8}  ${int(precio):,}".replace(",", "."))
+            precio = 0
+        libres = data["disponibles"]
+        libres_txt = "-" if libres is None else ("AGOTADA" if libres == 0 else str(libres))
+        print(f"{data['codigo']:<8}  {pelicula:<30}  {hora:<8}  {formatear_dinero(precio):>11}  {libres_txt:>7}")
 
 def vender_boletos():
-    funciones = load_funciones()
-    if not funciones:
+    storage = get_storage()
+    if not storage.funciones():
         print("\n❌ No hay funciones registradas. Registre una primero.")
         return
 
     print("\n== Vender boletos ==")
     codigo = input_nonempty("Código de la función: ").upper()
-    if codigo not in funciones:
+    funcion = storage.obtener_funcion(codigo)
+    if funcion is None:
         print("❌ La función no existe. Verifique el código.")
         return
 
-    cantidad = input_int("Cantidad de boletos: ", min_value=1)
+    capacidad = capacidad_de(funcion)
+    if capacidad:
+        crear_mapa_asientos(codigo, capacidad)
+        disponibles = asientos_disponibles(codigo)
+        if not disponibles:
+            print("❌ Función agotada.")
+            return
+        print(f"Asientos disponibles: {disponibles}")
 
+    cantidad = input_int("Cantidad de boletos: ", min_value=1)
     try:
-        precio = float(funciones[codigo]["precio"])
-    except ValueError:
-        print("❌ Precio inválido en la función. Corrija el registro.")
+        venta = registrar_venta(codigo, cantidad)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
 
-    total = precio * cantidad
-    print(f"Total a pagar: ${int(total):,}".replace(",", "."))
-    save_venta(codigo, cantidad, total)
+    print(f"Total a pagar: {formatear_dinero(venta['total_centavos'])}")
+    if venta["asientos"]:
+        print(f"Asientos: {', '.join(map(str, venta['asientos']))}")
     print("✅ Venta registrada.")
 
 def resumen_ventas_del_dia():
     print("\n== Resumen de ventas del día ==")
     hoy = date.today()
-    ventas = load_ventas_del_dia(hoy)
-    if not ventas:
+    resumen = resumen_del_dia(hoy)
+    if not resumen["boletos"] and not resumen["por_funcion"]:
         print("No hay ventas registradas para hoy.")
         return
 
-    total_boletos = 0
-    total_dinero = 0.0
-    for v in ventas:
+    print(f"Fecha: {hoy.isoformat()}")
+    print(f"Boletos vendidos: {resumen['boletos']}")
+    print(f"Dinero recaudado: {formatear_dinero(resumen['total_centavos'])}")
+
+    print("\nPor función:")
+    for codigo, g in sorted(resumen["por_funcion"].items()):
+        print(f"  {codigo:<8}  {g['boletos']:>6} boletos  {formatear_dinero(g['total_centavos'])}")
+    print("\nPor hora:")
+    for hora, g in sorted(resumen["por_hora"].items()):
+        print(f"  {hora}:00     {g['boletos']:>6} boletos  {formatear_dinero(g['total_centavos'])}")
+
+def input_fecha(prompt: str, defecto: date) -> date:
+    while True:
+        s = input(prompt).strip()
+        if not s:
+            return defecto
         try:
-            total_boletos += int(v["cantidad"])
-            total_dinero += float(v["total"])
+            return date.fromisoformat(s)
         except ValueError:
-            continue
+            print("⚠️  Use el formato AAAA-MM-DD.")
 
-    print(f"Fecha: {hoy.isoformat()}")
-    print(f"Boletos vendidos: {total_boletos}")
-    print(f"Dinero recaudado: ${int(total_dinero):,}".replace(",", "."))
+def ventas_por_rango():
+    print("\n== Ventas por rango de fechas ==")
+    hoy = date.today()
+    desde = input_fecha("Desde (AAAA-MM-DD, vacío = hace 7 días): ", hoy - timedelta(days=6))
+    hasta = input_fecha("Hasta (AAAA-MM-DD, vacío = hoy): ", hoy)
+    if hasta < desde:
+        print("❌ La fecha final es anterior a la inicial.")
+        return
+    r = analisis_rango(desde, hasta)
+    if not r["boletos"] and not r["por_dia"]:
+        print("No hay ventas en ese rango.")
+        return
+
+    print(f"Del {r['desde']} al {r['hasta']}: {r['boletos']} boletos, {formatear_dinero(r['total_centavos'])}")
+    for titulo, grupo in (("Por día", "por_dia"), ("Por función", "por_funcion"), ("Por película", "por_pelicula")):
+        print(f"\n{titulo}:")
+        for clave, g in r[grupo].items():
+            etiqueta = (clave[:27] + "...") if len(clave) > 30 else clave
+            print(f"  {etiqueta:<30}  {g['boletos']:>7} boletos  {formatear_dinero(g['total_centavos'])}")
+
+def reconstruir_resumen():
+    print("\n== Reconstruir resumen de ventas ==")
+    if get_storage().nombre != "csv":
+        print("El backend SQLite calcula el resumen con consultas indexadas; no hay nada que reconstruir.")
+        return
+    rebuild_resumen_ventas()
+    print("✅ Resumen reconstruido desde ventas.csv.")
 
 # ------------------------- Interfaz de usuario -------------------------
 
@@ -222,12 +1840,14 @@ def menu():
         "2": ("Listar funciones", listar_funciones),
         "3": ("Vender boletos", vender_boletos),
         "4": ("Resumen de ventas del día", resumen_ventas_del_dia),
+        "5": ("Reconstruir resumen de ventas", reconstruir_resumen),
+        "6": ("Ventas por rango de fechas", ventas_por_rango),
         "0": ("Salir", None),
     }
 
     while True:
         print("\n====== TaquillaCLI ======")
-        for k in ["1", "2", "3", "4", "0"]:
+        for k in ["1", "2", "3", "4", "5", "6", "0"]:
             print(f"{k}. {opciones[k][0]}")
         op = input("Seleccione una opción: ").strip()
 
@@ -242,5 +1862,230 @@ def menu():
         else:
             print("Opción inválida. Intente de nuevo.")
 
+# ------------------------- Modo por lotes y servidor -------------------------
+
+def _leer_registros(path: str):
+    """Itera (número de línea, dict) de un .csv con encabezado o de un .jsonl."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".jsonl"):
+            for n, linea in enumerate(f, start=1):
+                if linea.strip():
+                    yield n, json.loads(linea)
+        else:
+            for n, row in enumerate(csv.DictReader(f), start=2):
+                yield n, row
+
+def importar_funciones(path: str) -> Dict:
+    """Registra en bloque las funciones de un CSV o JSONL (pelicula, hora, precio[, capacidad][, codigo])."""
+    importadas: List[str] = []
+    errores: List[Dict] = []
+    for n, reg in _leer_registros(path):
+        try:
+            importadas.append(crear_funcion(
+                str(reg.get("pelicula") or ""),
+                str(reg.get("hora") or ""),
+                a_centavos(str(reg.get("precio") or "")),
+                int(reg.get("capacidad") or 0),
+                str(reg.get("codigo") or ""),
+            ))
+        except (TypeError, ValueError) as e:
+            errores.append({"linea": n, "error": str(e)})
+    return {"importadas": len(importadas), "codigos": importadas, "errores": errores}
+
+def replay_ventas(path: str) -> Dict:
+    """
+    Vuelve a registrar las ventas de un CSV o JSONL (codigo_funcion o codigo,
+    cantidad y opcionalmente fecha_hora para conservar la hora original).
+    """
+    vendidas, boletos, total = 0, 0, 0
+    errores: List[Dict] = []
+    for n, reg in _leer_registros(path):
+        try:
+            venta = registrar_venta(
+                str(reg.get("codigo_funcion") or reg.get("codigo") or "").upper(),
+                int(reg.get("cantidad") or 0),
+                reg.get("fecha_hora") or None,
+            )
+        except (TypeError, ValueError) as e:
+            errores.append({"linea": n, "error": str(e)})
+            continue
+        vendidas += 1
+        boletos += venta["cantidad"]
+        total += venta["total_centavos"]
+    get_storage().flush()
+    return {"ventas": vendidas, "boletos": boletos, "total_centavos": total, "errores": errores}
+
+def reporte_json(dia: date) -> Dict:
+    resumen = resumen_del_dia(dia)
+    resumen.pop("offset", None)
+    return {"fecha": dia.isoformat(), **resumen}
+
+class MovieTimeHandler(BaseHTTPRequestHandler):
+    """
+    API HTTP/JSON local para las terminales de venta:
+
+      GET  /funciones[?pelicula=&hora=]
+      POST /funciones  {"pelicula", "hora", "precio", "capacidad"?, "codigo"?}
+      POST /ventas     {"codigo", "cantidad"}
+      GET  /resumen[?fecha=AAAA-MM-DD]
+
+    Los hilos del servidor comparten un solo backend, así que cada petición
+    lo usa bajo `lock`.
+    """
+
+    server_version = "MovieTime/1.0"
+    lock = threading.Lock()
+
+    def _responder(self, status: int, data):
+        cuerpo = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _cuerpo(self) -> Dict:
+        largo = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(largo) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Se esperaba un objeto JSON.")
+        return data
+
+    def _atender(self, fn):
+        try:
+            with self.lock:
+                status, data = fn()
+        except AsientosInsuficientes as e:
+            status, data = 409, {"error": str(e), "disponibles": e.disponibles}
+        except (TypeError, ValueError) as e:
+            status, data = 400, {"error": str(e)}
+        self._responder(status, data)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/funciones":
+            self._atender(lambda: (200, listado_funciones(params.get("pelicula"), params.get("hora"))))
+        elif url.path == "/resumen":
+            self._atender(lambda: (200, reporte_json(
+                date.fromisoformat(params["fecha"]) if "fecha" in params else date.today())))
+        else:
+            self._responder(404, {"error": "Ruta no encontrada."})
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/funciones":
+            def alta():
+                d = self._cuerpo()
+                codigo = crear_funcion(str(d.get("pelicula") or ""), str(d.get("hora") or ""),
+                                       a_centavos(str(d.get("precio", ""))), int(d.get("capacidad") or 0),
+                                       str(d.get("codigo") or ""))
+                return 201, {"codigo": codigo}
+            self._atender(alta)
+        elif url.path == "/ventas":
+            def venta():
+                d = self._cuerpo()
+                return 201, registrar_venta(str(d.get("codigo") or "").upper(), int(d.get("cantidad") or 0))
+            self._atender(venta)
+        else:
+            self._responder(404, {"error": "Ruta no encontrada."})
+
+def servir(host: str, port: int):
+    servidor = ThreadingHTTPServer((host, port), MovieTimeHandler)
+    print(f"MovieTime escuchando en http://{host}:{servidor.server_port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        get_storage().close()
+
+def main(argv: Optional[List[str]] = None):
+    global STORAGE, SQLITE_DB, FSYNC_POLICY, TERMINAL
+    parser = argparse.ArgumentParser(description="MovieTime - venta de boletos.")
+    parser.add_argument("--storage", choices=["csv", "sqlite"], default=STORAGE,
+                        help="Backend de almacenamiento (por defecto MOVIETIME_STORAGE o csv).")
+    parser.add_argument("--db", default=SQLITE_DB, help="Ruta de la base SQLite.")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default=FSYNC_POLICY,
+                        help="Cuándo forzar a disco las ventas (backend CSV).")
+    parser.add_argument("--terminal", default=TERMINAL,
+                        help="Identificador de la terminal; cada una usa su propio diario de ventas.")
+    sub = parser.add_subparsers(dest="comando")
+    p_migrar = sub.add_parser("migrar-sqlite", help="Copia los CSV a una base SQLite nueva.")
+    p_migrar.add_argument("destino", nargs="?", help="Ruta de la base (por defecto --db).")
+    p_bench = sub.add_parser("bench-storage", help="Compara los backends CSV y SQLite.")
+    p_bench.add_argument("--ventas", type=int, default=1_000_000)
+    p_bench.add_argument("--dias", type=int, default=30)
+    p_bench_ventas = sub.add_parser("bench-ventas", help="Mide el ciclo de venta directo vs. por lotes.")
+    p_bench_ventas.add_argument("--ventas", type=int, default=100_000)
+    p_importar = sub.add_parser("importar-funciones", help="Registra funciones desde un CSV o JSONL.")
+    p_importar.add_argument("archivo")
+    p_replay = sub.add_parser("replay-ventas", help="Registra ventas desde un CSV o JSONL.")
+    p_replay.add_argument("archivo")
+    p_reporte = sub.add_parser("reporte", help="Resumen de ventas de un día en JSON.")
+    p_reporte.add_argument("--fecha", type=date.fromisoformat, default=None, help="AAAA-MM-DD (por defecto hoy).")
+    p_rango = sub.add_parser("rango", help="Totales por día, función y película en un rango, en JSON.")
+    p_rango.add_argument("--desde", type=date.fromisoformat, required=True, help="AAAA-MM-DD")
+    p_rango.add_argument("--hasta", type=date.fromisoformat, default=None, help="AAAA-MM-DD (por defecto hoy).")
+    p_rango.add_argument("--procesos", type=int, default=0,
+                         help="Procesos para partir ventas.csv en trozos (archivos muy grandes).")
+    p_rango.add_argument("--bin", action="store_true", help="Usa el registro binario ventas.bin.")
+    p_csv_bin = sub.add_parser("csv-a-bin", help="Sincroniza ventas.bin con ventas.csv.")
+    p_csv_bin.add_argument("--salida", default=VENTAS_BIN)
+    p_bin_csv = sub.add_parser("bin-a-csv", help="Reconstruye un CSV de ventas desde el registro binario.")
+    p_bin_csv.add_argument("entrada")
+    p_bin_csv.add_argument("salida")
+    p_bench_bin = sub.add_parser("bench-bin", help="Compara el análisis por rango sobre CSV y binario.")
+    p_bench_bin.add_argument("--ventas", type=int, default=1_000_000)
+    p_renumerar = sub.add_parser("renumerar-codigos", help="Ensancha los códigos FUN### existentes.")
+    p_renumerar.add_argument("--ancho", type=int, required=True)
+    p_serve = sub.add_parser("serve", help="Servidor HTTP/JSON local para terminales de venta.")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    STORAGE, SQLITE_DB = args.storage, args.db
+    FSYNC_POLICY, TERMINAL = args.fsync, args.terminal
+
+    if args.comando == "migrar-sqlite":
+        destino = args.destino or SQLITE_DB
+        n_funciones, n_ventas = migrar_csv_a_sqlite(destino)
+        print(f"✅ {n_funciones} funciones y {n_ventas} ventas migradas a {destino}.")
+    elif args.comando == "bench-storage":
+        resultados = benchmark_storage(args.ventas, args.dias)
+        print(f"{'OPERACIÓN':<22}{'CSV (s)':>12}{'SQLITE (s)':>12}")
+        for op in resultados["csv"]:
+            print(f"{op:<22}{resultados['csv'][op]:>12.6f}{resultados['sqlite'][op]:>12.6f}")
+    elif args.comando == "importar-funciones":
+        print(json.dumps(importar_funciones(args.archivo), ensure_ascii=False, indent=2))
+    elif args.comando == "replay-ventas":
+        print(json.dumps(replay_ventas(args.archivo), ensure_ascii=False, indent=2))
+    elif args.comando == "reporte":
+        print(json.dumps(reporte_json(args.fecha or date.today()), ensure_ascii=False, indent=2))
+    elif args.comando == "rango":
+        resultado = analisis_rango(args.desde, args.hasta or date.today(), args.procesos, args.bin)
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    elif args.comando == "csv-a-bin":
+        print(f"✅ {sincronizar_bin(args.salida)} ventas agregadas a {args.salida}.")
+    elif args.comando == "bin-a-csv":
+        print(f"✅ {bin_a_csv(args.entrada, args.salida)} ventas escritas en {args.salida}.")
+    elif args.comando == "bench-bin":
+        for op, valor in benchmark_bin(args.ventas).items():
+            print(f"{op:<22}{valor:>12.4f}")
+    elif args.comando == "renumerar-codigos":
+        try:
+            mapa = renumerar_codigos(args.ancho)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"✅ {len(mapa)} códigos renumerados; los nuevos usarán {args.ancho} dígitos.")
+    elif args.comando == "serve":
+        servir(args.host, args.port)
+    elif args.comando == "bench-ventas":
+        for modo, por_segundo in benchmark_ventas(args.ventas).items():
+            print(f"{modo:<16}{por_segundo:>14,.0f} ventas/s")
+    else:
+        menu()
+
 if __name__ == "__main__":
-    menu()
+    main()
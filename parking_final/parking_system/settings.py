@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,10 +45,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # archivos estáticos antes de sesiones y autenticación
+    'reservations.middleware.StaticAssetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # no hace nada salvo con PROFILING_ENABLED; va después de la autenticación
+    # para reconocer al staff
+    'reservations.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -119,6 +125,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic agrega un hash al nombre de cada archivo y deja versiones
+# .gz/.br; StaticAssetMiddleware los sirve con caché de un año.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'reservations.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -135,4 +153,21 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
-CRISPY_TEMPLATE_PACK = 'bootstrap4'
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = 'bootstrap4'
+
+# Eventos de talanqueras (reservations/gate.py). Sin token el endpoint
+# rechaza todas las peticiones.
+GATE_API_TOKEN = os.environ.get('GATE_API_TOKEN', '')
+GATE_BATCH_SIZE = 500
+GATE_FLUSH_INTERVAL = 1.0
+
+# Perfilado de peticiones (reservations/profiling.py); ver
+# ProfilingMiddleware para los disparadores y `manage.py profile_report`.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILING_MODE = 'sample'
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_SLOW_MS = None
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_CAPTURES = 200
+PROFILING_MAX_BYTES = 50 * 1024 * 1024
@@ -1,14 +1,151 @@
 from django.contrib import admin
-from .models import ParkingLot, Reservation, Payment
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import GateEvent, Notification, ParkingLot, Reservation, Payment
+from .plates import normalize_plate
+
+# Por debajo de esto el COUNT(*) real es barato y se prefiere al estimado.
+EXACT_COUNT_LIMIT = 10_000
+
+
+def estimate_table_rows(model):
+    """
+    Filas aproximadas de la tabla sin recorrerla, o None si el motor no
+    ofrece un estimado. En SQLite se usa el id más alto (exacto mientras no
+    haya borrados); en PostgreSQL, las estadísticas del planificador.
+    """
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            pk = connection.ops.quote_name(model._meta.pk.column)
+            cursor.execute(f'SELECT MAX({pk}) FROM {connection.ops.quote_name(table)}')
+            row = cursor.fetchone()
+            return row[0] or 0
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            # -1 si la tabla nunca se ha analizado
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador del admin que no cuenta la tabla completa: sin filtros ni
+    búsqueda usa estimate_table_rows(); con filtros el COUNT(*) recorre solo
+    el índice del filtro.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return super().count
+        estimate = estimate_table_rows(self.object_list.model)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # evita el segundo COUNT(*) sobre toda la tabla al filtrar
+    show_full_result_count = False
+
 
 @admin.register(ParkingLot)
 class ParkingLotAdmin(admin.ModelAdmin):
-    list_display = ['name', 'address', 'total_spaces', 'hourly_rate', 'is_active']
+    list_display = ['name', 'address', 'total_spaces', 'current_occupancy', 'hourly_rate', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['name']
+
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(ScalableAdmin):
     list_display = ['id', 'user', 'parking_lot', 'license_plate', 'start_time', 'status']
+    list_select_related = ['user', 'parking_lot']
+    list_filter = ['status', 'parking_lot']
+    raw_id_fields = ['user', 'parking_lot']
+    search_fields = ['plate_key', 'access_code']
+    search_help_text = 'Placa (en cualquier formato), código de acceso o id de la reserva.'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Búsquedas exactas sobre columnas indexadas en lugar de LIKE '%...%'.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(access_code=term)
+        plate_key = normalize_plate(term)
+        if plate_key:
+            condition |= Q(plate_key=plate_key)
+        if term.isdigit():
+            condition |= Q(id=int(term))
+        return queryset.filter(condition), False
+
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ['transaction_id', 'reservation', 'amount', 'status']
\ No newline at end of file
+class PaymentAdmin(ScalableAdmin):
+    list_display = ['transaction_id', 'reservation', 'amount', 'status']
+    # reservation se muestra con su __str__, que lee reservation.user
+    list_select_related = ['reservation__user']
+    list_filter = ['status', 'payment_method']
+    raw_id_fields = ['reservation']
+    search_fields = ['transaction_id']
+    search_help_text = 'Id de transacción exacto o id de la reserva.'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(transaction_id=term)
+        if term.isdigit():
+            condition |= Q(reservation_id=int(term))
+        return queryset.filter(condition), False
+
+
+@admin.register(GateEvent)
+class GateEventAdmin(ScalableAdmin):
+    list_display = ['occurred_at', 'parking_lot', 'direction', 'license_plate', 'reservation_id']
+    list_select_related = ['parking_lot']
+    list_filter = ['direction', 'parking_lot']
+    raw_id_fields = ['parking_lot', 'reservation']
+    search_fields = ['plate_key']
+    search_help_text = 'Placa (en cualquier formato) o id de la reserva.'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(plate_key=normalize_plate(term))
+        if term.isdigit():
+            condition |= Q(reservation_id=int(term))
+        return queryset.filter(condition), False
+
+
+@admin.register(Notification)
+class NotificationAdmin(ScalableAdmin):
+    list_display = ['created_at', 'user', 'kind', 'reservation_id', 'read_at']
+    list_select_related = ['user']
+    list_filter = ['kind']
+    raw_id_fields = ['user', 'reservation']
+    search_fields = ['reservation__id']
+    search_help_text = 'Id de la reserva.'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if not term.isdigit():
+            return queryset.none(), False
+        return queryset.filter(reservation_id=int(term)), False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReservationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reservations'
+
+    def ready(self):
+        # registra las señales del índice de cercanía y del planificador
+        from . import geo, scheduler  # noqa: F401
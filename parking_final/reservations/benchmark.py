@@ -0,0 +1,223 @@
+"""
+Harness de carga para el flujo registro → reserva → pago → QR.
+
+Crea una base SQLite temporal, la llena con datos de prueba a la escala
+pedida y recorre las vistas con el cliente de pruebas de Django desde
+varios hilos a la vez. El reporte (peticiones/s, latencias p50/p95/p99 y
+consultas por petición) se puede guardar como línea base en JSON y
+compararse contra ella para detectar regresiones.
+"""
+
+import json
+import os
+import random
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .datagen import generate
+
+# Escalas del benchmark; generate_data tiene además las suyas (datagen.SCALES)
+SCALES = {
+    'small': {'lots': 10, 'users': 50, 'reservations': 1_000},
+    'medium': {'lots': 100, 'users': 1_000, 'reservations': 20_000},
+    'large': {'lots': 500, 'users': 10_000, 'reservations': 200_000},
+}
+
+STEPS = ['register', 'parking_list', 'reserve', 'payment', 'qr_code']
+
+
+def seed_data(scale, seed=0):
+    """Llena la base activa con parqueaderos, usuarios y reservas históricas (ver datagen.py)."""
+    sizes = SCALES[scale]
+    # solo historia: las reservas futuras cambiarían la disponibilidad que mide el flujo
+    return generate(**sizes, seed=seed, future_share=0)['lot_ids']
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class FlowRunner:
+    """Ejecuta el flujo completo desde varios hilos y acumula las mediciones."""
+
+    def __init__(self, lot_ids, workers, iterations):
+        self.lot_ids = lot_ids
+        self.workers = workers
+        self.iterations = iterations
+        self.samples = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+        self._lock = threading.Lock()
+
+    def _request(self, step, method, client, path, data=None):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as ctx:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data or {})
+            elapsed = time.perf_counter() - started
+        with self._lock:
+            self.samples[step].append((elapsed, len(ctx.captured_queries)))
+            if response.status_code >= 400:
+                self.errors[step] += 1
+        return response
+
+    def _flow(self, client, worker, iteration):
+        rnd = random.Random(f"{worker}-{iteration}")
+        username = f"bench{worker}x{iteration}x{secrets.token_hex(3)}"
+        password = f"Clave-{secrets.token_hex(8)}"
+        self._request('register', 'post', client, reverse('register'), {
+            'username': username,
+            'email': f"{username}@example.com",
+            'password1': password,
+            'password2': password,
+        })
+        self._request('parking_list', 'get', client, reverse('parking_list'))
+
+        lot_id = rnd.choice(self.lot_ids)
+        start = timezone.localtime() + timedelta(days=1, hours=rnd.randint(0, 72))
+        end = start + timedelta(hours=rnd.randint(1, 4))
+        response = self._request('reserve', 'post', client, reverse('create_reservation', args=[lot_id]), {
+            'parking_lot': lot_id,
+            'license_plate': f"BEN{rnd.randint(100, 999)}",
+            'start_time': start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': end.strftime('%Y-%m-%dT%H:%M'),
+        })
+        if response.status_code != 302:
+            return
+        match = resolve(response['Location'])
+        if match.url_name != 'payment':
+            return
+        reservation_id = match.kwargs['reservation_id']
+
+        self._request('payment', 'post', client, reverse('payment', args=[reservation_id]), {
+            'payment_method': 'digital_wallet',
+            'wallet_token': secrets.token_hex(8),
+        })
+        self._request('qr_code', 'get', client, reverse('qr_code', args=[reservation_id]))
+
+    def _worker(self, worker):
+        client = Client(raise_request_exception=False)
+        try:
+            for iteration in range(self.iterations):
+                client.logout()
+                self._flow(client, worker, iteration)
+        finally:
+            connections.close_all()
+
+    def run(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self._worker, range(self.workers)))
+        return time.perf_counter() - started
+
+    def report(self, wall_time):
+        steps = {}
+        total_requests = 0
+        for step in STEPS:
+            latencies = sorted(s[0] for s in self.samples[step])
+            queries = [s[1] for s in self.samples[step]]
+            total_requests += len(latencies)
+            steps[step] = {
+                'requests': len(latencies),
+                'errors': self.errors[step],
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0,
+            }
+        return {
+            'workers': self.workers,
+            'iterations': self.iterations,
+            'wall_time_s': round(wall_time, 3),
+            'requests': total_requests,
+            'requests_per_s': round(total_requests / wall_time, 2) if wall_time else 0,
+            'steps': steps,
+        }
+
+
+def run_benchmark(scale='small', workers=4, iterations=5, seed=0, fast_hashers=False):
+    """
+    Crea una base SQLite temporal, siembra la escala indicada y mide el flujo.
+    La base original nunca se toca.
+    """
+    tmpdir = tempfile.mkdtemp(prefix='parking-bench-')
+    db_settings = settings.DATABASES[DEFAULT_DB_ALIAS]
+    old_test = db_settings.get('TEST', {}).copy()
+    old_name = db_settings['NAME']
+    db_settings.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+
+    setup_test_environment()
+    hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if fast_hashers else settings.PASSWORD_HASHERS
+    try:
+        with override_settings(PASSWORD_HASHERS=hashers):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode=WAL')
+                seeded_at = time.perf_counter()
+                lot_ids = seed_data(scale, seed=seed)
+                seed_time = time.perf_counter() - seeded_at
+
+                runner = FlowRunner(lot_ids, workers, iterations)
+                result = runner.report(runner.run())
+                result.update({'scale': scale, 'seed_time_s': round(seed_time, 3)})
+                return result
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        teardown_test_environment()
+        db_settings['TEST'] = old_test
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def compare_to_baseline(result, baseline, tolerance):
+    """Devuelve la lista de regresiones frente a la línea base."""
+    regressions = []
+    floor = baseline['requests_per_s'] * (1 - tolerance)
+    if result['requests_per_s'] < floor:
+        regressions.append(
+            f"peticiones/s {result['requests_per_s']} < {baseline['requests_per_s']} (-{tolerance:.0%})"
+        )
+    for step, base in baseline['steps'].items():
+        current = result['steps'].get(step)
+        if current is None:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{step}: p95 {current['p95_ms']}ms > {base['p95_ms']}ms (+{tolerance:.0%})")
+        if current['queries_per_request'] > base['queries_per_request']:
+            regressions.append(
+                f"{step}: consultas/petición {current['queries_per_request']} > {base['queries_per_request']}"
+            )
+        if current['errors'] > base['errors']:
+            regressions.append(f"{step}: errores {current['errors']} > {base['errors']}")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
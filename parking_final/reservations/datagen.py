@@ -0,0 +1,360 @@
+"""
+Generador de datos de prueba y de benchmark.
+
+Produce parqueaderos, usuarios, reservas y pagos deterministas: la misma
+semilla y la misma hora base dan las mismas filas. No pasa por
+Reservation.save(); el código de acceso, el QR, el total, la clave de placa
+y next_due_at se calculan aquí con las mismas reglas del modelo, y las
+filas se insertan por tandas con ids asignados de antemano para enlazar
+reservas y pagos sin releer la base.
+
+En SQLite las tandas van directo a sqlite3 con executemany (sin crear
+objetos del ORM), con PRAGMA synchronous=OFF y una caché grande mientras
+dura la carga, y los índices secundarios se reconstruyen al final cuando la
+carga es mayor que la tabla; es unas ocho veces más rápido que bulk_create.
+En otros motores se usa bulk_create, que además pone created_at con la hora
+de inserción (auto_now_add).
+"""
+
+import base64
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils import timezone
+
+from .models import (
+    OVERSTAY_GRACE,
+    REMINDER_BEFORE,
+    UNPAID_HOLD,
+    ParkingLot,
+    Payment,
+    Reservation,
+)
+
+SCALES = {
+    'small': {'lots': 10, 'users': 50, 'reservations': 1_000},
+    'medium': {'lots': 100, 'users': 1_000, 'reservations': 20_000},
+    'large': {'lots': 500, 'users': 10_000, 'reservations': 200_000},
+    'huge': {'lots': 100_000, 'users': 100_000, 'reservations': 1_000_000},
+}
+
+CHUNK_SIZE = 20_000
+# caché de páginas de SQLite durante la carga, en KiB
+CACHE_KIB = 512 * 1024
+# Centro de la ciudad y dispersión en grados de las coordenadas generadas
+CENTER = (4.65, -74.08)
+SPREAD = 0.25
+HISTORY_HOURS = 24 * 90
+FUTURE_HOURS = 24 * 14
+HOURLY_RATES = [Decimal(r) for r in ('2000.00', '2500.00', '3000.00', '4000.00')]
+PAYMENT_METHODS = [code for code, _ in Reservation.PAYMENT_METHODS]
+
+
+class RowWriter:
+    """Inserta tuplas en el orden de `fields` por tandas, con sqlite3 o con bulk_create."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, fast=True, chunk_size=CHUNK_SIZE):
+        self.connection = connections[using]
+        self.using = using
+        self.fast = fast and self.connection.vendor == 'sqlite'
+        self.chunk_size = chunk_size
+
+    def next_id(self, model):
+        return (model.objects.using(self.using).aggregate(m=models.Max('pk'))['m'] or 0) + 1
+
+    def _converters(self, model, fields):
+        ops = self.connection.ops
+        converters = []
+        for name in fields:
+            field = model._meta.get_field(name)
+            cache = {}
+            if isinstance(field, models.DateTimeField):
+                def convert(value, cache=cache):
+                    if value is None:
+                        return None
+                    result = cache.get(value)
+                    if result is None:
+                        result = cache[value] = ops.adapt_datetimefield_value(value)
+                    return result
+            elif isinstance(field, models.DecimalField):
+                def convert(value, cache=cache, field=field):
+                    if value is None:
+                        return None
+                    result = cache.get(value)
+                    if result is None:
+                        result = cache[value] = ops.adapt_decimalfield_value(value, field.max_digits, field.decimal_places)
+                    return result
+            elif isinstance(field, models.BooleanField):
+                convert = int
+            else:
+                convert = None
+            converters.append(convert)
+        return converters
+
+    def write(self, model, fields, rows, count=None):
+        """Inserta todas las filas; retorna cuántas. `count` es cuántas se esperan, si se sabe."""
+        # sin default en la base, una columna omitida rompería la ruta rápida
+        missing = {f.attname for f in model._meta.concrete_fields} - {model._meta.get_field(f).attname for f in fields}
+        if missing:
+            raise ValueError(f"Faltan columnas de {model.__name__}: {sorted(missing)}")
+        if self.fast:
+            return self._write_sqlite(model, fields, rows, count)
+        return self._write_orm(model, fields, rows)
+
+    def _write_sqlite(self, model, fields, rows, count):
+        quote = self.connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ', '.join(quote(model._meta.get_field(f).column) for f in fields)
+        sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(fields))})"
+        converters = list(enumerate(self._converters(model, fields)))
+        converters = [(i, c) for i, c in converters if c is not None]
+        self.connection.ensure_connection()
+        cursor = self.connection.connection.cursor()
+        # Si la carga es al menos tan grande como la tabla, sale más barato
+        # quitar los índices secundarios y crearlos de nuevo al final (con un
+        # ordenamiento) que mantenerlos fila por fila. Los UNIQUE se quedan.
+        indexes = []
+        if count and count >= cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]:
+            indexes = cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                [model._meta.db_table],
+            ).fetchall()
+            for name, _ in indexes:
+                cursor.execute(f"DROP INDEX {quote(name)}")
+        total = 0
+        batch = []
+        try:
+            for row in rows:
+                if converters:
+                    row = list(row)
+                    for i, convert in converters:
+                        row[i] = convert(row[i])
+                batch.append(row)
+                if len(batch) >= self.chunk_size:
+                    cursor.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+            for _, index_sql in indexes:
+                cursor.execute(index_sql)
+        finally:
+            cursor.close()
+        return total
+
+    def _write_orm(self, model, fields, rows):
+        manager = model.objects.using(self.using)
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(model(**dict(zip(fields, row))))
+            if len(batch) >= self.chunk_size:
+                manager.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            manager.bulk_create(batch)
+            total += len(batch)
+        return total
+
+    def reset_sequences(self, model_list):
+        # con ids explícitos, PostgreSQL y Oracle deben avanzar sus secuencias
+        statements = self.connection.ops.sequence_reset_sql(no_style(), model_list)
+        if statements:
+            with self.connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def access_code(rnd):
+    """Como secrets.token_urlsafe(32), pero a partir del generador con semilla."""
+    return base64.urlsafe_b64encode(rnd.randbytes(32)).rstrip(b'=').decode()
+
+
+def plate_prefixes():
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    return [a + b + c for a in letters for b in letters for c in letters]
+
+
+def lot_rows(rnd, first_id, count):
+    for lot_id in range(first_id, first_id + count):
+        yield (
+            lot_id,
+            f"Parqueadero {lot_id}",
+            f"Calle {rnd.randint(1, 200)} # {rnd.randint(1, 99)}-{rnd.randint(1, 99)}",
+            rnd.randint(50, 300),
+            rnd.choice(HOURLY_RATES),
+            True,
+            0,
+            Decimal(f"{CENTER[0] + rnd.uniform(-SPREAD, SPREAD):.6f}"),
+            Decimal(f"{CENTER[1] + rnd.uniform(-SPREAD, SPREAD):.6f}"),
+        )
+
+
+LOT_FIELDS = [
+    'id', 'name', 'address', 'total_spaces', 'hourly_rate', 'is_active',
+    'current_occupancy', 'latitude', 'longitude',
+]
+
+USER_FIELDS = [
+    'id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+    'email', 'is_staff', 'is_active', 'date_joined',
+]
+
+RESERVATION_FIELDS = [
+    'id', 'user_id', 'parking_lot_id', 'license_plate', 'plate_key', 'start_time', 'end_time',
+    'status', 'total_amount', 'payment_method', 'qr_code_data', 'access_code', 'created_at',
+    'updated_at', 'next_due_at', 'last_gate_direction',
+]
+
+PAYMENT_FIELDS = ['id', 'reservation_id', 'amount', 'payment_method', 'transaction_id', 'status', 'created_at']
+
+
+def user_rows(first_id, count, joined):
+    # Los usuarios generados no inician sesión: basta un hash inutilizable.
+    password = make_password(None)
+    for user_id in range(first_id, first_id + count):
+        yield (user_id, password, None, False, f"gen{user_id}", '', '', f"gen{user_id}@example.com",
+               False, True, joined)
+
+
+def reservation_rows(rnd, first_id, count, lots, user_ids, base, future_share, payments):
+    """
+    Reservas con ids desde `first_id`. Las pasadas quedan completadas o
+    canceladas; una fracción `future_share` son futuras (confirmadas y
+    algunas pendientes de pago). Agrega a `payments` (reservation_id, monto,
+    método, created_at) de las que tienen pago.
+
+    Es el ciclo caliente de la generación: cada fila sale de un solo número
+    aleatorio grande que se va dividiendo, en lugar de una docena de
+    llamadas a choice()/randint(); las fechas, montos y prefijos de placa
+    vienen de tablas precalculadas.
+    """
+    hours = [base + timedelta(hours=h) for h in range(-HISTORY_HOURS - 80, FUTURE_HOURS + 10)]
+    zero = HISTORY_HOURS + 80
+    rates = {rate for _, rate in lots}
+    totals = {(rate, h): (rate * h).quantize(Decimal('0.01')) for rate in rates for h in range(1, 7)}
+    prefixes = plate_prefixes()
+    paid_at = timedelta(minutes=5)
+    n_lots, n_users, n_methods = len(lots), len(user_ids), len(PAYMENT_METHODS)
+    future_cut = round(future_share * 10_000)
+    pending_cut = future_cut // 10
+    cancelled_cut = future_cut + (10_000 - future_cut) // 10
+    getrandbits = rnd.getrandbits
+    for reservation_id in range(first_id, first_id + count):
+        r = getrandbits(192)
+        r, pick = divmod(r, n_lots)
+        lot_id, rate = lots[pick]
+        r, pick = divmod(r, n_users)
+        user_id = user_ids[pick]
+        r, duration = divmod(r, 6)
+        duration += 1
+        r, kind = divmod(r, 10_000)
+        r, lead = divmod(r, 72)
+        if kind >= future_cut:
+            r, offset = divmod(r, HISTORY_HOURS - 1)
+            offset = -offset - 2
+            status = 'completed' if kind >= cancelled_cut else 'cancelled'
+        else:
+            r, offset = divmod(r, FUTURE_HOURS)
+            offset += 1
+            status = 'pending' if kind < pending_cut else 'confirmed'
+        start = hours[zero + offset]
+        end = hours[zero + offset + duration]
+        created = hours[zero + min(offset - lead - 1, 0)]
+
+        if status == 'pending':
+            next_due = created + UNPAID_HOLD
+        elif status == 'confirmed':
+            next_due = min(start - REMINDER_BEFORE, end + OVERSTAY_GRACE)
+        else:
+            next_due = None
+        r, pick = divmod(r, n_methods)
+        method = None if status == 'pending' else PAYMENT_METHODS[pick]
+        total = totals[(rate, duration)]
+        if status == 'completed' or status == 'confirmed':
+            payments.append((reservation_id, total, method, created + paid_at))
+
+        r, pick = divmod(r, len(prefixes))
+        license_plate = f"{prefixes[pick]}{r % 900 + 100}"
+        code = access_code(rnd)
+        qr_code_data = (
+            f'{{"system": "ParkingSystem", "reservation_id": {reservation_id}, '
+            f'"access_code": "{code}", "license_plate": "{license_plate}"}}'
+        )
+        yield (
+            reservation_id, user_id, lot_id, license_plate, license_plate, start, end,
+            status, total, method, qr_code_data, code, created, created, next_due, '',
+        )
+
+
+def payment_rows(first_id, payments):
+    for payment_id, (reservation_id, amount, method, created) in enumerate(payments, start=first_id):
+        yield (payment_id, reservation_id, amount, method, f"GEN{reservation_id}", 'completed', created)
+
+
+def generate(lots, users, reservations, seed=0, base_time=None, future_share=0.2,
+             using=DEFAULT_DB_ALIAS, fast=True, chunk_size=CHUNK_SIZE, log=None):
+    """
+    Agrega el conjunto de datos a la base `using` y retorna
+    {'lot_ids': [...], 'counts': {modelo: filas}}. `base_time` (por defecto la
+    hora en punto actual) es el "ahora" de los datos: con la misma semilla y
+    la misma base el resultado es idéntico.
+    """
+    rnd = random.Random(seed)
+    base = (base_time or timezone.now()).replace(minute=0, second=0, microsecond=0)
+    writer = RowWriter(using=using, fast=fast, chunk_size=chunk_size)
+    log = log or (lambda message: None)
+    counts = {}
+    connection = writer.connection
+
+    previous_pragmas = {}
+    if writer.fast:
+        # sin fsync por tanda y con los índices en memoria; se restaura al terminar
+        pragmas = {'cache_size': -CACHE_KIB}
+        # SQLite no deja cambiar synchronous con una transacción abierta
+        if not connection.in_atomic_block:
+            pragmas['synchronous'] = 0
+        with connection.cursor() as cursor:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}')
+                previous_pragmas[name] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {name}={value}')
+    try:
+        with transaction.atomic(using=using):
+            first_lot = writer.next_id(ParkingLot)
+            counts['parking_lots'] = writer.write(ParkingLot, LOT_FIELDS, lot_rows(rnd, first_lot, lots), lots)
+            lot_data = list(
+                ParkingLot.objects.using(using).filter(id__gte=first_lot).order_by('id').values_list('id', 'hourly_rate')
+            )
+            log(f"{counts['parking_lots']} parqueaderos")
+
+            first_user = writer.next_id(User)
+            counts['users'] = writer.write(User, USER_FIELDS, user_rows(first_user, users, base), users)
+            user_ids = list(range(first_user, first_user + users))
+            log(f"{counts['users']} usuarios")
+
+            payments = []
+            if reservations:
+                if not lot_data or not user_ids:
+                    raise ValueError("Se necesitan parqueaderos y usuarios para generar reservas.")
+                rows = reservation_rows(rnd, writer.next_id(Reservation), reservations, lot_data, user_ids,
+                                        base, future_share, payments)
+                counts['reservations'] = writer.write(Reservation, RESERVATION_FIELDS, rows, reservations)
+                log(f"{counts['reservations']} reservas")
+            rows = payment_rows(writer.next_id(Payment), payments)
+            counts['payments'] = writer.write(Payment, PAYMENT_FIELDS, rows, len(payments))
+            log(f"{counts['payments']} pagos")
+            writer.reset_sequences([ParkingLot, User, Reservation, Payment])
+    finally:
+        if previous_pragmas:
+            with connection.cursor() as cursor:
+                for name, value in previous_pragmas.items():
+                    cursor.execute(f'PRAGMA {name}={int(value)}')
+    return {'lot_ids': [lot_id for lot_id, _ in lot_data], 'counts': counts}
@@ -0,0 +1,233 @@
+"""
+Eventos de entrada y salida de las talanqueras.
+
+Las talanqueras reportan cada paso con el código de acceso del QR o con la
+placa leída por la cámara. Los eventos se acumulan en memoria y un hilo los
+guarda por lotes: un bulk_create de eventos, un bulk_update de las reservas
+que cambian de estado y un UPDATE por parqueadero para el contador de
+ocupación. Así una ráfaga de cientos de eventos cuesta unas pocas consultas
+en lugar de varias por evento.
+
+Transiciones: una entrada pasa la reserva de 'confirmed' a 'active'; una
+salida pasa 'confirmed' o 'active' a 'completed'. Los vehículos sin reserva
+también cuentan en la ocupación. Cada reserva recuerda el sentido de su
+último evento contado: otro evento en el mismo sentido (una segunda entrada
+sin salida de por medio) es un reenvío, se guarda pero no mueve el
+contador. Así un vehículo que vuelve a entrar con una reserva ya completada
+suma al entrar y resta al salir. El contador además se mantiene entre 0 y
+la capacidad del parqueadero.
+
+Un lote que no se puede guardar (por ejemplo, la base no responde) vuelve
+al búfer y se reintenta. Lo que está en el búfer y no se ha guardado se
+pierde si el proceso muere sin terminar normalmente; al salir se hace un
+último flush.
+"""
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import GateEvent, ParkingLot, Reservation
+from .plates import normalize_plate
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'GATE_BATCH_SIZE', 500)
+FLUSH_INTERVAL = getattr(settings, 'GATE_FLUSH_INTERVAL', 1.0)
+# Para que un cliente que envía sin parar no agote la memoria
+MAX_BUFFERED = getattr(settings, 'GATE_MAX_BUFFERED', 50_000)
+
+OPEN_STATUSES = ('confirmed', 'active')
+# lo necesario para emparejar y para recalcular next_due_at sin consultas extra
+RESERVATION_FIELDS = (
+    'id', 'parking_lot_id', 'status', 'start_time', 'end_time', 'created_at', 'last_gate_direction',
+)
+
+
+class BufferFull(Exception):
+    pass
+
+
+def _match_reservations(events):
+    """
+    Asigna event.reservation con dos consultas para todo el lote: una por
+    códigos de acceso y otra por placas, solo entre reservas abiertas.
+    """
+    codes = {e.access_code for e in events if e.access_code}
+    plates = {e.plate_key for e in events if e.plate_key and not e.access_code}
+    lot_ids = {e.parking_lot_id for e in events}
+
+    by_code = {}
+    if codes:
+        for reservation in Reservation.objects.filter(access_code__in=codes).only(
+            *RESERVATION_FIELDS, 'access_code'
+        ):
+            by_code[reservation.access_code] = reservation
+
+    by_plate = defaultdict(list)
+    if plates:
+        for reservation in Reservation.objects.filter(
+            plate_key__in=plates, parking_lot_id__in=lot_ids, status__in=OPEN_STATUSES
+        ).only(*RESERVATION_FIELDS, 'plate_key'):
+            by_plate[(reservation.parking_lot_id, reservation.plate_key)].append(reservation)
+
+    for event in events:
+        if event.access_code:
+            reservation = by_code.get(event.access_code)
+            # un código de otro parqueadero no corresponde a esta talanquera
+            if reservation is not None and reservation.parking_lot_id == event.parking_lot_id:
+                event.reservation = reservation
+        elif event.plate_key:
+            candidates = by_plate.get((event.parking_lot_id, event.plate_key))
+            if candidates:
+                # la reserva de esa placa cuyo inicio está más cerca del evento
+                event.reservation = min(candidates, key=lambda r: abs(r.start_time - event.occurred_at))
+
+
+def _apply_transitions(events):
+    """
+    Cambia el estado de las reservas en memoria. Retorna (reservas que
+    cambiaron, eventos que mueven la ocupación): un evento en el mismo
+    sentido que el último contado de su reserva es un reenvío y solo queda
+    registrado.
+    """
+    changed = {}
+    counted = []
+    for event in events:
+        reservation = event.reservation
+        if reservation is not None:
+            if event.direction == reservation.last_gate_direction:
+                continue
+            reservation.last_gate_direction = event.direction
+            if event.direction == 'entry' and reservation.status == 'confirmed':
+                reservation.status = 'active'
+            elif event.direction == 'exit' and reservation.status in OPEN_STATUSES:
+                reservation.status = 'completed'
+            changed[reservation.id] = reservation
+        counted.append(event)
+    now = timezone.now()
+    for reservation in changed.values():
+        reservation.next_due_at = reservation.next_due(now)
+    return list(changed.values()), counted
+
+
+def save_events(events):
+    """Guarda una lista de GateEvent sin guardar y actualiza reservas y ocupación."""
+    if not events:
+        return
+    events.sort(key=lambda e: e.occurred_at)
+    _match_reservations(events)
+    reservations, counted = _apply_transitions(events)
+
+    deltas = defaultdict(int)
+    for event in counted:
+        deltas[event.parking_lot_id] += 1 if event.direction == 'entry' else -1
+
+    with transaction.atomic():
+        GateEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+        if reservations:
+            # bulk_update no pasa por save() ni por sus señales; el planificador
+            # ve el nuevo next_due_at en su siguiente recarga
+            Reservation.objects.bulk_update(
+                reservations, ['status', 'next_due_at', 'last_gate_direction'], batch_size=BATCH_SIZE
+            )
+        for lot_id, delta in deltas.items():
+            if delta:
+                # en la base y no en Python: otros procesos también suman; un
+                # evento perdido o repetido no deja el contador fuera de [0, capacidad]
+                ParkingLot.objects.filter(id=lot_id).update(
+                    current_occupancy=Least(Greatest(F('current_occupancy') + delta, 0), F('total_spaces'))
+                )
+
+
+class GateEventBuffer:
+    """Búfer de eventos por proceso con un hilo que lo vacía periódicamente."""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._events = []
+        self._lock = threading.Lock()
+        # serializa los flush del hilo y los llamados directos
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, events):
+        with self._lock:
+            if len(self._events) + len(events) > self.max_buffered:
+                raise BufferFull
+            self._events.extend(events)
+            pending = len(self._events)
+            if self._thread is None:
+                self._start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Guarda todo lo pendiente; retorna cuántos eventos guardó. Si un lote
+        falla, ese lote y los siguientes vuelven al inicio del búfer, en su
+        orden, y se reintentan en el próximo flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            saved = 0
+            for start in range(0, len(events), self.batch_size):
+                chunk = events[start:start + self.batch_size]
+                try:
+                    save_events(chunk)
+                except Exception:
+                    pending = events[start:]
+                    logger.exception("No se pudieron guardar %d eventos de talanquera; se reintentarán", len(pending))
+                    for event in pending:
+                        # la transacción se revirtió: nada de lo asignado quedó guardado
+                        event.pk = None
+                        event._state.adding = True
+                        event.reservation = None
+                    with self._lock:
+                        self._events[:0] = pending
+                    break
+                saved += len(chunk)
+            return saved
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='gate-event-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+
+buffer = GateEventBuffer()
+
+
+def build_event(data, default_lot_id, now):
+    """
+    GateEvent sin guardar a partir de un dict ya validado por la vista:
+    direction, parking_lot (opcional), access_code o license_plate, occurred_at.
+    """
+    license_plate = (data.get('license_plate') or '').strip()[:10]
+    return GateEvent(
+        parking_lot_id=data.get('parking_lot') or default_lot_id,
+        direction=data['direction'],
+        access_code=(data.get('access_code') or '').strip(),
+        license_plate=license_plate,
+        plate_key=normalize_plate(license_plate),
+        occurred_at=data.get('occurred_at') or now,
+        received_at=now,
+    )
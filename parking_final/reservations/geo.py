@@ -0,0 +1,161 @@
+"""
+Búsqueda de los parqueaderos más cercanos a un punto.
+
+Los parqueaderos activos con coordenadas se reparten en una cuadrícula de
+celdas de CELL_DEGREES grados. Para buscar, se recorren anillos de celdas
+alrededor del punto y se entregan los parqueaderos en orden de distancia en
+cuanto ningún anillo más lejano pueda tener uno más cercano; así quien pide
+"los 5 más cercanos con cupo" solo mira las celdas que necesita.
+
+El índice vive en memoria de cada proceso. Se marca para reconstruir cuando
+se guarda o borra un parqueadero en este proceso y, por los cambios hechos
+desde otros procesos, cada INDEX_MAX_AGE segundos.
+"""
+
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ParkingLot, free_spaces
+
+CELL_DEGREES = getattr(settings, 'PARKING_GRID_CELL_DEGREES', 0.01)  # ~1,1 km
+INDEX_MAX_AGE = getattr(settings, 'PARKING_GRID_MAX_AGE', 300)
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class LotGrid:
+    """Cuadrícula inmutable de (id, lat, lng); se reemplaza completa al reconstruir."""
+
+    def __init__(self, points, cell_degrees=CELL_DEGREES):
+        self.cell = cell_degrees
+        self.points = points
+        self.cells = {}
+        for point in points:
+            self.cells.setdefault(self._cell_of(point[1], point[2]), []).append(point)
+        self.max_abs_lat = max((abs(p[1]) for p in points), default=0.0)
+        if cells := list(self.cells):
+            self.bounds = (min(c[0] for c in cells), max(c[0] for c in cells),
+                           min(c[1] for c in cells), max(c[1] for c in cells))
+        self.built_at = time.monotonic()
+
+    def _cell_of(self, lat, lng):
+        return math.floor(lat / self.cell), math.floor(lng / self.cell)
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            yield ci, cj
+            return
+        for dj in range(-r, r + 1):
+            yield ci - r, cj + dj
+            yield ci + r, cj + dj
+        for di in range(-r + 1, r):
+            yield ci + di, cj - r
+            yield ci + di, cj + r
+
+    def iter_nearest(self, lat, lng):
+        """Genera (distancia en km, id) del más cercano al más lejano."""
+        if not self.points:
+            return
+        ci, cj = self._cell_of(lat, lng)
+        imin, imax, jmin, jmax = self.bounds
+        last_ring = max(abs(ci - imin), abs(ci - imax), abs(cj - jmin), abs(cj - jmax))
+        # Una celda de distancia nunca es menos que esto, ni siquiera en
+        # longitud a la latitud más extrema entre el punto y el índice.
+        max_abs_lat = min(max(self.max_abs_lat, abs(lat)), 89.0)
+        min_cell_km = self.cell * KM_PER_DEGREE * math.cos(math.radians(max_abs_lat))
+        heap = []
+        r = 0
+        while True:
+            if (2 * r + 1) ** 2 > 4 * len(self.points):
+                # más celdas por revisar que parqueaderos: se agregan de una
+                # vez los que faltan
+                for point in self.points:
+                    pi, pj = self._cell_of(point[1], point[2])
+                    if max(abs(pi - ci), abs(pj - cj)) >= r:
+                        heapq.heappush(heap, (haversine_km(lat, lng, point[1], point[2]), point[0]))
+                while heap:
+                    yield heapq.heappop(heap)
+                return
+            for cell in self._ring(ci, cj, r):
+                for point in self.cells.get(cell, ()):
+                    heapq.heappush(heap, (haversine_km(lat, lng, point[1], point[2]), point[0]))
+            # lo que está en anillos posteriores queda al menos a r celdas
+            bound = r * min_cell_km if r < last_ring else math.inf
+            while heap and heap[0][0] <= bound:
+                yield heapq.heappop(heap)
+            if r >= last_ring:
+                return
+            r += 1
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    index = _index
+    if index is None or time.monotonic() - index.built_at > INDEX_MAX_AGE:
+        with _lock:
+            if _index is None or time.monotonic() - _index.built_at > INDEX_MAX_AGE:
+                points = [
+                    (lot_id, float(lat), float(lng))
+                    for lot_id, lat, lng in ParkingLot.objects.filter(
+                        is_active=True, latitude__isnull=False, longitude__isnull=False,
+                    ).values_list('id', 'latitude', 'longitude')
+                ]
+                _index = LotGrid(points)
+            index = _index
+    return index
+
+
+@receiver([post_save, post_delete], sender=ParkingLot)
+def invalidate_index(**kwargs):
+    global _index
+    _index = None
+
+
+def nearest_with_space(lat, lng, start, end, k=5, max_km=None, batch=None):
+    """
+    Los k parqueaderos más cercanos con cupo en [start, end), como lista de
+    (ParkingLot, distancia en km, espacios libres). Los candidatos se piden
+    a la base por tandas, con una consulta de parqueaderos y una de
+    disponibilidad (models.free_spaces) por tanda.
+    """
+    batch = batch or max(2 * k, 10)
+    results = []
+    candidates = get_index().iter_nearest(lat, lng)
+    while len(results) < k:
+        chunk = []
+        for distance, lot_id in candidates:
+            if max_km is not None and distance > max_km:
+                break
+            chunk.append((distance, lot_id))
+            if len(chunk) >= batch:
+                break
+        if not chunk:
+            break
+        lots = ParkingLot.objects.in_bulk([lot_id for _, lot_id in chunk])
+        # el índice puede estar atrasado respecto a otro proceso
+        active = [lots[lot_id] for _, lot_id in chunk if lot_id in lots and lots[lot_id].is_active]
+        free = free_spaces(active, start, end)
+        for distance, lot_id in chunk:
+            if free.get(lot_id, 0) > 0:
+                results.append((lots[lot_id], distance, free[lot_id]))
+                if len(results) == k:
+                    break
+        if len(chunk) < batch:
+            break
+    return results
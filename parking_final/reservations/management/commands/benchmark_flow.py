@@ -0,0 +1,88 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.benchmark import (
+    SCALES,
+    STEPS,
+    compare_to_baseline,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el flujo registro → reserva → pago → QR sobre una base SQLite temporal "
+        "y lo compara contra una línea base en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=5, help="Flujos completos por trabajador.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--baseline',
+            help="Ruta de la línea base (por defecto benchmarks/<scale>.json).",
+        )
+        parser.add_argument('--save-baseline', action='store_true', help="Guarda el resultado como nueva línea base.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Margen permitido antes de marcar regresión.")
+        parser.add_argument(
+            '--fast-hashers',
+            action='store_true',
+            help="Usa MD5 para las contraseñas, para aislar el costo de las vistas.",
+        )
+        parser.add_argument('--json', action='store_true', help="Imprime el resultado completo en JSON.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['iterations'] < 1:
+            raise CommandError("--workers e --iterations deben ser >= 1.")
+
+        baseline_path = options['baseline'] or str(settings.BASE_DIR / 'benchmarks' / f"{options['scale']}.json")
+        result = run_benchmark(
+            scale=options['scale'],
+            workers=options['workers'],
+            iterations=options['iterations'],
+            seed=options['seed'],
+            fast_hashers=options['fast_hashers'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2, sort_keys=True))
+        else:
+            self._print_report(result)
+
+        if options['save_baseline']:
+            save_baseline(baseline_path, result)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {baseline_path}"))
+            return
+
+        try:
+            baseline = load_baseline(baseline_path)
+        except FileNotFoundError:
+            self.stdout.write(f"Sin línea base en {baseline_path}; use --save-baseline para crearla.")
+            return
+
+        regressions = compare_to_baseline(result, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Regresiones detectadas:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la línea base."))
+
+    def _print_report(self, result):
+        self.stdout.write(
+            f"Escala {result['scale']} (siembra {result['seed_time_s']}s) · "
+            f"{result['workers']} trabajadores × {result['iterations']} flujos"
+        )
+        self.stdout.write(
+            f"{result['requests']} peticiones en {result['wall_time_s']}s → {result['requests_per_s']} peticiones/s"
+        )
+        self.stdout.write(f"{'PASO':<14}{'N':>6}{'ERR':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL/pet':>9}")
+        for step in STEPS:
+            s = result['steps'][step]
+            self.stdout.write(
+                f"{step:<14}{s['requests']:>6}{s['errors']:>5}{s['p50_ms']:>10}"
+                f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['queries_per_request']:>9}"
+            )
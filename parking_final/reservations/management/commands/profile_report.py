@@ -0,0 +1,95 @@
+import re
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.profiling import load_captures, profiles_dir
+
+# Literales del SQL reemplazados para agrupar consultas que solo cambian en ellos
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SQL_IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+
+
+def normalize_sql(sql):
+    sql = _SQL_LITERALS.sub('?', sql)
+    return _SQL_IN_LIST.sub('IN (...)', sql)
+
+
+class Command(BaseCommand):
+    help = (
+        "Resume las capturas de ProfilingMiddleware: funciones con más tiempo "
+        "propio y consultas SQL más costosas, sumadas entre capturas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Directorio de capturas (por defecto PROFILING_DIR).")
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--path', help="Solo capturas cuya ruta contenga este texto.")
+        parser.add_argument('--view', help="Solo capturas de esta vista (nombre de la URL).")
+        parser.add_argument(
+            '--folded',
+            help="Escribe las pilas muestreadas de todas las capturas en formato folded "
+                 "(flamegraph.pl, speedscope).",
+        )
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or profiles_dir()
+        self_ms = defaultdict(float)
+        total_ms = defaultdict(float)
+        seen_in = defaultdict(int)
+        sql = defaultdict(lambda: [0, 0.0])
+        folded = defaultdict(int)
+        captures = 0
+        try:
+            loaded = list(load_captures(directory))
+        except FileNotFoundError:
+            raise CommandError(f"No existe el directorio {directory}.")
+
+        for capture in loaded:
+            if options['path'] and options['path'] not in capture['path']:
+                continue
+            if options['view'] and options['view'] != capture.get('view'):
+                continue
+            captures += 1
+            functions = set()
+            if capture['mode'] == 'sample':
+                interval_ms = capture['sample_interval'] * 1000
+                for stack, count in capture['stacks'].items():
+                    frames = stack.split(';')
+                    self_ms[frames[-1]] += count * interval_ms
+                    # una función recursiva cuenta una vez por muestra
+                    for frame in set(frames):
+                        total_ms[frame] += count * interval_ms
+                    functions.update(frames)
+                    folded[stack] += count
+            else:
+                for label, calls, own, cumulative in capture['functions']:
+                    self_ms[label] += own * 1000
+                    total_ms[label] += cumulative * 1000
+                    functions.add(label)
+            for label in functions:
+                seen_in[label] += 1
+            for query in capture['queries']:
+                entry = sql[normalize_sql(query['sql'])]
+                entry[0] += 1
+                entry[1] += query['ms']
+
+        if not captures:
+            self.stdout.write(f"Sin capturas en {directory}.")
+            return
+
+        limit = options['limit']
+        self.stdout.write(f"{captures} capturas en {directory}\n")
+        self.stdout.write(f"{'PROPIO ms':>11}{'TOTAL ms':>11}{'CAPT':>6}  FUNCIÓN")
+        for label in sorted(self_ms, key=self_ms.get, reverse=True)[:limit]:
+            self.stdout.write(f"{self_ms[label]:>11.1f}{total_ms[label]:>11.1f}{seen_in[label]:>6}  {label}")
+
+        self.stdout.write(f"\n{'SQL ms':>11}{'N':>8}  CONSULTA")
+        for statement, (count, ms) in sorted(sql.items(), key=lambda item: item[1][1], reverse=True)[:limit]:
+            self.stdout.write(f"{ms:>11.1f}{count:>8}  {statement[:160]}")
+
+        if options['folded']:
+            with open(options['folded'], 'w', encoding='utf-8') as f:
+                for stack, count in sorted(folded.items()):
+                    f.write(f"{stack} {count}\n")
+            self.stdout.write(self.style.SUCCESS(f"\nPilas en formato folded guardadas en {options['folded']}"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.scheduler import HANDLERS, LOOKAHEAD, WORKERS, Scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta el planificador de recordatorios, vencimientos de reservas sin "
+        "pagar y avisos de exceso de tiempo. Debe haber uno solo por base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=WORKERS, help="Hilos para los manejadores.")
+        parser.add_argument('--once', action='store_true', help="Atiende lo vencido y termina.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers debe ser >= 1.")
+        scheduler = Scheduler(workers=options['workers'])
+        if options['once']:
+            scheduler.reload()
+            fired = scheduler.run_pending()
+            scheduler.pool.shutdown(wait=True)
+            self.stdout.write(f"{fired} reservas con eventos vencidos atendidas.")
+            return
+
+        self.stdout.write(
+            f"Planificador iniciado: {', '.join(sorted(HANDLERS))}; "
+            f"ventana de {LOOKAHEAD}s, {options['workers']} hilos. Ctrl+C para detener."
+        )
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            self.stdout.write("Planificador detenido.")
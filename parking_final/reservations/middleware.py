@@ -0,0 +1,166 @@
+import logging
+import mimetypes
+import os
+import posixpath
+import random
+import re
+import secrets
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .profiling import Capture
+
+logger = logging.getLogger(__name__)
+
+# Nombres con el hash de ManifestStaticFilesStorage: estilos.3f2a9c1b7e4d.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# (token de Accept-Encoding, sufijo del archivo precomprimido), en orden de preferencia
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Codificaciones aceptadas según Accept-Encoding, ignorando las de q=0."""
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticAssetMiddleware:
+    """
+    Sirve STATIC_ROOT desde el propio proceso, sin CDN ni servidor aparte.
+
+    Prefiere la variante .br o .gz que dejó collectstatic si el navegador la
+    acepta, y marca los archivos con hash en el nombre como inmutables por un
+    año: cualquier cambio produce otro nombre, así que el navegador nunca
+    vuelve a pedirlos. Los nombres sin hash se revalidan en cada uso.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL or '').path
+        self.root = settings.STATIC_ROOT
+        # con STATIC_URL en otro dominio no hay nada que servir aquí
+        if not self.root or not self.prefix.startswith('/') or urlsplit(settings.STATIC_URL).netloc:
+            raise MiddlewareNotUsed
+        self.root = os.fspath(self.root)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        name = posixpath.normpath(unquote(name)).lstrip('/')
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+            self.set_cache_headers(response, name)
+            return response
+
+        content_type, _ = mimetypes.guess_type(name)
+        encoding = None
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for token, suffix in ENCODINGS:
+            if token in accepted and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, token
+                break
+
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+            filename=posixpath.basename(name),
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        self.set_cache_headers(response, name)
+        return response
+
+    def set_cache_headers(self, response, name):
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if HASHED_NAME.search(name):
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+
+
+class ProfilingMiddleware:
+    """
+    Perfila una petición y guarda la captura (ver profiling.py) cuando:
+
+    - trae el encabezado X-Profile con PROFILING_TOKEN, o la hace un usuario
+      staff con X-Profile: 1; X-Profile-Mode elige 'sample' o 'cprofile';
+    - cae en la muestra aleatoria PROFILING_SAMPLE_RATE (0 a 1);
+    - con PROFILING_SLOW_MS, cualquier petición que tarde más que eso. Para
+      esto todas se muestrean y solo las lentas se escriben en disco.
+
+    Desactivado salvo con PROFILING_ENABLED. La respuesta perfilada lleva
+    X-Profile-Id con el id de la captura.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.token = getattr(settings, 'PROFILING_TOKEN', '')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_MS', None)
+        self.mode = getattr(settings, 'PROFILING_MODE', 'sample')
+
+    def trigger(self, request):
+        value = request.headers.get('X-Profile')
+        if value:
+            user = getattr(request, 'user', None)
+            if (self.token and secrets.compare_digest(value.encode(), self.token.encode())) or (user is not None and user.is_staff):
+                return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample_rate'
+        return None
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None and self.slow_ms is None:
+            return self.get_response(request)
+
+        mode = 'sample'
+        if trigger is not None:
+            mode = request.headers.get('X-Profile-Mode', self.mode)
+        capture = Capture('cprofile' if mode == 'cprofile' else 'sample')
+        with capture:
+            response = self.get_response(request)
+        if trigger is None:
+            if capture.duration_ms < self.slow_ms:
+                return response
+            trigger = 'slow'
+
+        try:
+            response.headers['X-Profile-Id'] = capture.save(request, response, trigger)
+        except OSError:
+            logger.exception("No se pudo guardar el perfil de %s", request.path)
+        return response
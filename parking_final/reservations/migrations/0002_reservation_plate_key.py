@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def normalize_plate(plate):
+    # Copia de reservations.plates.normalize_plate, congelada para la migración.
+    return ''.join(ch for ch in (plate or '').upper() if ch.isalnum())
+
+
+def backfill_plate_keys(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    batch = []
+    for reservation in Reservation.objects.only('id', 'license_plate').iterator(chunk_size=BATCH_SIZE):
+        reservation.plate_key = normalize_plate(reservation.license_plate)
+        batch.append(reservation)
+        if len(batch) >= BATCH_SIZE:
+            Reservation.objects.bulk_update(batch, ['plate_key'])
+            batch = []
+    if batch:
+        Reservation.objects.bulk_update(batch, ['plate_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='plate_key',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.RunPython(backfill_plate_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['plate_key', 'start_time'], name='reservation_plate_start_idx'),
+        ),
+    ]
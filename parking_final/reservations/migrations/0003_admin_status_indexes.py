@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_reservation_plate_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'id'], name='payment_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'id'], name='reservation_status_id_idx'),
+        ),
+    ]
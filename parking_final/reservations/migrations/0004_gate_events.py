@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_admin_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkinglot',
+            name='current_occupancy',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='GateEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('entry', 'Entrada'), ('exit', 'Salida')], max_length=5)),
+                ('access_code', models.CharField(blank=True, max_length=64)),
+                ('license_plate', models.CharField(blank=True, max_length=10)),
+                ('plate_key', models.CharField(blank=True, max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('parking_lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gate_events', to='reservations.parkinglot')),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gate_events', to='reservations.reservation')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['parking_lot', 'occurred_at'], name='gateevent_lot_occurred_idx'), models.Index(fields=['plate_key', 'occurred_at'], name='gateevent_plate_occurred_idx')],
+            },
+        ),
+    ]
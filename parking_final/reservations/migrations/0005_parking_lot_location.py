@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_gate_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parkinglot',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='parkinglot',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+    ]
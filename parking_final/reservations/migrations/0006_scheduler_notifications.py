@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def next_due(reservation, now):
+    # Copia de Reservation.due_events()/next_due(), congelada para la migración.
+    if reservation.status == 'pending':
+        return reservation.created_at + timedelta(minutes=15)
+    events = []
+    if reservation.status == 'confirmed' and reservation.start_time > now:
+        events.append(reservation.start_time - timedelta(minutes=30))
+    if reservation.status in ('confirmed', 'active'):
+        events.append(reservation.end_time + timedelta(minutes=10))
+    return min(events, default=None)
+
+
+def backfill_next_due(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    now = timezone.now()
+    batch = []
+    open_reservations = Reservation.objects.filter(status__in=['pending', 'confirmed', 'active']).only(
+        'id', 'status', 'start_time', 'end_time', 'created_at',
+    )
+    for reservation in open_reservations.iterator(chunk_size=BATCH_SIZE):
+        reservation.next_due_at = next_due(reservation, now)
+        batch.append(reservation)
+        if len(batch) >= BATCH_SIZE:
+            Reservation.objects.bulk_update(batch, ['next_due_at'])
+            batch = []
+    if batch:
+        Reservation.objects.bulk_update(batch, ['next_due_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reservations', '0005_parking_lot_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='next_due_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_next_due, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reminder', 'Recordatorio'), ('overstay', 'Tiempo excedido'), ('hold_expiry', 'Reserva vencida')], max_length=20)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='reservations.reservation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='notification_user_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('reservation', 'kind'), name='notification_once_per_kind'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_scheduler_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_method', 'id'], name='payment_method_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:39
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_gate_direction(apps, schema_editor):
+    # el sentido del último evento registrado de cada reserva que pasó por la talanquera
+    Reservation = apps.get_model('reservations', 'Reservation')
+    GateEvent = apps.get_model('reservations', 'GateEvent')
+    last_direction = GateEvent.objects.filter(reservation_id=OuterRef('pk')).order_by(
+        '-occurred_at', '-id'
+    ).values('direction')[:1]
+    Reservation.objects.filter(
+        id__in=GateEvent.objects.filter(reservation__isnull=False).values('reservation_id')
+    ).update(last_gate_direction=Subquery(last_direction))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_payment_method_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='last_gate_direction',
+            field=models.CharField(blank=True, editable=False, max_length=5),
+        ),
+        migrations.RunPython(backfill_last_gate_direction, migrations.RunPython.noop),
+    ]
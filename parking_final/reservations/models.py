@@ -1,34 +1,63 @@
 from django.db import models
+from django.db.models import Count, Q
 from django.contrib.auth.models import User
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal  # ← AGREGAR ESTA IMPORTACIÓN
 import secrets
 import json
 import urllib.parse
 
+from .plates import normalize_plate
+
+# Tiempo que una reserva confirmada guarda su cupo si el vehículo no ha entrado
+NO_SHOW_GRACE = timedelta(minutes=30)
+# Eventos programados por reserva (ver scheduler.py)
+REMINDER_BEFORE = timedelta(minutes=30)
+UNPAID_HOLD = timedelta(minutes=15)
+OVERSTAY_GRACE = timedelta(minutes=10)
+
 class ParkingLot(models.Model):
     name = models.CharField(max_length=100)
     address = models.TextField()
     total_spaces = models.IntegerField()
     hourly_rate = models.DecimalField(max_digits=6, decimal_places=2)
     is_active = models.BooleanField(default=True)
+    # Ubicación para la búsqueda de cercanos (ver geo.py); sin ella el
+    # parqueadero no aparece en esa búsqueda
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Vehículos dentro según los eventos de las talanqueras (ver gate.py)
+    current_occupancy = models.PositiveIntegerField(default=0, editable=False)
     
     def available_spaces(self):
         try:
+            # Los vehículos que ya entraron están en current_occupancy; las
+            # reservas confirmadas que aún no llegan guardan su cupo solo
+            # durante NO_SHOW_GRACE desde el inicio.
             now = timezone.now()
-            reserved_count = Reservation.objects.filter(
+            awaiting_count = Reservation.objects.filter(
                 parking_lot=self,
+                status='confirmed',
                 start_time__lte=now,
+                start_time__gte=now - NO_SHOW_GRACE,
                 end_time__gte=now,
-                status__in=['confirmed', 'active']
             ).count()
-            return max(0, self.total_spaces - reserved_count)
+            return max(0, self.total_spaces - self.current_occupancy - awaiting_count)
         except:
             return self.total_spaces
     
     def __str__(self):
         return self.name
 
+class ReservationQuerySet(models.QuerySet):
+    def for_plate(self, plate):
+        """Reservas de una placa escrita en cualquier formato, las más recientes primero."""
+        key = normalize_plate(plate)
+        if not key:
+            return self.none()
+        return self.filter(plate_key=key).order_by('-start_time')
+
 class Reservation(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
@@ -47,6 +76,8 @@ class Reservation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     parking_lot = models.ForeignKey(ParkingLot, on_delete=models.CASCADE)
     license_plate = models.CharField(max_length=10)
+    # license_plate normalizada (ver plates.py); se mantiene en save()
+    plate_key = models.CharField(max_length=10, blank=True, editable=False)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -56,6 +87,21 @@ class Reservation(models.Model):
     access_code = models.CharField(max_length=64, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Próximo evento programado (recordatorio, vencimiento, exceso de tiempo);
+    # el planificador lee las reservas por este índice
+    next_due_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    # Sentido del último paso por la talanquera que movió la ocupación ('entry'
+    # o 'exit'); un evento en el mismo sentido es un reenvío (ver gate.py)
+    last_gate_direction = models.CharField(max_length=5, blank=True, editable=False)
+
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['plate_key', 'start_time'], name='reservation_plate_start_idx'),
+            # filtro por estado del admin, ordenado por id
+            models.Index(fields=['status', 'id'], name='reservation_status_id_idx'),
+        ]
     
     def calculate_total(self):
         duration = self.end_time - self.start_time
@@ -90,6 +136,28 @@ class Reservation(models.Model):
         encoded_data = urllib.parse.quote(simple_data)
         return f"https://api.qrserver.com/v1/create-qr-code/?size=200x200&data={encoded_data}"
     
+    def due_events(self, now):
+        """
+        [(tipo, momento)] de los eventos que aplican en el estado actual:
+        vencimiento de la reserva sin pagar, recordatorio antes del inicio
+        (solo mientras no haya empezado) y revisión de exceso de tiempo.
+        """
+        if self.status == 'pending':
+            return [('hold_expiry', (self.created_at or now) + UNPAID_HOLD)]
+        events = []
+        if self.status == 'confirmed' and self.start_time > now:
+            events.append(('reminder', self.start_time - REMINDER_BEFORE))
+        if self.status in ('confirmed', 'active'):
+            events.append(('overstay', self.end_time + OVERSTAY_GRACE))
+        return events
+
+    def next_due(self, now, after=None):
+        """Momento del próximo evento, o None; con `after`, solo los posteriores."""
+        return min(
+            (due for _, due in self.due_events(now) if after is None or due > after),
+            default=None,
+        )
+    
     def save(self, *args, **kwargs):
         if not self.access_code:
             self.generate_access_code()
@@ -99,12 +167,55 @@ class Reservation(models.Model):
         
         if not self.qr_code_data:
             self.generate_qr_data()
+
+        self.plate_key = normalize_plate(self.license_plate)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'license_plate' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'plate_key'}
+
+        self.next_due_at = self.next_due(timezone.now())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'status', 'start_time', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'next_due_at'}
         
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Reserva {self.id} - {self.user.username}"
 
+def free_spaces(lots, start, end):
+    """
+    {id: espacios libres} de varios parqueaderos para la ventana
+    [start, end), con una sola consulta. Cuenta las reservas confirmadas o
+    activas que se cruzan con la ventana, sin las confirmadas que ya pasaron
+    NO_SHOW_GRACE sin llegar; si la ventana empieza ya, también los vehículos
+    que están dentro aunque no tengan reserva.
+    """
+    lots = list(lots)
+    now = timezone.now()
+    counts = {
+        row['parking_lot_id']: row
+        for row in Reservation.objects.filter(
+            parking_lot_id__in=[lot.id for lot in lots],
+            status__in=['confirmed', 'active'],
+            start_time__lt=end,
+            end_time__gt=start,
+        ).exclude(
+            status='confirmed', start_time__lt=now - NO_SHOW_GRACE,
+        ).values('parking_lot_id').annotate(
+            reserved=Count('id'),
+            awaiting=Count('id', filter=Q(status='confirmed')),
+        )
+    }
+    result = {}
+    for lot in lots:
+        row = counts.get(lot.id, {'reserved': 0, 'awaiting': 0})
+        taken = row['reserved']
+        if start <= now:
+            taken = max(taken, lot.current_occupancy + row['awaiting'])
+        result[lot.id] = max(0, lot.total_spaces - taken)
+    return result
+
 class Payment(models.Model):
     reservation = models.OneToOneField(Reservation, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=8, decimal_places=2)
@@ -116,6 +227,71 @@ class Payment(models.Model):
         ('failed', 'Fallido'),
     ])
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='payment_status_id_idx'),
+            # filtro por método de pago del admin, ordenado por id
+            models.Index(fields=['payment_method', 'id'], name='payment_method_id_idx'),
+        ]
     
     def __str__(self):
-        return f"Pago {self.transaction_id}"
\ No newline at end of file
+        return f"Pago {self.transaction_id}"
+
+
+class GateEvent(models.Model):
+    """Paso de un vehículo por la talanquera de entrada o de salida."""
+
+    DIRECTION_CHOICES = [
+        ('entry', 'Entrada'),
+        ('exit', 'Salida'),
+    ]
+
+    parking_lot = models.ForeignKey(ParkingLot, on_delete=models.CASCADE, related_name='gate_events')
+    # Reserva reconocida por código de acceso o placa; vacía si el vehículo no tenía reserva
+    reservation = models.ForeignKey(
+        Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='gate_events'
+    )
+    direction = models.CharField(max_length=5, choices=DIRECTION_CHOICES)
+    access_code = models.CharField(max_length=64, blank=True)
+    license_plate = models.CharField(max_length=10, blank=True)
+    plate_key = models.CharField(max_length=10, blank=True)
+    occurred_at = models.DateTimeField()
+    received_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['parking_lot', 'occurred_at'], name='gateevent_lot_occurred_idx'),
+            models.Index(fields=['plate_key', 'occurred_at'], name='gateevent_plate_occurred_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_direction_display()} {self.license_plate or self.access_code[:8]} - {self.parking_lot_id}"
+
+
+class Notification(models.Model):
+    """Aviso al usuario generado por el planificador; a lo sumo uno por tipo y reserva."""
+
+    KIND_CHOICES = [
+        ('reminder', 'Recordatorio'),
+        ('overstay', 'Tiempo excedido'),
+        ('hold_expiry', 'Reserva vencida'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reservation', 'kind'], name='notification_once_per_kind'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - reserva {self.reservation_id}"
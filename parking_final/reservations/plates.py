@@ -0,0 +1,13 @@
+"""
+Clave normalizada de placas.
+
+Las placas llegan escritas de muchas formas ("abc-123", "ABC 123", "abc.123");
+la clave las reduce a mayúsculas sin separadores, así buscar una placa es una
+consulta exacta sobre un índice. vehiclesapp (EXAMEN/crud_example) es otro
+proyecto con su propia base y aplica la misma regla en vehiclesapp/placas.py.
+"""
+
+
+def normalize_plate(plate):
+    """'abc-123' → 'ABC123'."""
+    return ''.join(ch for ch in (plate or '').upper() if ch.isalnum())
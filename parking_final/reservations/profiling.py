@@ -0,0 +1,243 @@
+"""
+Perfilado opcional de peticiones (ver ProfilingMiddleware).
+
+Dos modos de captura:
+
+- 'sample': un único hilo muestreador recorre cada PROFILING_SAMPLE_INTERVAL
+  la pila de los hilos que están atendiendo una petición vigilada. Las pilas
+  se guardan en formato "folded" (raíz;...;hoja N), el que leen
+  flamegraph.pl y speedscope. Es barato, así que también sirve para
+  vigilar todas las peticiones y guardar solo las lentas.
+- 'cprofile': cProfile determinista sobre el hilo de la petición; se guarda
+  el .prof (pstats, snakeviz) y un resumen por función.
+
+Cada captura incluye además las consultas SQL con su duración. Se escriben
+en PROFILING_DIR, que funciona como búfer circular: al pasar de
+PROFILING_MAX_CAPTURES o PROFILING_MAX_BYTES se borran las más antiguas.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+SAMPLE_INTERVAL = getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+MAX_CAPTURES = getattr(settings, 'PROFILING_MAX_CAPTURES', 200)
+MAX_BYTES = getattr(settings, 'PROFILING_MAX_BYTES', 50 * 1024 * 1024)
+# Por captura, para que una vista con N+1 no genere un archivo enorme
+MAX_QUERIES = 1000
+MAX_STACK_DEPTH = 200
+TOP_FUNCTIONS = 300
+
+
+def profiles_dir():
+    return os.fspath(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def function_label(filename, name):
+    """'reservations/views.py:create_reservation', sin ';' para el formato folded."""
+    path = filename.replace('\\', '/')
+    base = os.fspath(settings.BASE_DIR).replace('\\', '/') + '/'
+    if path.startswith(base):
+        path = path[len(base):]
+    elif '/site-packages/' in path:
+        path = path.split('/site-packages/', 1)[1]
+    elif '/lib/python' in path:
+        path = 'stdlib/' + path.rsplit('/', 1)[-1]
+    return f"{path}:{name}".replace(';', ',').replace(' ', '_')
+
+
+_labels = {}
+
+
+def frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = function_label(code.co_filename, code.co_name)
+    return label
+
+
+def folded_stack(frame):
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        parts.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    parts.reverse()
+    return ';'.join(parts)
+
+
+class Sampler:
+    """Hilo muestreador compartido por todas las peticiones vigiladas del proceso."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._watched = {}  # id del hilo → Counter de pilas
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def watch(self, thread_id):
+        stacks = Counter()
+        with self._lock:
+            self._watched[thread_id] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+                self._thread.start()
+            self._active.set()
+        return stacks
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            self._watched.pop(thread_id, None)
+            if not self._watched:
+                self._active.clear()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[folded_stack(frame)] += 1
+            del frames
+
+
+sampler = Sampler()
+# En Python solo puede haber un cProfile activo a la vez por hilo y, desde
+# 3.12, por proceso; una petición que no lo obtiene se muestrea.
+_cprofile_lock = threading.Lock()
+
+
+class Capture:
+    """Perfil y SQL de una petición; se usa como context manager alrededor de la vista."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.queries = []
+        self.query_count = 0
+        self.stacks = None
+        self.profile = None
+        self._stack = ExitStack()
+
+    def _record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            if len(self.queries) < MAX_QUERIES:
+                # los parámetros pueden traer datos personales; solo el SQL
+                self.queries.append({
+                    'sql': sql,
+                    'ms': round((time.perf_counter() - started) * 1000, 3),
+                    'many': many,
+                    'db': context['connection'].alias,
+                })
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record_query))
+        if self.mode == 'cprofile' and _cprofile_lock.acquire(blocking=False):
+            self._stack.callback(_cprofile_lock.release)
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            self._stack.callback(self.profile.disable)
+        else:
+            self.mode = 'sample'
+            thread_id = threading.get_ident()
+            self.stacks = sampler.watch(thread_id)
+            self._stack.callback(sampler.unwatch, thread_id)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        self._stack.close()
+        return False
+
+    def function_summary(self):
+        """[[función, llamadas, tiempo propio s, tiempo acumulado s]] de cProfile."""
+        stats = pstats.Stats(self.profile)
+        rows = []
+        for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items():
+            label = f"builtin:{name}" if filename == '~' else function_label(filename, name)
+            rows.append([label, nc, round(tt, 6), round(ct, 6)])
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    def save(self, request, response, trigger):
+        """Escribe la captura en el directorio circular y retorna su id."""
+        directory = profiles_dir()
+        os.makedirs(directory, exist_ok=True)
+        capture_id = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident() % 100000}"
+        data = {
+            'id': capture_id,
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'duration_ms': round(self.duration_ms, 3),
+            'trigger': trigger,
+            'mode': self.mode,
+            'created': time.time(),
+            'query_count': self.query_count,
+            'sql_ms': round(sum(q['ms'] for q in self.queries), 3),
+            'queries': self.queries,
+        }
+        if self.mode == 'sample':
+            data['sample_interval'] = sampler.interval
+            data['stacks'] = dict(self.stacks)
+        else:
+            data['functions'] = self.function_summary()
+            self.profile.dump_stats(os.path.join(directory, f"{capture_id}.prof"))
+        tmp_path = os.path.join(directory, f".{capture_id}.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(directory, f"{capture_id}.json"))
+        trim_captures(directory)
+        return capture_id
+
+
+def capture_files(directory):
+    """[(ruta, tamaño)] de los archivos de cada captura, de la más antigua a la más nueva."""
+    captures = {}
+    for entry in os.scandir(directory):
+        stem, ext = os.path.splitext(entry.name)
+        if ext in ('.json', '.prof') and not entry.name.startswith('.'):
+            captures.setdefault(stem, []).append((entry.path, entry.stat().st_size))
+    # el id empieza por time_ns, así que el orden por nombre es el cronológico
+    return [captures[stem] for stem in sorted(captures, key=lambda s: int(s.split('-', 1)[0]))]
+
+
+def trim_captures(directory, max_captures=MAX_CAPTURES, max_bytes=MAX_BYTES):
+    captures = capture_files(directory)
+    total = sum(size for files in captures for _, size in files)
+    while captures and (len(captures) > max_captures or total > max_bytes):
+        for path, size in captures.pop(0):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # otro proceso ya la borró
+            total -= size
+
+
+def load_captures(directory):
+    for files in capture_files(directory):
+        for path, _ in files:
+            if path.endswith('.json'):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        yield json.load(f)
+                except (OSError, ValueError):
+                    continue
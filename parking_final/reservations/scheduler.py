@@ -0,0 +1,188 @@
+"""
+Planificador de recordatorios, vencimientos y avisos de exceso de tiempo.
+
+Cada reserva abierta tiene en `next_due_at` (indexado) el momento de su
+próximo evento, calculado por Reservation.due_events(). El planificador
+carga a una rueda de temporizadores (timerwheel.py) solo las reservas que
+vencen en los próximos LOOKAHEAD segundos y repite esa consulta cada
+RELOAD_INTERVAL; así nunca recorre la tabla completa y ve también las
+reservas creadas desde otros procesos. En su propio proceso, las señales
+de Reservation reprograman la rueda al instante.
+
+Al vencer, la reserva se lee de nuevo y cada evento que aplica se entrega a
+su manejador en un pool de hilos. Los manejadores guardan el aviso en
+Notification (a lo sumo uno por tipo y reserva) y lo escriben en el log.
+Se ejecuta con `manage.py run_scheduler`.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Notification, Reservation
+from .timerwheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+TICK = getattr(settings, 'SCHEDULER_TICK', 1.0)
+WORKERS = getattr(settings, 'SCHEDULER_WORKERS', 4)
+RELOAD_INTERVAL = getattr(settings, 'SCHEDULER_RELOAD_INTERVAL', 30)
+LOOKAHEAD = 2 * RELOAD_INTERVAL
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Registra la función que atiende un tipo de evento: f(reservation, now)."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def notify(reservation, kind, message):
+    """Guarda el aviso; retorna False si esa reserva ya tenía uno de ese tipo."""
+    try:
+        with transaction.atomic():
+            Notification.objects.create(user_id=reservation.user_id, reservation=reservation, kind=kind, message=message)
+    except IntegrityError:
+        return False
+    logger.info("Aviso %s para la reserva %s: %s", kind, reservation.id, message)
+    return True
+
+
+@handler('reminder')
+def send_reminder(reservation, now):
+    start = timezone.localtime(reservation.start_time)
+    notify(reservation, 'reminder',
+           f"Su reserva en {reservation.parking_lot.name} empieza a las {start:%H:%M}.")
+
+
+@handler('overstay')
+def send_overstay(reservation, now):
+    # una reserva confirmada cuyo vehículo nunca entró no excede nada
+    if reservation.status != 'active':
+        return
+    end = timezone.localtime(reservation.end_time)
+    notify(reservation, 'overstay',
+           f"Su reserva en {reservation.parking_lot.name} terminó a las {end:%H:%M} "
+           f"y el vehículo sigue dentro.")
+
+
+@handler('hold_expiry')
+def expire_hold(reservation, now):
+    # condicionado al estado por si el pago llegó mientras tanto
+    expired = Reservation.objects.filter(id=reservation.id, status='pending').update(
+        status='cancelled', next_due_at=None,
+    )
+    if expired:
+        reservation.status = 'cancelled'
+        notify(reservation, 'hold_expiry', "Su reserva se canceló porque no se completó el pago a tiempo.")
+
+
+def fire(reservation_id):
+    """Atiende los eventos vencidos de una reserva y retorna su próximo vencimiento."""
+    reservation = Reservation.objects.select_related('parking_lot').filter(id=reservation_id).first()
+    if reservation is None:
+        return None
+    now = timezone.now()
+    for kind, due in reservation.due_events(now):
+        if due <= now and kind in HANDLERS:
+            HANDLERS[kind](reservation, now)
+    next_due = reservation.next_due(now, after=now)
+    # update() y no save(): no se dispara la señal que la reprogramaría
+    Reservation.objects.filter(id=reservation_id).update(next_due_at=next_due)
+    return next_due
+
+
+class Scheduler:
+    current = None  # el planificador activo en este proceso, para las señales
+
+    def __init__(self, workers=WORKERS, tick=TICK):
+        self.wheel = TimerWheel(time.time(), tick=tick)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._in_flight = set()
+        self._last_reload = None
+
+    def schedule(self, reservation_id, due):
+        with self._lock:
+            if due is None:
+                self.wheel.cancel(reservation_id)
+            elif reservation_id not in self._in_flight and due.timestamp() <= time.time() + LOOKAHEAD:
+                self.wheel.schedule(reservation_id, due.timestamp())
+            else:
+                # lo cargará la recarga periódica cuando se acerque
+                self.wheel.cancel(reservation_id)
+
+    def reload(self):
+        """Carga las reservas que vencen dentro de LOOKAHEAD, por el índice de next_due_at."""
+        horizon = timezone.now() + timedelta(seconds=LOOKAHEAD)
+        rows = Reservation.objects.filter(next_due_at__lte=horizon).values_list('id', 'next_due_at')
+        for reservation_id, due in rows.iterator(chunk_size=2000):
+            self.schedule(reservation_id, due)
+        self._last_reload = time.monotonic()
+
+    def _run_one(self, reservation_id):
+        try:
+            next_due = fire(reservation_id)
+        except Exception:
+            logger.exception("Falló el evento programado de la reserva %s", reservation_id)
+            next_due = None
+        finally:
+            close_old_connections()
+        with self._lock:
+            self._in_flight.discard(reservation_id)
+        self.schedule(reservation_id, next_due)
+
+    def run_pending(self):
+        if self._last_reload is None or time.monotonic() - self._last_reload >= RELOAD_INTERVAL:
+            self.reload()
+        with self._lock:
+            due = self.wheel.advance(time.time())
+            for reservation_id, _ in due:
+                self._in_flight.add(reservation_id)
+        for reservation_id, _ in due:
+            self.pool.submit(self._run_one, reservation_id)
+        return len(due)
+
+    def run_forever(self):
+        Scheduler.current = self
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_pending()
+                except Exception:
+                    logger.exception("Error en el ciclo del planificador")
+                finally:
+                    close_old_connections()
+                self._stop.wait(self.wheel.tick)
+        finally:
+            Scheduler.current = None
+            self.pool.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+
+
+@receiver(post_save, sender=Reservation)
+def reschedule_reservation(sender, instance, **kwargs):
+    scheduler = Scheduler.current
+    if scheduler is not None:
+        scheduler.schedule(instance.id, instance.next_due_at)
+
+
+@receiver(post_delete, sender=Reservation)
+def unschedule_reservation(sender, instance, **kwargs):
+    scheduler = Scheduler.current
+    if scheduler is not None:
+        scheduler.schedule(instance.id, None)
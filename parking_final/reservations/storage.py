@@ -0,0 +1,55 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # opcional: sin el paquete solo se generan .gz
+    brotli = None
+
+# Solo vale la pena comprimir texto; imágenes y fuentes ya vienen comprimidas.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml')
+# Si la variante no ahorra al menos esto, no se escribe.
+MIN_SAVING = 0.05
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage que, al terminar collectstatic, deja junto a
+    cada archivo de texto su versión .gz (y .br si brotli está instalado)
+    para que StaticAssetMiddleware las sirva sin comprimir en cada petición.
+    """
+
+    # Sin manifiesto (collectstatic no se ha corrido) {% static %} devuelve
+    # el nombre original en lugar de fallar con un error 500.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set()
+        for name, hashed_name in self.hashed_files.items():
+            names.add(name)
+            names.add(hashed_name)
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        # mtime=0 para que el .gz sea idéntico entre despliegues
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                tmp_path = f'{path}{suffix}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path + suffix)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
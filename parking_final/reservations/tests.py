@@ -1,3 +1,745 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import admin as reservations_admin
+from . import benchmark, datagen, gate, profiling, scheduler, timerwheel
+from .management.commands import profile_report
+from .middleware import ProfilingMiddleware
+from .models import GateEvent, Notification, ParkingLot, Payment, Reservation, free_spaces
+from .plates import normalize_plate
+
+
+class StaticAssetTests(TestCase):
+    """collectstatic con el almacenamiento comprimido y StaticAssetMiddleware."""
+
+    BOOTSTRAP = 'reservations/vendor/bootstrap-5.1.3/js/bootstrap.min.js'
+    POPPER = 'reservations/vendor/popper-2.10.2/umd/popper.min.js'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.static_root = tempfile.mkdtemp(prefix='static-test-')
+        cls.addClassCleanup(shutil.rmtree, cls.static_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root))
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def get(self, path, **headers):
+        response = self.client.get(path, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_page_loads_popper_before_bootstrap(self):
+        html = self.get(reverse('home')).content.decode()
+        popper, bootstrap = staticfiles_storage.url(self.POPPER), staticfiles_storage.url(self.BOOTSTRAP)
+        self.assertNotEqual(popper, '/static/' + self.POPPER)  # nombre con hash del manifiesto
+        self.assertLess(html.index(popper), html.index(bootstrap))
+
+    def test_hashed_asset_is_immutable_and_compressed(self):
+        url = staticfiles_storage.url(self.BOOTSTRAP)
+        response = self.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.startswith(b'/*!\n  * Bootstrap v5.1.3'))
+
+        response = self.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unhashed_name_is_revalidated(self):
+        response = self.get('/static/' + self.POPPER)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.get('/static/' + self.POPPER, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_falls_through(self):
+        self.assertEqual(self.get('/static/reservations/no-existe.js').status_code, 404)
+        self.assertEqual(self.get('/static/../manage.py').status_code, 404)
+
+
+@override_settings(GATE_API_TOKEN='secreto')
+class GateEventsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=2, hourly_rate=Decimal('3000'))
+
+    def post(self, body):
+        with mock.patch.object(gate.buffer, 'add') as add:
+            response = self.client.post(
+                reverse('gate_events'), json.dumps(body), content_type='application/json',
+                HTTP_AUTHORIZATION='Bearer secreto',
+            )
+        return response, add
+
+    def test_accepts_valid_events(self):
+        response, add = self.post({'parking_lot': self.lot.id, 'events': [
+            {'direction': 'entry', 'access_code': 'abc'},
+            {'direction': 'exit', 'license_plate': 'abc-123', 'timestamp': '2026-01-01T10:00:00'},
+        ]})
+        self.assertEqual(response.status_code, 202)
+        events = add.call_args.args[0]
+        self.assertEqual([e.plate_key for e in events], ['', 'ABC123'])
+        self.assertEqual({e.parking_lot_id for e in events}, {self.lot.id})
+
+    def test_rejects_wrong_types_per_event(self):
+        response, add = self.post({'parking_lot': self.lot.id, 'events': [
+            {'direction': 'entry', 'license_plate': 123},
+            {'direction': 'entry', 'access_code': 456},
+            {'direction': 'entry', 'access_code': 'ok', 'parking_lot': True},
+            {'direction': 'entry', 'access_code': 'x' * 65},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.json()['errors']], [0, 1, 2, 3])
+        add.assert_not_called()
+
+    def test_rejects_non_integer_default_lot(self):
+        response, add = self.post({'parking_lot': [self.lot.id], 'events': [
+            {'direction': 'entry', 'access_code': 'abc'},
+            {'direction': 'entry', 'access_code': 'abc', 'parking_lot': self.lot.id},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.json()['errors']], [0])
+        add.assert_not_called()
+
+    def test_requires_token(self):
+        response = self.client.post(reverse('gate_events'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class NearestParkingViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ParkingLot.objects.create(
+            name="Centro", address="Calle 1", total_spaces=2, hourly_rate=Decimal('3000'),
+            latitude=Decimal('4.6097'), longitude=Decimal('-74.0817'),
+        )
+        cls.user = User.objects.create_user('conductor')
+
+    def test_requires_login(self):
+        response = self.client.get(reverse('nearest_parking'), {'lat': 4.61, 'lng': -74.08})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_returns_nearest_lots(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('nearest_parking'), {'lat': 4.61, 'lng': -74.08})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([lot['name'] for lot in response.json()['results']], ['Centro'])
+
+
+class ReservationForPlateTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=5, hourly_rate=Decimal('3000'))
+        user = User.objects.create_user('conductor')
+        self.reservations = {
+            plate: Reservation.objects.create(
+                user=user, parking_lot=lot, license_plate=plate,
+                start_time=now + timedelta(days=days), end_time=now + timedelta(days=days, hours=1),
+            )
+            for plate, days in [('abc 123', 1), ('ABC-123', 2), ('ABC-1234', 3)]
+        }
+
+    def test_matches_any_spelling(self):
+        older, newer = self.reservations['abc 123'], self.reservations['ABC-123']
+        self.assertEqual(list(Reservation.objects.for_plate('a.b.c-123')), [newer, older])
+        self.assertEqual(older.plate_key, 'ABC123')
+        self.assertFalse(Reservation.objects.for_plate(' - ').exists())
+
+    def test_plate_key_follows_license_plate(self):
+        reservation = self.reservations['ABC-1234']
+        reservation.license_plate = 'xyz 9'
+        reservation.save(update_fields=['license_plate'])
+        self.assertEqual(list(Reservation.objects.for_plate('XYZ-9')), [reservation])
+        self.assertFalse(Reservation.objects.for_plate('ABC1234').exists())
+
+    def test_uses_plate_index(self):
+        self.assertIn('reservation_plate_start_idx', Reservation.objects.for_plate('ABC123').explain())
+
+
+class SaveEventsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=2, hourly_rate=Decimal('3000'))
+        self.user = User.objects.create_user('conductor')
+        self.reservation = Reservation.objects.create(
+            user=self.user, parking_lot=self.lot, license_plate='ABC-123',
+            start_time=self.now + timedelta(minutes=10), end_time=self.now + timedelta(hours=2),
+            status='confirmed',
+        )
+
+    def event(self, direction, **kwargs):
+        data = {'direction': direction, 'occurred_at': self.now, **kwargs}
+        return gate.build_event(data, self.lot.id, self.now)
+
+    def state(self):
+        self.lot.refresh_from_db()
+        self.reservation.refresh_from_db()
+        return self.reservation.status, self.lot.current_occupancy
+
+    def test_entry_and_exit_by_access_code(self):
+        gate.save_events([self.event('entry', access_code=self.reservation.access_code)])
+        self.assertEqual(self.state(), ('active', 1))
+        gate.save_events([self.event('exit', access_code=self.reservation.access_code)])
+        self.assertEqual(self.state(), ('completed', 0))
+        self.assertIsNone(self.reservation.next_due_at)
+        self.assertEqual(GateEvent.objects.filter(reservation=self.reservation).count(), 2)
+
+    def test_match_by_plate(self):
+        gate.save_events([self.event('entry', license_plate='abc 123')])
+        self.assertEqual(self.state(), ('active', 1))
+
+    def test_repeated_events_do_not_move_occupancy(self):
+        code = self.reservation.access_code
+        gate.save_events([self.event('entry', access_code=code), self.event('entry', access_code=code)])
+        self.assertEqual(self.state(), ('active', 1))
+        gate.save_events([self.event('entry', access_code=code)])
+        self.assertEqual(self.state(), ('active', 1))
+        gate.save_events([self.event('exit', access_code=code)])
+        gate.save_events([self.event('exit', access_code=code)])
+        self.assertEqual(self.state(), ('completed', 0))
+        # los reenvíos quedan registrados
+        self.assertEqual(GateEvent.objects.count(), 5)
+
+    def test_reentry_with_completed_reservation(self):
+        code = self.reservation.access_code
+        occupancy = []
+        for direction in ['entry', 'exit', 'entry', 'exit']:
+            gate.save_events([self.event(direction, access_code=code)])
+            occupancy.append(self.state()[1])
+        self.assertEqual(occupancy, [1, 0, 1, 0])
+        self.assertEqual(self.reservation.status, 'completed')
+        # un reenvío de la salida después de la segunda vuelta no resta
+        gate.save_events([self.event('exit', access_code=code)])
+        self.assertEqual(self.state(), ('completed', 0))
+
+    def test_occupancy_stays_within_capacity(self):
+        gate.save_events([self.event('entry', license_plate=f'XYZ{i}') for i in range(5)])
+        self.assertEqual(self.state(), ('confirmed', 2))
+        gate.save_events([self.event('exit', license_plate=f'XYZ{i}') for i in range(5)])
+        self.assertEqual(self.state(), ('confirmed', 0))
+
+    def test_code_from_another_lot_is_not_matched(self):
+        other = ParkingLot.objects.create(name="Norte", address="Calle 2", total_spaces=5, hourly_rate=Decimal('2000'))
+        event = gate.build_event(
+            {'direction': 'entry', 'access_code': self.reservation.access_code, 'occurred_at': self.now},
+            other.id, self.now,
+        )
+        gate.save_events([event])
+        self.assertEqual(self.state(), ('confirmed', 0))
+        other.refresh_from_db()
+        self.assertEqual(other.current_occupancy, 1)
+
+
+class AvailableSpacesTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=5, hourly_rate=Decimal('3000'))
+        self.user = User.objects.create_user('conductor')
+        # llegó hace poco su hora: guarda el cupo aunque aún no entra
+        self.arriving = self.reserve('AAA111', -timedelta(minutes=10))
+        # pasó NO_SHOW_GRACE sin llegar: ya no guarda cupo
+        self.reserve('BBB222', -timedelta(minutes=40))
+        self.later = self.reserve('CCC333', timedelta(hours=3))
+
+    def reserve(self, plate, start):
+        return Reservation.objects.create(
+            user=self.user, parking_lot=self.lot, license_plate=plate, status='confirmed',
+            start_time=self.now + start, end_time=self.now + start + timedelta(hours=2),
+        )
+
+    def pass_gate(self, direction, **data):
+        gate.save_events([gate.build_event({'direction': direction, **data}, self.lot.id, timezone.now())])
+        self.lot.refresh_from_db()
+
+    def spaces(self):
+        now = timezone.now()
+        later = self.later.start_time
+        free = free_spaces([self.lot], now, now + timedelta(hours=1))[self.lot.id]
+        free_later = free_spaces([self.lot], later, later + timedelta(hours=1))[self.lot.id]
+        return self.lot.available_spaces(), free, free_later
+
+    def test_counts_follow_gate_events(self):
+        self.assertEqual(self.spaces(), (4, 4, 4))
+        # un vehículo sin reserva ocupa ahora, no dentro de tres horas
+        self.pass_gate('entry', license_plate='ZZZ999')
+        self.assertEqual(self.spaces(), (3, 3, 4))
+        # al entrar, la reserva pasa de cupo guardado a vehículo dentro: no se cuenta dos veces
+        self.pass_gate('entry', access_code=self.arriving.access_code)
+        self.assertEqual(self.lot.current_occupancy, 2)
+        self.assertEqual(self.spaces(), (3, 3, 4))
+        self.pass_gate('exit', access_code=self.arriving.access_code)
+        self.assertEqual(self.spaces(), (4, 4, 4))
+        self.pass_gate('exit', license_plate='ZZZ999')
+        self.assertEqual(self.spaces(), (5, 5, 4))
+
+    def test_full_lot_has_no_space(self):
+        for i in range(6):
+            self.pass_gate('entry', license_plate=f'WAL{i}')
+        self.assertEqual(self.lot.current_occupancy, 5)
+        self.assertEqual(self.spaces(), (0, 0, 4))
+
+
+class GateEventBufferTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=10, hourly_rate=Decimal('3000'))
+
+    def test_failed_chunk_is_retried(self):
+        buffer = gate.GateEventBuffer(batch_size=2)
+        # sin add(), para no arrancar el hilo del búfer
+        buffer._events = [
+            gate.build_event({'direction': 'entry', 'license_plate': f'AAA{i}'}, self.lot.id, self.now)
+            for i in range(5)
+        ]
+        real_save = gate.save_events
+        calls = []
+
+        def flaky_save(events):
+            calls.append(len(events))
+            if len(calls) == 2:
+                # escribe y falla dentro de la transacción, que se revierte
+                with transaction.atomic():
+                    real_save(events)
+                    raise DatabaseError("base caída")
+            real_save(events)
+
+        with mock.patch.object(gate, 'save_events', flaky_save), self.assertLogs('reservations.gate', 'ERROR'):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(len(buffer._events), 3)
+        self.assertTrue(all(e.pk is None for e in buffer._events))
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(buffer._events, [])
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.current_occupancy, 5)
+        self.assertEqual(GateEvent.objects.count(), 5)
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=10, hourly_rate=Decimal('3000'))
+        self.user = User.objects.create_user('conductor')
+
+    def reserve(self, status='confirmed', start=timedelta(hours=3), hours=2):
+        return Reservation.objects.create(
+            user=self.user, parking_lot=self.lot, license_plate='ABC123', status=status,
+            start_time=self.now + start, end_time=self.now + start + timedelta(hours=hours),
+        )
+
+    def overdue_hold(self):
+        reservation = self.reserve(status='pending')
+        # como si llevara 20 minutos sin pagarse
+        Reservation.objects.filter(id=reservation.id).update(created_at=self.now - timedelta(minutes=20))
+        reservation.refresh_from_db()
+        return reservation
+
+    def new_scheduler(self):
+        sched = scheduler.Scheduler(workers=1)
+        self.addCleanup(sched.pool.shutdown, wait=True)
+        return sched
+
+    def test_save_recomputes_next_due_at(self):
+        reservation = self.reserve(status='pending')
+        self.assertAlmostEqual(reservation.next_due_at, reservation.created_at + timedelta(minutes=15),
+                               delta=timedelta(seconds=1))
+        reservation.status = 'confirmed'
+        reservation.save(update_fields=['status'])
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.next_due_at, reservation.start_time - timedelta(minutes=30))
+        reservation.end_time = reservation.start_time + timedelta(hours=1)
+        reservation.status = 'active'
+        reservation.save(update_fields=['status', 'end_time'])
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.next_due_at, reservation.end_time + timedelta(minutes=10))
+        reservation.status = 'completed'
+        reservation.save(update_fields=['status'])
+        reservation.refresh_from_db()
+        self.assertIsNone(reservation.next_due_at)
+
+    def test_hold_expiry_cancels_once(self):
+        reservation = self.overdue_hold()
+        self.assertIsNone(scheduler.fire(reservation.id))
+        reservation.refresh_from_db()
+        self.assertEqual((reservation.status, reservation.next_due_at), ('cancelled', None))
+        scheduler.fire(reservation.id)
+        self.assertEqual(list(Notification.objects.values_list('reservation_id', 'kind')),
+                         [(reservation.id, 'hold_expiry')])
+
+    def test_hold_paid_meanwhile_is_kept(self):
+        reservation = self.overdue_hold()
+        # el pago llega desde la web después de que el planificador leyó la reserva
+        Reservation.objects.filter(id=reservation.id).update(status='confirmed')
+        scheduler.expire_hold(reservation, self.now)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'confirmed')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_due_reminder_fires_and_schedules_overstay(self):
+        reservation = self.reserve(start=timedelta(minutes=20))
+        self.assertEqual(scheduler.fire(reservation.id), reservation.end_time + timedelta(minutes=10))
+        self.assertEqual(list(Notification.objects.values_list('kind', flat=True)), ['reminder'])
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.next_due_at, reservation.end_time + timedelta(minutes=10))
+        # la revisión de exceso de tiempo no avisa si el vehículo nunca entró
+        Reservation.objects.filter(id=reservation.id).update(end_time=self.now - timedelta(minutes=20))
+        self.assertIsNone(scheduler.fire(reservation.id))
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_reload_sees_rows_changed_by_another_process(self):
+        sched = self.new_scheduler()
+        reservation = self.reserve(start=timedelta(days=1))
+        sched.reload()
+        self.assertNotIn(reservation.id, sched.wheel)
+        # la web (otro proceso, sin señales hacia este planificador) la adelanta
+        Reservation.objects.filter(id=reservation.id).update(next_due_at=self.now - timedelta(seconds=1))
+        sched.reload()
+        self.assertIn(reservation.id, sched.wheel)
+        # una entrada que quedó vieja solo recalcula el vencimiento, sin avisar
+        self.assertEqual(scheduler.fire(reservation.id), reservation.start_time - timedelta(minutes=30))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_signal_reschedules_in_process(self):
+        sched = self.new_scheduler()
+        scheduler.Scheduler.current = sched
+        self.addCleanup(setattr, scheduler.Scheduler, 'current', None)
+        # el recordatorio vence en 20 segundos, dentro de la ventana de la rueda
+        reservation = self.reserve(start=timedelta(minutes=30, seconds=20))
+        self.assertIn(reservation.id, sched.wheel)
+        reservation.status = 'cancelled'
+        reservation.save(update_fields=['status'])
+        self.assertNotIn(reservation.id, sched.wheel)
+
+
+class RunSchedulerCommandTests(TransactionTestCase):
+    def test_once_fires_due_reservations(self):
+        now = timezone.now()
+        lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=10, hourly_rate=Decimal('3000'))
+        user = User.objects.create_user('conductor')
+        reservations = [
+            Reservation.objects.create(
+                user=user, parking_lot=lot, license_plate=f'ABC{i}', status='pending',
+                start_time=now + timedelta(hours=1), end_time=now + timedelta(hours=2),
+            )
+            for i in range(3)
+        ]
+        Reservation.objects.filter(id__in=[r.id for r in reservations[:2]]).update(
+            created_at=now - timedelta(minutes=20), next_due_at=now - timedelta(minutes=5),
+        )
+        out = StringIO()
+        # un solo hilo: la base de pruebas en memoria usa la caché compartida de
+        # SQLite, que bloquea por tabla entre conexiones
+        call_command('run_scheduler', '--once', '--workers', '1', stdout=out)
+        self.assertIn("2 reservas", out.getvalue())
+        self.assertEqual(
+            dict(Reservation.objects.values_list('id', 'status')),
+            {reservations[0].id: 'cancelled', reservations[1].id: 'cancelled', reservations[2].id: 'pending'},
+        )
+        self.assertEqual(Notification.objects.filter(kind='hold_expiry').count(), 2)
+
+
+def slow_view(request):
+    User.objects.filter(username='nadie').exists()
+    time.sleep(0.1)
+    return HttpResponse("lento")
+
+
+def fast_view(request):
+    return HttpResponse("rápido")
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix='profiles-')
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.factory = RequestFactory()
+
+    def middleware(self, view, **overrides):
+        options = {'PROFILING_ENABLED': True, 'PROFILING_DIR': self.dir, **overrides}
+        with override_settings(**options):
+            middleware = ProfilingMiddleware(view)
+        # profiles_dir() se lee al guardar, no al crear el middleware
+        self.enterContext(override_settings(PROFILING_DIR=self.dir))
+        return middleware
+
+    def captures(self):
+        return list(profiling.load_captures(self.dir))
+
+    def test_disabled_by_default(self):
+        with override_settings(PROFILING_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(fast_view)
+
+    def test_only_slow_requests_are_saved(self):
+        middleware = self.middleware(lambda request: (fast_view if request.path == '/rapida/' else slow_view)(request),
+                                     PROFILING_SLOW_MS=50)
+        response = middleware(self.factory.get('/rapida/'))
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(self.captures(), [])
+
+        response = middleware(self.factory.get('/lenta/'))
+        [capture] = self.captures()
+        self.assertEqual(response.headers['X-Profile-Id'], capture['id'])
+        self.assertEqual((capture['path'], capture['trigger'], capture['mode']), ('/lenta/', 'slow', 'sample'))
+        self.assertGreaterEqual(capture['duration_ms'], 50)
+        self.assertEqual(capture['query_count'], 1)
+        self.assertIn('auth_user', capture['queries'][0]['sql'])
+        # time.sleep es de C: la hoja de las pilas muestreadas es la vista
+        self.assertTrue(any(stack.endswith(';reservations/tests.py:slow_view') for stack in capture['stacks']))
+
+    def test_token_header_with_cprofile(self):
+        middleware = self.middleware(slow_view, PROFILING_TOKEN='secreto')
+        response = middleware(self.factory.get('/x/', HTTP_X_PROFILE='otro'))
+        self.assertNotIn('X-Profile-Id', response.headers)
+        response = middleware(self.factory.get('/x/', HTTP_X_PROFILE='secreto', HTTP_X_PROFILE_MODE='cprofile'))
+        capture_id = response.headers['X-Profile-Id']
+        [capture] = self.captures()
+        self.assertEqual((capture['trigger'], capture['mode']), ('header', 'cprofile'))
+        self.assertIn('reservations/tests.py:slow_view', [row[0] for row in capture['functions']])
+        self.assertTrue(os.path.exists(os.path.join(self.dir, f"{capture_id}.prof")))
+
+    def test_old_captures_are_trimmed(self):
+        middleware = self.middleware(fast_view, PROFILING_TOKEN='secreto')
+        ids = [middleware(self.factory.get(f'/{i}/', HTTP_X_PROFILE='secreto')).headers['X-Profile-Id'] for i in range(4)]
+        profiling.trim_captures(self.dir, max_captures=2)
+        self.assertEqual([c['id'] for c in self.captures()], ids[2:])
+
+    def test_report_sums_functions_and_sql(self):
+        middleware = self.middleware(slow_view, PROFILING_SLOW_MS=50)
+        middleware(self.factory.get('/lenta/'))
+        middleware(self.factory.get('/lenta/'))
+        folded = os.path.join(self.dir, 'pilas.txt')
+        out = StringIO()
+        call_command('profile_report', '--dir', self.dir, '--folded', folded, stdout=out)
+        report = out.getvalue()
+        self.assertIn(f"2 capturas en {self.dir}", report)
+        self.assertRegex(report, r'\n\s+[\d.]+\s+[\d.]+\s+2  reservations/tests.py:slow_view\n')
+        # las dos consultas se agrupan en una sola línea con el literal normalizado
+        self.assertRegex(report, r'\n\s+[\d.]+\s+2  SELECT .*"auth_user"')
+        with open(folded, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+        out = StringIO()
+        call_command('profile_report', '--dir', self.dir, '--path', '/otra/', stdout=out)
+        self.assertIn("Sin capturas", out.getvalue())
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            profile_report.normalize_sql("SELECT 1 FROM t WHERE a = 'x''y' AND b IN (%s, %s, %s) AND c = 42"),
+            "SELECT ? FROM t WHERE a = ? AND b IN (...) AND c = ?",
+        )
+
+
+# el admin se renderiza sin collectstatic, así que sin el manifiesto
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ReservationAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        lot = ParkingLot.objects.create(name="Centro", address="Calle 1", total_spaces=10, hourly_rate=Decimal('3000'))
+        now = timezone.now()
+        cls.reservations = [
+            Reservation.objects.create(
+                user=cls.admin, parking_lot=lot, license_plate=plate, status=status,
+                start_time=now + timedelta(hours=1), end_time=now + timedelta(hours=2),
+            )
+            for plate, status in [('ABC-123', 'confirmed'), ('XYZ-999', 'pending'), ('ABC-124', 'confirmed')]
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:reservations_reservation_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def found(self, term):
+        return sorted(r.id for r in self.changelist(q=term).result_list)
+
+    def test_search_is_exact(self):
+        first, _, last = self.reservations
+        self.assertEqual(self.found('abc 123'), [first.id])
+        self.assertEqual(self.found(first.access_code), [first.id])
+        self.assertEqual(self.found(str(last.id)), [last.id])
+        # sin LIKE: una placa parcial no trae nada
+        self.assertEqual(self.found('ABC'), [])
+
+    def test_count_is_estimated_on_large_tables(self):
+        self.reservations[1].delete()
+        # sin filtros, el estimado de SQLite es el id más alto aunque haya borrados
+        with mock.patch.object(reservations_admin, 'EXACT_COUNT_LIMIT', 2):
+            self.assertEqual(self.changelist().result_count, self.reservations[2].id)
+            self.assertEqual(self.changelist(status__exact='confirmed').result_count, 2)
+        self.assertEqual(self.changelist().result_count, 2)
+
+    def test_estimate_table_rows(self):
+        self.assertEqual(reservations_admin.estimate_table_rows(Reservation), self.reservations[2].id)
+        self.assertEqual(reservations_admin.estimate_table_rows(GateEvent), 0)
+
+
+class GenerateDataTests(TestCase):
+    BASE = datetime(2026, 3, 2, 12, tzinfo=dt_timezone.utc)
+
+    def indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s",
+                           [Reservation._meta.db_table])
+            return sorted(cursor.fetchall())
+
+    def test_rows_follow_the_model_rules(self):
+        before = self.indexes()
+        result = datagen.generate(lots=3, users=5, reservations=60, seed=7, base_time=self.BASE, chunk_size=25)
+        # la carga supera la tabla vacía: los índices se quitan y se vuelven a crear
+        self.assertEqual(self.indexes(), before)
+        self.assertEqual(result['counts'], {
+            'parking_lots': 3, 'users': 5, 'reservations': 60, 'payments': Payment.objects.count(),
+        })
+        self.assertEqual(sorted(result['lot_ids']), sorted(ParkingLot.objects.values_list('id', flat=True)))
+        self.assertEqual(Reservation.objects.count(), 60)
+        for reservation in Reservation.objects.select_related('parking_lot'):
+            self.assertEqual(reservation.plate_key, normalize_plate(reservation.license_plate))
+            self.assertEqual(reservation.total_amount, reservation.calculate_total().quantize(Decimal('0.01')))
+            self.assertEqual(reservation.next_due_at, reservation.next_due(self.BASE))
+        self.assertFalse(Payment.objects.exclude(amount=F('reservation__total_amount')).exists())
+
+    def test_same_seed_same_rows(self):
+        fields = ['license_plate', 'start_time', 'end_time', 'status', 'access_code']
+        datagen.generate(lots=2, users=3, reservations=20, seed=3, base_time=self.BASE)
+        first = list(Reservation.objects.order_by('id').values_list(*fields))
+        Reservation.objects.all().delete()
+        datagen.generate(lots=2, users=3, reservations=20, seed=3, base_time=self.BASE, fast=False)
+        self.assertEqual(list(Reservation.objects.order_by('id').values_list(*fields)), first)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_data', '--lots', '2', '--users', '3', '--reservations', '10',
+                     '--base-time', '2026-03-02T12:00', stdout=out)
+        self.assertIn("filas generadas", out.getvalue())
+        self.assertEqual(Reservation.objects.count(), 10)
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--future-share', '2', stdout=StringIO())
+
+
+class GenerateDataPragmaTests(TransactionTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_restored(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous=1')
+        cache_size = self.pragma('cache_size')
+        during = []
+        datagen.generate(lots=2, users=3, reservations=10, seed=1,
+                         log=lambda message: during.append(self.pragma('synchronous')))
+        self.assertEqual(set(during), {0})
+        self.assertEqual((self.pragma('synchronous'), self.pragma('cache_size')), (1, cache_size))
+        self.assertEqual(Reservation.objects.count(), 10)
+
+
+class BenchmarkFlowTests(SimpleTestCase):
+    def test_compare_to_baseline(self):
+        step = {'p95_ms': 10.0, 'queries_per_request': 4, 'errors': 0}
+        baseline = {'requests_per_s': 100.0, 'steps': {'reserve': step}}
+        same = {'requests_per_s': 90.0, 'steps': {'reserve': dict(step, p95_ms=11.0)}}
+        self.assertEqual(benchmark.compare_to_baseline(same, baseline, 0.2), [])
+        worse = {'requests_per_s': 70.0, 'steps': {'reserve': dict(step, queries_per_request=5, errors=1)}}
+        self.assertEqual(len(benchmark.compare_to_baseline(worse, baseline, 0.2)), 3)
+
+    def test_small_scale_smoke(self):
+        # en otro proceso: run_benchmark crea y destruye su propia base de pruebas
+        tmpdir = tempfile.mkdtemp(prefix='bench-test-')
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        baseline = os.path.join(tmpdir, 'small.json')
+        subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark_flow', '--scale', 'small', '--workers', '2',
+             '--iterations', '1', '--fast-hashers', '--save-baseline', '--baseline', baseline],
+            cwd=settings.BASE_DIR, check=True, capture_output=True, timeout=300,
+        )
+        result = benchmark.load_baseline(baseline)
+        self.assertEqual(result['requests'], 2 * len(benchmark.STEPS))
+        self.assertEqual({step: s['errors'] for step, s in result['steps'].items()},
+                         dict.fromkeys(benchmark.STEPS, 0))
+
+
+class TimerWheelTests(SimpleTestCase):
+    def test_fires_at_the_due_tick(self):
+        wheel = timerwheel.TimerWheel(now=1000)
+        wheel.schedule('a', 1005, 'pago')
+        wheel.schedule('b', 1010.5)  # se redondea al tick siguiente
+        self.assertEqual(len(wheel), 2)
+        self.assertEqual(wheel.due_at('b'), 1011)
+        self.assertEqual(wheel.advance(1004.9), [])
+        self.assertEqual(wheel.advance(1005), [('a', 'pago')])
+        self.assertEqual(wheel.advance(1010.9), [])
+        self.assertEqual(wheel.advance(1011), [('b', None)])
+        self.assertEqual(len(wheel), 0)
+
+    def test_past_timestamps_fire_on_next_advance(self):
+        wheel = timerwheel.TimerWheel(now=1000)
+        wheel.schedule('tarde', 900)
+        self.assertEqual(wheel.advance(1000), [('tarde', None)])
+
+    def test_cascades_through_every_level(self):
+        start = 12345
+        wheel = timerwheel.TimerWheel(now=start)
+        deltas = [1, 63, 64, 65, 4095, 4096, 4097, 64 * 4096 - 1, 64 * 4096, 64 * 4096 + 3000]
+        for delta in deltas:
+            wheel.schedule(delta, start + delta)
+        # justo antes de cada vencimiento no sale nada; en el tick exacto, solo ese
+        for delta in deltas:
+            self.assertEqual(wheel.advance(start + delta - 1), [], delta)
+            self.assertEqual(wheel.advance(start + delta), [(delta, None)])
+        self.assertEqual(len(wheel), 0)
+
+    def test_far_timers_wait_in_overflow(self):
+        wheel = timerwheel.TimerWheel(now=0)
+        far = 1 << (timerwheel.BITS * timerwheel.LEVELS)
+        wheel.schedule('lejos', far + 10)
+        self.assertIn('lejos', wheel.overflow)
+        self.assertEqual(wheel.due_at('lejos'), far + 10)
+        self.assertTrue(wheel.cancel('lejos'))
+        self.assertEqual(wheel.overflow, {})
+
+    def test_cancel_and_reschedule(self):
+        wheel = timerwheel.TimerWheel(now=0)
+        wheel.schedule('a', 100)
+        wheel.schedule('b', 5000)
+        self.assertTrue(wheel.cancel('a'))
+        self.assertFalse(wheel.cancel('a'))
+        self.assertNotIn('a', wheel)
+        wheel.schedule('b', 50, 'antes')  # reprogramar reemplaza al anterior
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(50), [('b', 'antes')])
+        self.assertEqual(wheel.advance(6000), [])
@@ -0,0 +1,98 @@
+"""
+Rueda de temporizadores jerárquica (Varghese y Lauck).
+
+El tiempo avanza en ticks de `tick` segundos. El nivel 0 tiene SLOTS
+casillas de un tick; cada nivel superior tiene SLOTS casillas que abarcan
+un nivel inferior completo. Un temporizador se guarda en el nivel más bajo
+cuyo bloque comparte con el tick actual, y cuando el tiempo llega a su
+casilla baja a un nivel inferior, a lo sumo LEVELS veces. Agregar, cancelar
+y disparar cuestan O(1) por temporizador, sin importar cuántos haya.
+"""
+
+import math
+
+BITS = 6
+SLOTS = 1 << BITS  # 64
+MASK = SLOTS - 1
+LEVELS = 4  # 64 ticks, ~68 min, ~3 días y ~194 días con ticks de un segundo
+
+
+class TimerWheel:
+    def __init__(self, now, tick=1.0):
+        self.tick = tick
+        self.current = self._to_tick(now)
+        self.levels = [[{} for _ in range(SLOTS)] for _ in range(LEVELS)]
+        # más allá del último nivel; se redistribuye al empezar cada vuelta completa
+        self.overflow = {}
+        self.ready = {}
+        self._where = {}  # clave → (casilla, tick de vencimiento)
+
+    def _to_tick(self, timestamp):
+        return math.ceil(timestamp / self.tick)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def due_at(self, key):
+        """Tick de vencimiento de `key` pasado a segundos, o None."""
+        entry = self._where.get(key)
+        return entry[1] * self.tick if entry else None
+
+    def schedule(self, key, timestamp, payload=None):
+        """Programa (o reprograma) `key` para `timestamp` en segundos."""
+        self.cancel(key)
+        self._place(key, self._to_tick(timestamp), payload)
+
+    def cancel(self, key):
+        entry = self._where.pop(key, None)
+        if entry is not None:
+            entry[0].pop(key, None)
+            return True
+        return False
+
+    def _place(self, key, due, payload):
+        if due <= self.current:
+            bucket = self.ready
+        else:
+            for level in range(LEVELS):
+                shift = BITS * (level + 1)
+                if due >> shift == self.current >> shift:
+                    bucket = self.levels[level][(due >> (BITS * level)) & MASK]
+                    break
+            else:
+                bucket = self.overflow
+        bucket[key] = (due, payload)
+        self._where[key] = (bucket, due)
+
+    def _cascade(self, bucket):
+        entries = list(bucket.items())
+        bucket.clear()
+        for key, (due, payload) in entries:
+            self._place(key, due, payload)
+
+    def advance(self, now):
+        """Avanza hasta `now` y retorna [(clave, payload)] de lo que venció."""
+        fired = []
+        self._drain(self.ready, fired)
+        target = math.floor(now / self.tick)
+        while self.current < target:
+            self.current += 1
+            t = self.current
+            if t & ((1 << (BITS * LEVELS)) - 1) == 0:
+                self._cascade(self.overflow)
+            for level in range(LEVELS - 1, 0, -1):
+                if t & ((1 << (BITS * level)) - 1) == 0:
+                    self._cascade(self.levels[level][(t >> (BITS * level)) & MASK])
+            self._drain(self.levels[0][t & MASK], fired)
+            self._drain(self.ready, fired)
+        return fired
+
+    def _drain(self, bucket, fired):
+        if bucket:
+            for key, (due, payload) in bucket.items():
+                del self._where[key]
+                fired.append((key, payload))
+            bucket.clear()
@@ -5,6 +5,7 @@ from django.contrib.auth import views as auth_views
 urlpatterns = [
     path('', views.home, name='home'),  # ← ESTA ES LA PÁGINA PRINCIPAL
     path('parking/', views.parking_list, name='parking_list'),
+    path('parking/nearest/', views.nearest_parking, name='nearest_parking'),
     path('reserve/<int:parking_lot_id>/', views.create_reservation, name='create_reservation'),
     path('payment/<int:reservation_id>/', views.payment_view, name='payment'),
     path('qr-code/<int:reservation_id>/', views.qr_code_view, name='qr_code'),
@@ -13,4 +14,5 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('my-reservations/', views.user_reservations, name='user_reservations'),
     path('cancel-reservation/<int:reservation_id>/', views.cancel_reservation, name='cancel_reservation'),
+    path('gate/events/', views.gate_events, name='gate_events'),
 ]
\ No newline at end of file
@@ -2,25 +2,128 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib import messages
-from .models import ParkingLot, Reservation, Payment
+from .models import ParkingLot, Reservation, Payment, free_spaces
 from .forms import CustomUserCreationForm, ReservationForm, PaymentForm
 from django.utils import timezone  # ← AGREGAR ESTA IMPORTACIÓN
+import itertools
+import json
+import logging
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.urls import reverse
+from . import gate, geo
+
+logger = logging.getLogger(__name__)
 
 def home(request):
     return render(request, 'reservations/home.html')
 
+# Parqueaderos que muestra la lista cuando se ordena por cercanía
+NEAREST_LIST_SIZE = 20
+NEAREST_MAX_K = 50
+
+def _float_param(params, name, low, high):
+    try:
+        value = float(params.get(name, ''))
+    except ValueError:
+        return None
+    return value if low <= value <= high else None
+
 @login_required
 def parking_list(request):
-    parking_lots = ParkingLot.objects.filter(is_active=True)
+    lat = _float_param(request.GET, 'lat', -90, 90)
+    lng = _float_param(request.GET, 'lng', -180, 180)
+    if lat is not None and lng is not None:
+        nearest = list(itertools.islice(geo.get_index().iter_nearest(lat, lng), NEAREST_LIST_SIZE))
+        lots_by_id = ParkingLot.objects.filter(is_active=True).in_bulk([lot_id for _, lot_id in nearest])
+        parking_lots = []
+        for distance, lot_id in nearest:
+            if lot_id in lots_by_id:
+                lot = lots_by_id[lot_id]
+                lot.distance_km = distance
+                parking_lots.append(lot)
+    else:
+        parking_lots = list(ParkingLot.objects.filter(is_active=True).order_by('name'))
+    # disponibilidad de todos con una consulta en lugar de una por parqueadero
+    now = timezone.now()
+    free = free_spaces(parking_lots, now, now)
+    for lot in parking_lots:
+        lot.free_spaces = free[lot.id]
     return render(request, 'reservations/parking_list.html', {
-        'parking_lots': parking_lots
+        'parking_lots': parking_lots,
+        'by_distance': lat is not None and lng is not None,
     })
 
 @login_required
-def create_reservation(request, parking_lot_id):
+def nearest_parking(request):
+    """
+    GET ?lat=&lng=[&k=5][&start=&end=][&max_km=]: los k parqueaderos más
+    cercanos con cupo en la ventana (por defecto la próxima hora).
+    """
+    lat = _float_param(request.GET, 'lat', -90, 90)
+    lng = _float_param(request.GET, 'lng', -180, 180)
+    if lat is None or lng is None:
+        return JsonResponse({'error': "lat y lng son obligatorios y deben ser coordenadas válidas."}, status=400)
+    try:
+        k = int(request.GET.get('k', 5))
+    except ValueError:
+        k = 0
+    if not 1 <= k <= NEAREST_MAX_K:
+        return JsonResponse({'error': f"k debe estar entre 1 y {NEAREST_MAX_K}."}, status=400)
+    max_km = None
+    if request.GET.get('max_km'):
+        max_km = _float_param(request.GET, 'max_km', 0, 20_000)
+        if max_km is None:
+            return JsonResponse({'error': "max_km no es válido."}, status=400)
+
+    now = timezone.now()
+    window = {}
+    for name, default in (('start', now), ('end', None)):
+        raw = request.GET.get(name)
+        if not raw:
+            window[name] = default
+            continue
+        try:
+            value = parse_datetime(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            return JsonResponse({'error': f"{name} debe estar en formato ISO 8601."}, status=400)
+        window[name] = timezone.make_aware(value) if timezone.is_naive(value) else value
+    start = window['start']
+    end = window['end'] or start + timedelta(hours=1)
+    if end <= start:
+        return JsonResponse({'error': "end debe ser posterior a start."}, status=400)
 
-    print(f"DEBUG: Método: {request.method}")  # ← Agregar esto
-    print(f"DEBUG: POST data: {request.POST}")  # ← Agregar esto
+    results = geo.nearest_with_space(lat, lng, start, end, k=k, max_km=max_km)
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'results': [
+            {
+                'id': lot.id,
+                'name': lot.name,
+                'address': lot.address,
+                'latitude': float(lot.latitude),
+                'longitude': float(lot.longitude),
+                'distance_km': round(distance, 3),
+                'available_spaces': spaces,
+                'total_spaces': lot.total_spaces,
+                'hourly_rate': str(lot.hourly_rate),
+                'reserve_url': reverse('create_reservation', args=[lot.id]),
+            }
+            for lot, distance, spaces in results
+        ],
+    }, json_dumps_params={'ensure_ascii': False})
+
+@login_required
+def create_reservation(request, parking_lot_id):
+    logger.debug("create_reservation %s lote=%s", request.method, parking_lot_id)
     
     parking_lot = get_object_or_404(ParkingLot, id=parking_lot_id, is_active=True)
     
@@ -75,7 +178,8 @@ def payment_view(request, reservation_id):
                 reservation=reservation,
                 amount=reservation.total_amount,
                 payment_method=payment_method,
-                transaction_id=f"TXN{timezone.now().strftime('%Y%m%d%H%M%S')}",  # ← USAR timezone.now()
+                # El id de la reserva evita colisiones entre pagos del mismo segundo
+                transaction_id=f"TXN{timezone.now().strftime('%Y%m%d%H%M%S')}{reservation.id}",
                 status='completed'
             )
             
@@ -132,4 +236,90 @@ def cancel_reservation(request, reservation_id):
     else:
         messages.error(request, "No se puede cancelar esta reserva.")
     
-    return redirect('user_reservations')
\ No newline at end of file
+    return redirect('user_reservations')
+
+def _gate_token_ok(request):
+    token = settings.GATE_API_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and secrets.compare_digest(header.encode(), f"Bearer {token}".encode())
+
+def _valid_lot_id(value):
+    # bool es subclase de int, pero true/false no identifican un parqueadero
+    return value is None or (isinstance(value, int) and not isinstance(value, bool))
+
+def _parse_gate_event(data):
+    """Retorna (dict para gate.build_event, None) o (None, mensaje de error)."""
+    if not isinstance(data, dict):
+        return None, "Se esperaba un objeto."
+    if data.get('direction') not in ('entry', 'exit'):
+        return None, "direction debe ser 'entry' o 'exit'."
+    for field in ('access_code', 'license_plate'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return None, f"{field} debe ser un texto."
+    if len((data.get('access_code') or '').strip()) > 64:
+        return None, "access_code admite máximo 64 caracteres."
+    if not (data.get('access_code') or data.get('license_plate')):
+        return None, "Se requiere access_code o license_plate."
+    if not _valid_lot_id(data.get('parking_lot')):
+        return None, "parking_lot debe ser un entero."
+    occurred_at = None
+    if data.get('timestamp'):
+        try:
+            occurred_at = parse_datetime(str(data['timestamp']))
+        except ValueError:
+            occurred_at = None
+        if occurred_at is None:
+            return None, "timestamp debe estar en formato ISO 8601."
+        if timezone.is_naive(occurred_at):
+            occurred_at = timezone.make_aware(occurred_at)
+    return {**data, 'occurred_at': occurred_at}, None
+
+@csrf_exempt
+@require_POST
+def gate_events(request):
+    """
+    Recibe eventos de las talanqueras:
+    {"parking_lot": 1, "events": [{"direction": "entry", "access_code": "...", "timestamp": "..."}]}
+    Cada evento puede traer su propio parking_lot y license_plate en lugar de
+    access_code. Se responde 202 apenas quedan en el búfer (ver gate.py).
+    """
+    if not _gate_token_ok(request):
+        return JsonResponse({'error': "Token inválido."}, status=401)
+    try:
+        body = json.loads(request.body or b'null')
+    except ValueError:
+        return JsonResponse({'error': "El cuerpo no es JSON válido."}, status=400)
+    if isinstance(body, list):
+        body = {'events': body}
+    if not isinstance(body, dict) or not isinstance(body.get('events'), list) or not body['events']:
+        return JsonResponse({'error': "Se esperaba una lista de eventos."}, status=400)
+    if len(body['events']) > gate.BATCH_SIZE:
+        return JsonResponse({'error': f"Máximo {gate.BATCH_SIZE} eventos por petición."}, status=400)
+
+    default_lot = body.get('parking_lot')
+    default_ok = _valid_lot_id(default_lot)
+    parsed, errors = [], []
+    for index, data in enumerate(body['events']):
+        event, error = _parse_gate_event(data)
+        if error is None and not event.get('parking_lot'):
+            if not default_ok:
+                error = "parking_lot debe ser un entero."
+            elif not default_lot:
+                error = "Falta parking_lot."
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            parsed.append(event)
+    lot_ids = {e.get('parking_lot') or default_lot for e in parsed}
+    known = set(ParkingLot.objects.filter(id__in=lot_ids).values_list('id', flat=True))
+    if lot_ids - known:
+        errors.append({'index': None, 'error': f"Parqueaderos inexistentes: {sorted(map(str, lot_ids - known))}"})
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    now = timezone.now()
+    try:
+        gate.buffer.add([gate.build_event(e, default_lot, now) for e in parsed])
+    except gate.BufferFull:
+        return JsonResponse({'error': "Demasiados eventos pendientes, reintente."}, status=503)
+    return JsonResponse({'accepted': len(parsed)}, status=202)
@@ -0,0 +1,619 @@
+"""
+Pruebas de MovieTime (main.py).
+
+Cada prueba trabaja en un directorio temporal propio: main.py usa rutas
+relativas (funciones.csv, ventas.csv, ...) y un backend global. Se ejecutan
+con `python -m unittest test_main` o con pytest.
+"""
+
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+import main
+
+
+def _vender_de_a_uno(codigo: str, intentos: int) -> list:
+    """Trabajo de otra terminal: vende asientos de a uno; [] por cada intento sin cupo."""
+    vendidos = []
+    for _ in range(intentos):
+        try:
+            vendidos += main.vender_asientos(codigo, 1)
+        except main.AsientosInsuficientes:
+            pass
+    return vendidos
+
+
+class EnDirectorioTemporal(unittest.TestCase):
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.tmp = tempfile.mkdtemp(prefix="movietime-test-")
+        os.chdir(self.tmp)
+        self.globales = (main.STORAGE, main.SQLITE_DB, main.FSYNC_POLICY, main.TERMINAL)
+        main.STORAGE = "csv"
+        main._storage = None
+
+    def tearDown(self):
+        if main._storage is not None:
+            main._storage.close()
+            main._storage = None
+        main._funciones_repos.clear()
+        main.STORAGE, main.SQLITE_DB, main.FSYNC_POLICY, main.TERMINAL = self.globales
+        os.chdir(self.anterior)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def ejecutar(self, *argv) -> str:
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            main.main(["--storage", "csv", *argv])
+        return salida.getvalue()
+
+
+class FuncionesRepoTests(EnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        self.repo = main.get_funciones_repo()
+        self.repo.agregar("FUN001", "Dune", "18:00", "12000.00")
+        self.repo.agregar("FUN002", "Alien", "21:00", "9000.00", "40")
+
+    def reescribir(self, filas):
+        """Edición externa de funciones.csv (otra terminal o a mano)."""
+        with open(main.FUNCIONES_CSV, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(main.FUNCIONES_CAMPOS)
+            w.writerows(filas)
+
+    def test_altas_se_indexan_sin_releer(self):
+        with mock.patch.object(self.repo, "_recargar", wraps=self.repo._recargar) as recargar:
+            self.repo.agregar("FUN003", "dune", "21:00", "12000.00")
+            self.assertEqual(self.repo.buscar_por_pelicula(" DUNE "), ["FUN001", "FUN003"])
+            self.assertEqual(self.repo.buscar_por_hora("21:00"), ["FUN002", "FUN003"])
+            recargar.assert_not_called()
+
+    def test_edicion_y_borrado_externos(self):
+        self.reescribir([["FUN001", "Dune: Parte Dos", "18:00", "15000.00", ""]])
+        self.assertIsNone(self.repo.obtener("FUN002"))
+        self.assertEqual(self.repo.buscar_por_pelicula("Dune"), [])
+        self.assertEqual(self.repo.buscar_por_pelicula("dune: parte dos"), ["FUN001"])
+        self.assertEqual(self.repo.buscar_por_hora("21:00"), [])
+        self.assertEqual(self.repo.obtener("FUN001")["precio"], "15000.00")
+
+    def test_fila_repetida_reemplaza_a_la_anterior(self):
+        self.repo.agregar("FUN001", "Tron", "20:00", "8000.00")
+        self.assertEqual(self.repo.buscar_por_pelicula("Dune"), [])
+        self.assertEqual(self.repo.buscar_por_hora("18:00"), [])
+        self.assertEqual(self.repo.buscar_por_pelicula("Tron"), ["FUN001"])
+
+    def test_alta_concurrente_de_otra_terminal(self):
+        with open(main.FUNCIONES_CSV, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(["FUN010", "Heat", "23:00", "7000.00", ""])
+        self.repo.agregar("FUN003", "Up", "15:00", "6000.00")
+        self.assertEqual(sorted(self.repo.todas()), ["FUN001", "FUN002", "FUN003", "FUN010"])
+        self.assertEqual(self.repo.buscar_por_pelicula("heat"), ["FUN010"])
+
+
+class DineroTests(unittest.TestCase):
+    def test_a_centavos(self):
+        casos = {
+            "12000": 1_200_000,
+            "12000.5": 1_200_050,
+            "12000,50": 1_200_050,
+            "0.07": 7,
+            ".5": 50,
+            "-3.10": -310,
+            " 15.000 ": 1_500,
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto=texto):
+                self.assertEqual(main.a_centavos(texto), esperado)
+
+    def test_a_centavos_rechaza_montos_invalidos(self):
+        for texto in ["", ".", "abc", "12.345", "1.2.3", "1e3", "--1"]:
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    main.a_centavos(texto)
+
+    def test_ida_y_vuelta_con_texto(self):
+        for centavos in [0, 5, 1_200_050, -310, 2**40 + 7]:
+            self.assertEqual(main.a_centavos(main.centavos_a_texto(centavos)), centavos)
+
+
+class ResumenTests(EnDirectorioTemporal):
+    DIA = date(2025, 3, 1)
+
+    def setUp(self):
+        super().setUp()
+        main.crear_funcion("Dune", "18:00", 1_200_000, 0, "FUN001")
+
+    def vender(self, cantidad: int, hora: str = "10:00:00"):
+        main.get_storage().save_venta("FUN001", cantidad, cantidad * 1_200_000, f"{self.DIA} {hora}")
+
+    def boletos(self) -> int:
+        return main.resumen_del_dia(self.DIA)["boletos"]
+
+    def test_solo_suma_lo_nuevo(self):
+        self.vender(2)
+        self.assertEqual(self.boletos(), 2)
+        self.vender(3, "11:00:00")
+        with mock.patch.object(main, "rebuild_resumen_ventas") as rebuild:
+            self.assertEqual(self.boletos(), 5)
+            rebuild.assert_not_called()
+        resumen = main.resumen_del_dia(self.DIA)
+        self.assertEqual(resumen["por_hora"], {"10": {"boletos": 2, "total_centavos": 2_400_000},
+                                               "11": {"boletos": 3, "total_centavos": 3_600_000}})
+
+    def test_caida_antes_del_checkpoint_no_duplica(self):
+        self.vender(2)
+        self.boletos()
+        checkpoint = main._leer_json(main._checkpoint_path(), None)
+        self.vender(3, "11:00:00")
+        self.boletos()
+        # el día quedó escrito pero el checkpoint volvió al estado anterior
+        main._escribir_json(main._checkpoint_path(), checkpoint)
+        self.assertEqual(self.boletos(), 5)
+
+    def test_linea_a_medio_escribir_espera(self):
+        self.vender(2)
+        main.get_storage().flush()
+        with open(main.VENTAS_CSV, "ab") as f:
+            f.write(b"2025-03-01 12:00:00,FUN001,4,48")
+        self.assertEqual(self.boletos(), 2)
+        with open(main.VENTAS_CSV, "ab") as f:
+            f.write(b"00000.00\r\n")
+        self.assertEqual(self.boletos(), 6)
+
+    def test_ventas_reescritas_reconstruyen_el_resumen(self):
+        self.vender(2)
+        self.vender(3, "11:00:00")
+        self.assertEqual(self.boletos(), 5)
+        # otra herramienta reescribe ventas.csv: cambia la huella y el tamaño crece
+        with open(main.VENTAS_CSV, "rb") as f:
+            datos = f.read()
+        with open(main.VENTAS_CSV, "wb") as f:
+            f.write(datos.replace(b",FUN001,3,", b",FUN001,8,") + b"2025-03-01 13:00:00,FUN001,1,12000.00\r\n")
+        with mock.patch.object(main, "rebuild_resumen_ventas", wraps=main.rebuild_resumen_ventas) as rebuild:
+            self.assertEqual(self.boletos(), 11)
+            rebuild.assert_called_once()
+
+        with open(main.VENTAS_CSV, "wb") as f:
+            f.write(datos.splitlines(keepends=True)[0])
+        self.assertEqual(self.boletos(), 0)
+
+
+class BinLogVentasTests(EnDirectorioTemporal):
+    FILAS = [
+        ("2025-03-01 10:00:00", "FUN001", 2, "24000.00"),
+        ("2025-03-01 11:30:00", "FUN002", 1, "24000000.00"),  # 2^31 centavos o más
+        ("2025-03-02 09:15:00", "FUN001", 4, "42949672.96"),  # justo 2^32 centavos
+        ("2025-03-02 18:45:59", "FUN003", 3, "99999999999.99"),
+        ("2025-03-03 12:00:00", "FUN002", 1, "-21474836.48"),  # devolución de -2^31
+    ]
+
+    def escribir_ventas(self):
+        main.ensure_csv_headers()
+        with open(main.VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(self.FILAS)
+
+    def test_ida_y_vuelta_csv_bin_csv(self):
+        self.escribir_ventas()
+        self.assertEqual(main.sincronizar_bin(), len(self.FILAS))
+        self.assertEqual(main.bin_a_csv(main.VENTAS_BIN, "copia.csv"), len(self.FILAS))
+        with open(main.VENTAS_CSV, encoding="utf-8") as original, open("copia.csv", encoding="utf-8") as copia:
+            self.assertEqual(list(csv.reader(copia)), list(csv.reader(original)))
+
+    def test_agregar_rango_con_totales_grandes(self):
+        self.escribir_ventas()
+        main.sincronizar_bin()
+        por_dia, por_funcion = main.BinLogVentas(main.VENTAS_BIN).agregar_rango(date(2025, 3, 1), date(2025, 3, 3))
+        esperado_dia, esperado_funcion = {}, {}
+        for fecha_hora, codigo, cantidad, total in self.FILAS:
+            for grupo, clave in ((esperado_dia, fecha_hora[:10]), (esperado_funcion, codigo)):
+                acc = grupo.setdefault(clave, [0, 0])
+                acc[0] += cantidad
+                acc[1] += main.a_centavos(total)
+        self.assertEqual(por_dia, esperado_dia)
+        self.assertEqual(por_funcion, esperado_funcion)
+
+    def test_sincronizar_solo_agrega_lo_nuevo(self):
+        self.escribir_ventas()
+        main.sincronizar_bin()
+        with open(main.VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(["2025-03-04 08:00:00", "FUN001", 1, "12000.00"])
+        self.assertEqual(main.sincronizar_bin(), 1)
+        self.assertEqual(len(list(main.BinLogVentas(main.VENTAS_BIN).iterar())), len(self.FILAS) + 1)
+
+    def test_csv_reescrito_rehace_el_binario(self):
+        self.escribir_ventas()
+        main.sincronizar_bin()
+        # ventas.csv reescrito con códigos más anchos: el offset guardado cae a mitad de archivo
+        with open(main.VENTAS_CSV, "rb") as f:
+            datos = f.read()
+        with open(main.VENTAS_CSV, "wb") as f:
+            f.write(datos.replace(b",FUN0", b",FUN0000"))
+        self.assertEqual(main.sincronizar_bin(), len(self.FILAS))
+        log = main.BinLogVentas(main.VENTAS_BIN)
+        self.assertEqual(log.codigos, ["FUN000001", "FUN000002", "FUN000003"])
+        self.assertEqual([fila[1] for fila in log.iterar()], [f[1].replace("FUN0", "FUN0000") for f in self.FILAS])
+
+    def test_formato_anterior_se_regenera(self):
+        self.escribir_ventas()
+        with open(main.VENTAS_BIN, "wb") as f:
+            f.write(struct.pack("<8sIIqq", b"MTVENTA1", 24, 0, 0, 0))
+        self.assertEqual(main.sincronizar_bin(), len(self.FILAS))
+
+
+class AnalisisRangoTests(EnDirectorioTemporal):
+    VENTAS = [
+        ("FUN001", 2, 2_400_000, "2025-03-01 10:00:00"),
+        ("FUN002", 1, 1_200_000, "2025-03-01 18:30:00"),
+        ("FUN001", 3, 3_600_000, "2025-03-02 11:00:00"),
+        ("FUN001", 1, 1_200_000, "2025-03-05 09:00:00"),
+    ]
+
+    def registrar(self):
+        main.crear_funcion("Dune", "18:00", 1_200_000, 0, "FUN001")
+        main.crear_funcion("Alien", "21:00", 1_200_000, 0, "FUN002")
+        for venta in self.VENTAS:
+            main.get_storage().save_venta(*venta)
+
+    def test_serial_procesos_y_binario_coinciden(self):
+        self.registrar()
+        storage = main.get_storage()
+        for i in range(300):
+            storage.save_venta(f"FUN00{i % 2 + 1}", i % 4 + 1, (i % 4 + 1) * 1_200_000,
+                               f"2025-03-{i % 6 + 1:02d} {10 + i % 12}:{i % 60:02d}:00")
+        desde, hasta = date(2025, 3, 2), date(2025, 3, 4)
+        serial = main.analisis_rango(desde, hasta)
+        self.assertEqual(list(serial["por_dia"]), ["2025-03-02", "2025-03-03", "2025-03-04"])
+        self.assertEqual(serial["boletos"], sum(i % 4 + 1 for i in range(300) if i % 6 + 1 in (2, 3, 4)) + 3)
+        self.assertEqual(serial["total_centavos"], serial["boletos"] * 1_200_000)
+        self.assertEqual(set(serial["por_pelicula"]), {"Dune", "Alien"})
+        self.assertEqual(main.analisis_rango(desde, hasta, procesos=3), serial)
+        self.assertEqual(main.analisis_rango(desde, hasta, binario=True), serial)
+
+    def test_binario_con_sqlite_consulta_la_base(self):
+        main.STORAGE, main.SQLITE_DB = "sqlite", "movietime.db"
+        self.registrar()
+        desde, hasta = date(2025, 3, 1), date(2025, 3, 2)
+        resultado = main.analisis_rango(desde, hasta, binario=True)
+        self.assertEqual(resultado, main.analisis_rango(desde, hasta))
+        self.assertEqual((resultado["boletos"], resultado["total_centavos"]), (6, 7_200_000))
+        self.assertFalse(os.path.exists(main.VENTAS_BIN))
+
+
+class MigracionSQLiteTests(EnDirectorioTemporal):
+    def consultas(self):
+        resumen = main.resumen_del_dia(date(2025, 3, 1))
+        resumen.pop("offset", None)  # posición en ventas.csv, propia del cache del backend CSV
+        return (
+            main.load_funciones(),
+            main.listado_funciones(),
+            main.load_ventas_del_dia(date(2025, 3, 1)),
+            resumen,
+            main.analisis_rango(date(2025, 3, 1), date(2025, 3, 5)),
+        )
+
+    def test_migracion_conserva_los_datos(self):
+        main.crear_funcion("Dune", "18:00", 1_200_000, 0, "FUN001")
+        main.crear_funcion("Alien", "21:00", 1_550_050, 0, "FUN002")
+        for i in range(7):
+            main.save_venta(f"FUN00{i % 2 + 1}", i + 1, (i + 1) * 1_200_000, f"2025-03-0{i % 3 + 1} 1{i}:00:00")
+        main.get_storage().flush()
+        with open(main.VENTAS_CSV, "a", newline="", encoding="utf-8") as f:
+            f.write("no-es-fecha,FUN001,1,12000.00\r\n")
+        en_csv = self.consultas()
+
+        self.assertEqual(main.migrar_csv_a_sqlite("movietime.db", lote=3), (2, 7))
+        main.STORAGE, main.SQLITE_DB = "sqlite", "movietime.db"
+        en_sqlite = self.consultas()
+        for antes, despues in zip(en_csv, en_sqlite):
+            self.assertEqual(antes, despues)
+        self.assertEqual(en_sqlite[3]["boletos"], 1 + 4 + 7)
+
+    def test_no_migra_dos_veces(self):
+        main.crear_funcion("Dune", "18:00", 1_200_000, 0, "FUN001")
+        main.save_venta("FUN001", 1, 1_200_000, "2025-03-01 10:00:00")
+        main.migrar_csv_a_sqlite("movietime.db")
+        with self.assertRaises(ValueError):
+            main.migrar_csv_a_sqlite("movietime.db")
+        main.STORAGE, main.SQLITE_DB = "sqlite", "movietime.db"
+        self.assertEqual(main.resumen_del_dia(date(2025, 3, 1))["boletos"], 1)
+
+
+class AsientosTests(EnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        main.crear_funcion("Dune", "18:00", 1_200_000, 5, "FUN001")
+
+    def test_retener_confirmar_y_liberar(self):
+        token, asientos = main.retener_asientos("FUN001", 2)
+        self.assertEqual(asientos, [1, 2])
+        self.assertEqual(main.asientos_disponibles("FUN001"), 3)
+        # lo retenido no se asigna a otra venta
+        self.assertEqual(main.vender_asientos("FUN001", 1), [3])
+        self.assertEqual(main.confirmar_retencion("FUN001", token), [1, 2])
+        self.assertEqual(main.asientos_disponibles("FUN001"), 2)
+        with self.assertRaises(ValueError):
+            main.confirmar_retencion("FUN001", token)
+
+        token, _ = main.retener_asientos("FUN001", 2)
+        main.liberar_retencion("FUN001", token)
+        self.assertEqual(main.asientos_disponibles("FUN001"), 2)
+
+    def test_retencion_vencida_se_libera(self):
+        token, _ = main.retener_asientos("FUN001", 4, ttl=-1)
+        self.assertEqual(main.asientos_disponibles("FUN001"), 5)
+        with self.assertRaises(ValueError):
+            main.confirmar_retencion("FUN001", token)
+        self.assertEqual(main.vender_asientos("FUN001", 5), [1, 2, 3, 4, 5])
+
+    def test_funcion_agotada(self):
+        self.assertEqual(main.registrar_venta("FUN001", 4)["asientos"], [1, 2, 3, 4])
+        with self.assertRaises(main.AsientosInsuficientes) as ctx:
+            main.registrar_venta("FUN001", 2)
+        self.assertEqual(ctx.exception.disponibles, 1)
+        main.get_storage().flush()
+        with open(main.VENTAS_CSV, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)  # encabezado y la venta que sí se hizo
+        main.devolver_asientos("FUN001", [2])
+        self.assertEqual(main.vender_asientos("FUN001", 2), [2, 5])
+
+    def test_ventas_concurrentes_no_repiten_asientos(self):
+        # varias terminales (procesos) vendiendo a la vez de la misma función
+        main.crear_funcion("Alien", "21:00", 1_200_000, 300, "FUN002")
+        with ProcessPoolExecutor(max_workers=6) as pool:
+            resultados = list(pool.map(_vender_de_a_uno, ["FUN002"] * 6, [60] * 6))
+        vendidos = [a for asientos in resultados for a in asientos]
+        self.assertEqual(sorted(vendidos), list(range(1, 301)))
+        self.assertEqual(main.asientos_disponibles("FUN002"), 0)
+
+
+class LotesTests(EnDirectorioTemporal):
+    def escribir(self, nombre: str, contenido: str):
+        with open(nombre, "w", newline="", encoding="utf-8") as f:
+            f.write(contenido)
+
+    def test_importar_funciones_con_errores_parciales(self):
+        self.escribir("funciones.jsonl", "\n".join([
+            '{"pelicula": "Dune", "hora": "18:00", "precio": "12000", "capacidad": 2}',
+            '{"pelicula": "", "hora": "20:00", "precio": "9000"}',
+            "",
+            '{"pelicula": "Alien", "hora": "21:00", "precio": "9000", "codigo": "ESP1"}',
+            '{"pelicula": "Tron", "hora": "22:00", "precio": "abc"}',
+        ]))
+        resultado = main.importar_funciones("funciones.jsonl")
+        self.assertEqual((resultado["importadas"], resultado["codigos"]), (2, ["FUN001", "ESP1"]))
+        self.assertEqual([e["linea"] for e in resultado["errores"]], [2, 5])
+        self.assertEqual(main.listado_funciones()[0]["disponibles"], 2)
+
+    def test_replay_ventas_conserva_la_hora_y_sigue_tras_un_error(self):
+        main.crear_funcion("Dune", "18:00", 1_200_000, 2, "FUN001")
+        self.escribir("ventas_viejas.csv", "codigo_funcion,cantidad,fecha_hora\r\n"
+                                           "fun001,1,2025-03-01 10:00:00\r\n"
+                                           "FUN009,1,2025-03-01 10:05:00\r\n"
+                                           "FUN001,5,2025-03-01 10:06:00\r\n"
+                                           "FUN001,1,2025-03-01 10:10:00\r\n")
+        resultado = main.replay_ventas("ventas_viejas.csv")
+        self.assertEqual({k: resultado[k] for k in ("ventas", "boletos", "total_centavos")}, {
+            "ventas": 2, "boletos": 2, "total_centavos": 2_400_000})
+        self.assertEqual([e["linea"] for e in resultado["errores"]], [3, 4])
+        self.assertEqual(main.resumen_del_dia(date(2025, 3, 1))["boletos"], 2)
+
+    def test_comandos_importar_y_reporte(self):
+        self.escribir("nuevas.csv", "pelicula,hora,precio\r\nDune,18:00,12000\r\n")
+        self.assertEqual(json.loads(self.ejecutar("importar-funciones", "nuevas.csv"))["importadas"], 1)
+        self.escribir("ventas.jsonl", '{"codigo": "FUN001", "cantidad": 3, "fecha_hora": "2025-03-01 12:00:00"}\n')
+        self.assertEqual(json.loads(self.ejecutar("replay-ventas", "ventas.jsonl"))["boletos"], 3)
+        reporte = json.loads(self.ejecutar("reporte", "--fecha", "2025-03-01"))
+        self.assertEqual((reporte["fecha"], reporte["total_centavos"]), ("2025-03-01", 3_600_000))
+
+
+class _ManejadorSilencioso(main.MovieTimeHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ServidorHTTPTests(EnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ManejadorSilencioso)
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, args=(0.05,), daemon=True)
+        self.hilo.start()
+        self.base = f"http://127.0.0.1:{self.servidor.server_port}"
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.hilo.join()
+        super().tearDown()
+
+    def pedir(self, metodo: str, ruta: str, cuerpo=None):
+        datos = cuerpo if isinstance(cuerpo, bytes) or cuerpo is None else json.dumps(cuerpo).encode()
+        peticion = urllib.request.Request(self.base + ruta, data=datos, method=metodo,
+                                          headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(peticion, timeout=5) as r:
+                return r.status, json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, json.loads(e.read())
+
+    def test_alta_venta_y_resumen(self):
+        status, data = self.pedir("POST", "/funciones", {"pelicula": "Dune", "hora": "18:00",
+                                                         "precio": "12000", "capacidad": 3})
+        self.assertEqual((status, data), (201, {"codigo": "FUN001"}))
+        status, data = self.pedir("POST", "/ventas", {"codigo": "fun001", "cantidad": 2})
+        self.assertEqual(status, 201)
+        self.assertEqual((data["asientos"], data["total_centavos"]), ([1, 2], 2_400_000))
+
+        status, data = self.pedir("GET", "/funciones?pelicula=dune")
+        self.assertEqual((status, [f["disponibles"] for f in data]), (200, [1]))
+        status, data = self.pedir("GET", "/resumen")
+        self.assertEqual((status, data["boletos"]), (200, 2))
+
+    def test_errores(self):
+        self.pedir("POST", "/funciones", {"pelicula": "Dune", "hora": "18:00", "precio": "12000", "capacidad": 1})
+        status, data = self.pedir("POST", "/ventas", {"codigo": "FUN001", "cantidad": 2})
+        self.assertEqual((status, data["disponibles"]), (409, 1))
+        self.assertEqual(self.pedir("POST", "/ventas", {"codigo": "FUN404", "cantidad": 1})[0], 400)
+        self.assertEqual(self.pedir("POST", "/ventas", b"{no es json")[0], 400)
+        self.assertEqual(self.pedir("POST", "/ventas", [1, 2])[0], 400)
+        self.assertEqual(self.pedir("GET", "/resumen?fecha=ayer")[0], 400)
+        self.assertEqual(self.pedir("GET", "/otra")[0], 404)
+
+    def test_ventas_concurrentes(self):
+        self.pedir("POST", "/funciones", {"pelicula": "Dune", "hora": "18:00", "precio": "12000", "capacidad": 10})
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            respuestas = list(pool.map(lambda _: self.pedir("POST", "/ventas", {"codigo": "FUN001", "cantidad": 1}),
+                                       range(14)))
+        vendidos = sorted(a for status, data in respuestas if status == 201 for a in data["asientos"])
+        self.assertEqual(vendidos, list(range(1, 11)))
+        self.assertEqual(sorted(status for status, _ in respuestas).count(409), 4)
+
+
+class VentasWriterTests(EnDirectorioTemporal):
+    """Reapertura tras una caída: el diario quedó con ventas sin confirmar."""
+
+    CABECERA = b"fecha_hora,codigo_funcion,cantidad,total\r\n"
+    LOTE = [
+        b"2025-03-01 10:00:00,FUN001,2,24000.00\r\n",
+        b"2025-03-01 10:01:00,FUN002,1,12000.00\r\n",
+        b"2025-03-01 10:02:00,FUN001,3,36000.00\r\n",
+    ]
+
+    def caida(self, en_csv: bytes, marca: bool = True):
+        """
+        Deja ventas.csv con `en_csv` tras la cabecera y el lote completo en el
+        diario, con la marca de inicio si el lote alcanzó a escribirse.
+        """
+        with open("ventas.csv", "wb") as f:
+            f.write(self.CABECERA + en_csv)
+        with open("ventas.journal", "wb") as f:
+            f.write(b"".join(self.LOTE))
+            if marca:
+                f.write(b"#offset %d\n" % len(self.CABECERA))
+
+    def reabrir(self) -> bytes:
+        main.VentasWriter("ventas.csv", "ventas.journal", max_segundos=0, fsync="nunca").close()
+        self.assertFalse(os.path.exists("ventas.journal"))
+        with open("ventas.csv", "rb") as f:
+            return f.read()
+
+    def test_lote_sin_escribir_se_reaplica(self):
+        self.caida(b"", marca=False)
+        self.assertEqual(self.reabrir(), self.CABECERA + b"".join(self.LOTE))
+
+    def test_venta_identica_a_una_ya_escrita_no_se_pierde(self):
+        # misma fecha, función, cantidad y total que la última fila de ventas.csv
+        self.caida(self.LOTE[-1], marca=False)
+        with open("ventas.journal", "wb") as f:
+            f.write(self.LOTE[-1])
+        self.assertEqual(self.reabrir(), self.CABECERA + self.LOTE[-1] * 2)
+
+    def test_lote_seguido_de_ventas_de_otra_terminal(self):
+        otra = b"2025-03-01 10:03:00,FUN003,1,9000.00\r\n"
+        self.caida(b"".join(self.LOTE) + otra)
+        self.assertEqual(self.reabrir(), self.CABECERA + b"".join(self.LOTE) + otra)
+
+    def test_lote_ya_escrito_no_se_duplica(self):
+        self.caida(b"".join(self.LOTE))
+        self.assertEqual(self.reabrir(), self.CABECERA + b"".join(self.LOTE))
+
+    def test_lote_escrito_a_medias_se_completa(self):
+        escrito = b"".join(self.LOTE)[:50]
+        self.caida(escrito)
+        self.assertEqual(self.reabrir(), self.CABECERA + b"".join(self.LOTE))
+
+    def test_fila_anotada_a_medias_se_descarta(self):
+        self.caida(b"", marca=False)
+        with open("ventas.journal", "ab") as f:
+            f.write(b"2025-03-01 10:0")
+        self.assertEqual(self.reabrir(), self.CABECERA + b"".join(self.LOTE))
+
+    def test_escritor_deja_el_diario_vacio_tras_cada_lote(self):
+        with open("ventas.csv", "wb") as f:
+            f.write(self.CABECERA)
+        writer = main.VentasWriter("ventas.csv", "ventas.journal", max_filas=2, max_segundos=0, fsync="nunca")
+        for fila in self.LOTE:
+            writer.agregar(fila)
+        with open("ventas.journal", "rb") as f:
+            self.assertEqual(f.read(), self.LOTE[-1])
+        writer.close()
+        with open("ventas.csv", "rb") as f:
+            self.assertEqual(f.read(), self.CABECERA + b"".join(self.LOTE))
+
+    def test_diario_vacio_no_toca_el_csv(self):
+        self.caida(self.LOTE[0])
+        with open("ventas.journal", "wb"):
+            pass
+        self.assertEqual(self.reabrir(), self.CABECERA + self.LOTE[0])
+
+
+class RenumerarCodigosTests(EnDirectorioTemporal):
+    def crear(self, *codigos):
+        for codigo in codigos:
+            main.crear_funcion("Película", "20:00", 1_200_000, 0, codigo)
+
+    def test_ensancha_los_codigos(self):
+        self.crear("FUN007", "FUN012")
+        self.assertEqual(main.renumerar_codigos(5), {"FUN007": "FUN00007", "FUN012": "FUN00012"})
+        self.assertEqual(main.siguiente_codigo(), "FUN00013")
+
+    def test_rechaza_anchos_invalidos(self):
+        self.crear("FUN007", "FUN1234")
+        for ancho in [0, -2, 3]:
+            with self.subTest(ancho=ancho):
+                with self.assertRaises(ValueError):
+                    main.renumerar_codigos(ancho)
+        self.assertIsNotNone(main.get_storage().obtener_funcion("FUN007"))
+
+    def test_rango_binario_despues_de_renumerar(self):
+        self.crear("FUN007")
+        storage = main.get_storage()
+        for i in range(60):
+            storage.save_venta("FUN007", 1, 1_200_000, f"2025-03-01 10:{i:02d}:00")
+        main.analisis_rango(date(2025, 3, 1), date(2025, 3, 1), binario=True)
+        main.renumerar_codigos(6)
+        self.assertFalse(os.path.exists(main.VENTAS_BIN))
+        resultado = main.analisis_rango(date(2025, 3, 1), date(2025, 3, 1), binario=True)
+        self.assertEqual(resultado["por_funcion"], {"FUN000007": {"boletos": 60, "total_centavos": 72_000_000}})
+        self.assertEqual(main.BinLogVentas(main.VENTAS_BIN).codigos, ["FUN000007"])
+
+    def test_cli_reporta_el_error(self):
+        self.crear("FUN007")
+        with contextlib.redirect_stderr(io.StringIO()) as errores, self.assertRaises(SystemExit):
+            self.ejecutar("renumerar-codigos", "--ancho", "0")
+        self.assertIn("ancho", errores.getvalue())
+
+
+class BenchmarksTests(EnDirectorioTemporal):
+    """Los comandos bench-* con pocos datos: solo que terminen y reporten."""
+
+    def test_bench_storage(self):
+        salida = self.ejecutar("bench-storage", "--ventas", "200", "--dias", "3")
+        self.assertIn("save_venta", salida)
+
+    def test_bench_ventas(self):
+        salida = self.ejecutar("bench-ventas", "--ventas", "50")
+        self.assertIn("lotes/lote", salida)
+
+    def test_bench_bin(self):
+        salida = self.ejecutar("bench-bin", "--ventas", "500")
+        self.assertIn("ida_y_vuelta_exacta", salida)
+
+
+if __name__ == "__main__":
+    unittest.main()